@@ -20,3 +20,7 @@ DEFAULT_STATUSES=dict(
 logging.getLogger(__name__).addHandler(NullHandler())
 
 from .aquarium import Aquarium
+
+import sys
+if sys.version_info[0] > 2:
+    from .aio import AsyncAquarium
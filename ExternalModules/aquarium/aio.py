@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import functools
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from inspect import ismethod, isgeneratorfunction
+
+from .aquarium import Aquarium
+from .element import Element
+from .entity import Entity
+from .results import Results
+import logging
+logger=logging.getLogger(__name__)
+
+# Methods which never reach the network, they stay synchronous
+LOCAL_METHODS=('cast', 'cast_row', 'cast_many', 'element_many', 'many', 'register_type', 'set_data_variables', 'pop', 'get_timeout', 'is_retriable', 'configure_pool', 'mount',
+               'add_hook', 'remove_hook', 'emit', 'stats', 'reset_stats')
+# Methods streaming their rows, they become asynchronous iterators
+STREAMING_METHODS=('iter_request', 'query_iter', 'traverse_iter')
+# Rows pulled at once from the thread pool by a streaming method
+STREAM_CHUNK_SIZE=64
+
+
+class AsyncProxy(object):
+    """
+    This class wraps an object of the synchronous client (:class:`~aquarium.aquarium.Aquarium`, an entity or an element).
+
+    Every method sending a request returns an awaitable, local methods and attributes are unchanged.
+    The streaming methods (:func:`~aquarium.item.Item.traverse_iter`, :func:`~aquarium.aquarium.Aquarium.query_iter`...) return an asynchronous iterator,
+    used with `async for`.
+    Returned entities and elements are wrapped too, so `await (await aq.item(key).get()).traverse(meshql)` works as expected.
+
+    :param      client:  The asynchronous client running the requests
+    :type       client:  :class:`~aquarium.aio.AsyncAquarium`
+    :param      target:  The wrapped object
+    :type       target:  object
+    """
+
+    def __init__(self, client, target):
+        object.__setattr__(self, '_client', client)
+        object.__setattr__(self, '_target', target)
+
+    def __getattr__(self, name):
+        value=getattr(self._target, name)
+        if isinstance(value, (Entity, Element)):
+            return self._client.wrap(value)
+        elif ismethod(value):
+            if name in LOCAL_METHODS:
+                return self._client.local(value)
+            if name in STREAMING_METHODS or isgeneratorfunction(value):
+                return self._client.iterator(value)
+            return self._client.coroutine(value)
+        return value
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, unwrap(value))
+
+    def __call__(self, *args, **kwargs):
+        # Entity and element instances are created locally: aq.item(key), aq.element(data)
+        return self._client.local(self._target)(*args, **kwargs)
+
+    def __str__(self):
+        return str(self._target)
+
+    def __repr__(self):
+        return repr(self._target)
+
+    def __eq__(self, other):
+        return self._target == unwrap(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def unwrap(self):
+        """
+        Get the wrapped object of the synchronous client
+
+        :returns:   The wrapped object
+        :rtype:     object
+        """
+        return self._target
+
+
+def unwrap(value):
+    """
+    Replace the :class:`~aquarium.aio.AsyncProxy` by their wrapped object, recursively in lists and dictionaries
+
+    :param      value:  The value to unwrap
+    :type       value:  object
+
+    :returns:   The unwrapped value
+    :rtype:     object
+    """
+    if isinstance(value, AsyncProxy):
+        return value.unwrap()
+    elif isinstance(value, list):
+        return [unwrap(v) for v in value]
+    elif isinstance(value, tuple):
+        return tuple(unwrap(v) for v in value)
+    elif type(value) is dict:
+        return dict((k, unwrap(v)) for k, v in value.items())
+    return value
+
+
+def next_chunk(rows, size):
+    """
+    Read the next rows of an iterator
+
+    :param      rows:  The iterator
+    :type       rows:  iterator
+    :param      size:  The maximum number of rows
+    :type       size:  integer
+
+    :returns:   The rows, empty at the end of the iterator
+    :rtype:     list
+    """
+    return list(itertools.islice(rows, size))
+
+
+class AsyncAquarium(AsyncProxy):
+    """
+    This class describes an asyncio client of Aquarium, with the same surface than :class:`~aquarium.aquarium.Aquarium`.
+
+    Every network method of the client, items subclasses and edges is a coroutine, and the streaming methods are asynchronous iterators.
+
+    The requests are sent by the synchronous client from a pool of `concurrency` threads: this is the limit of the requests
+    sent at the same time, by all the event loops using the client. The other requests wait for a free thread.
+    A streaming method only takes a thread while it reads the next chunk of rows.
+
+    .. code-block:: python
+
+        aq = AsyncAquarium(api_url=url, token=token, concurrency=32)
+        project = aq.project(project_key)
+        assets, shots = await asyncio.gather(project.get_assets(), project.get_shots())
+        await asyncio.gather(*[asset.update_data({'status': 'WIP'}) for asset in assets])
+
+        async for row in project.traverse_iter('# -($Child, 5)> $Task'):
+            print(row['item']['data']['name'])
+
+    :param api_url: Specify the URL of the API.
+    :type api_url: string
+    :param token: Specify the authentication token, to avoid :func:`~aquarium.aquarium.Aquarium.signin`
+    :type token: string, optional
+    :param api_version: Specify the API version you want to use (default : `v1`).
+    :type api_version: string, optional
+    :param domain: Specify the domain used for unauthenticated requests.
+    :type domain: string, optional
+    :param concurrency: Number of threads sending the requests, so the maximum number of requests sent at the same time (default : `16`).
+    :type concurrency: integer, optional
+    :param aquarium: An existing synchronous client to use, instead of creating a new one.
+    :type aquarium: :class:`~aquarium.aquarium.Aquarium`, optional
+
+    :var sync: The synchronous client sending the requests
+    :vartype sync: :class:`~aquarium.aquarium.Aquarium`
+    """
+
+    def __init__(self, api_url='', token='', api_version='v1', domain=None, concurrency=16, aquarium=None):
+        if aquarium is None:
+            # One connection per concurrent request, instead of the default 10
+            aquarium=Aquarium(api_url=api_url, token=token, api_version=api_version, domain=domain,
+                              pool_maxsize=concurrency)
+
+        super(AsyncAquarium, self).__init__(self, aquarium)
+        object.__setattr__(self, 'sync', aquarium)
+        object.__setattr__(self, 'concurrency', max(1, int(concurrency)))
+        object.__setattr__(self, 'executor', ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='AsyncAquarium'))
+        object.__setattr__(self, '_semaphores', {})
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Stop the thread pool. Running requests are finished first.
+        """
+        self.executor.shutdown(wait=True)
+
+    def semaphore(self):
+        """
+        Get the semaphore limiting the concurrent requests of the running event loop
+
+        :returns:   The semaphore
+        :rtype:     asyncio.Semaphore
+        """
+        loop=asyncio.get_event_loop()
+        semaphore=self._semaphores.get(loop)
+        if semaphore is None:
+            # Drop the semaphores of closed loops
+            for closed in [l for l in self._semaphores if l.is_closed()]:
+                del self._semaphores[closed]
+            semaphore=asyncio.Semaphore(self.concurrency)
+            self._semaphores[loop]=semaphore
+        return semaphore
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run a function of the synchronous client in the thread pool
+
+        :param      fn:      The function to run
+        :type       fn:      callable
+        :param      args:    The arguments of the function
+        :type       args:    tuple
+        :param      kwargs:  The keywords arguments of the function
+        :type       kwargs:  dictionary
+
+        :returns:   The result of the function, with entities and elements wrapped
+        :rtype:     object
+        """
+        call=functools.partial(fn, *unwrap(args), **unwrap(kwargs))
+        async with self.semaphore():
+            result=await asyncio.get_event_loop().run_in_executor(self.executor, call)
+        return self.wrap(result)
+
+    def coroutine(self, fn):
+        """
+        Create a coroutine function running `fn` with :func:`~aquarium.aio.AsyncAquarium.run`
+
+        :param      fn:  The function of the synchronous client
+        :type       fn:  callable
+
+        :returns:   The coroutine function
+        :rtype:     callable
+        """
+        @functools.wraps(fn)
+        async def call(*args, **kwargs):
+            return await self.run(fn, *args, **kwargs)
+        return call
+
+    def iterator(self, fn):
+        """
+        Create an asynchronous generator function streaming the rows of `fn`, a generator of the synchronous client.
+        The rows are read by chunks of :data:`STREAM_CHUNK_SIZE` with :func:`~aquarium.aio.AsyncAquarium.run`, so the event loop is never blocked.
+
+        :param      fn:  The generator function of the synchronous client
+        :type       fn:  callable
+
+        :returns:   The asynchronous generator function
+        :rtype:     callable
+        """
+        @functools.wraps(fn)
+        async def call(*args, **kwargs):
+            rows=await self.run(fn, *args, **kwargs)
+            done=False
+            try:
+                while not done:
+                    chunk=await self.run(next_chunk, rows, STREAM_CHUNK_SIZE)
+                    done=not chunk
+                    for row in chunk:
+                        yield row
+            finally:
+                # Stopped early: closing the generator closes the response
+                if not done and hasattr(rows, 'close'):
+                    await self.run(rows.close)
+        return call
+
+    def local(self, fn):
+        """
+        Wrap a local function of the synchronous client, which doesn't send requests
+
+        :param      fn:  The function of the synchronous client
+        :type       fn:  callable
+
+        :returns:   The wrapped function
+        :rtype:     callable
+        """
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            return self.wrap(fn(*unwrap(args), **unwrap(kwargs)))
+        return call
+
+    def wrap(self, value):
+        """
+        Wrap the entities and elements of a result, recursively in lists, lazy results and dictionaries
+
+        :param      value:  The result of the synchronous client
+        :type       value:  object
+
+        :returns:   The wrapped result
+        :rtype:     object
+        """
+        if isinstance(value, (Entity, Element)):
+            return AsyncProxy(self, value)
+        elif isinstance(value, Results):
+            if value.cast is None:
+                return value
+            # Still lazy: the rows are wrapped when they are casted
+            cast=value.cast
+            return Results(value.raw, lambda row: self.wrap(cast(row)))
+        elif isinstance(value, list):
+            return [self.wrap(v) for v in value]
+        elif type(value) is dict:
+            return dict((k, self.wrap(v)) for k, v in value.items())
+        return value
@@ -5,7 +5,11 @@ import mimetypes
 from .auth import AquariumAuth
 from .item import Item
 from .edge import Edge
-from .tools import evaluate
+from .tools import evaluate, backoff_delay, is_not_sent, retry_after, iter_json_array
+from .cache import ResponseCache, RevisionStore, READ_ONLY_POSTS, is_read_only
+from .codec import get_codec
+from .results import Results
+from .stats import RequestStats, RequestEvent, body_size
 from .items.user import User
 from .items.template import Template
 from .items.project import Project
@@ -19,6 +23,7 @@ from .element import Element
 from .utils import Utils
 
 import requests
+from requests.adapters import HTTPAdapter
 
 import sys
 if sys.version_info[0] > 2:
@@ -27,9 +32,37 @@ else:
     from urlparse import urljoin, urlparse
 
 import json
+import re
+import threading
+import time
+import uuid
 import logging
 logger=logging.getLogger(__name__)
 
+# Verbs which can be sent twice without side effect
+IDEMPOTENT_VERBS=('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+# POST endpoints creating data: an idempotency key is sent, so a server honouring it doesn't create duplicates on retry
+IDEMPOTENCY_KEY_POSTS=(r'^items$', r'^edges$', r'^items/[^/]+/(append|copy|permissions)$')
+# Status codes meaning the request can be sent again later
+RETRY_STATUSES=(429, 502, 503, 504)
+# (connect, read) timeouts in seconds, by endpoint pattern. The first match wins.
+DEFAULT_TIMEOUTS=[
+    (r'(^|/)(upload|download)$|^/?files/', (10, 600)),
+    (r'^query$|/traverse$|/export/json$|/import/json$', (10, 300)),
+]
+# Item subclasses by item type, used by cast. Changes apply to the next clients, see Aquarium.register_type for one client
+ITEM_TYPES={
+    'Project': Project,
+    'Playlist': Playlist,
+    'User': User,
+    'Template': Template,
+    'Usergroup': Usergroup,
+    'Asset': Asset,
+    'Shot': Shot,
+    'Task': Task,
+    'Organisation': Organisation,
+}
+
 
 class Aquarium(object):
     """
@@ -43,6 +76,42 @@ class Aquarium(object):
     :type api_version: string, optional
     :param domain: Specify the domain used for unauthenticated requests. Mainly for Aquarium Fatfish Lab dev or local Aquarium server without DNS
     :type domain: string, optional
+    :param pool_connections: Number of connection pools to cache, one per host (default : `10`).
+    :type pool_connections: integer, optional
+    :param pool_maxsize: Maximum number of connections kept open per host. Set it to the number of threads sharing the client (default : `10`).
+    :type pool_maxsize: integer, optional
+    :param pool_block: When all the connections are in use, wait for a free one instead of opening a throwaway connection (default : `False`).
+    :type pool_block: boolean, optional
+    :param keep_alive: Reuse the connections between requests (default : `True`).
+    :type keep_alive: boolean, optional
+    :param timeout: Default (connect, read) timeout of the requests, in seconds (default : `(10, 120)`).
+    :type timeout: tuple or float, optional
+    :param timeouts: Timeouts by endpoint, as a list of (regex, timeout), checked before :data:`DEFAULT_TIMEOUTS`.
+    :type timeouts: list, optional
+    :param max_retries: Maximum number of retries of a failed request (default : `3`).
+    :type max_retries: integer, optional
+    :param backoff_factor: Delay before the first retry, doubled after each attempt, with jitter (default : `0.5`).
+    :type backoff_factor: float, optional
+    :param backoff_max: Maximum delay between two attempts, `Retry-After` included (default : `30`).
+    :type backoff_max: float, optional
+    :param retry_idempotency_key: Retry the item and edge creations like the idempotent requests. Only enable it when the server deduplicates the requests by their `Idempotency-Key` header (default : `False`).
+    :type retry_idempotency_key: boolean, optional
+    :param cache: Cache the responses of the read requests. `True` uses a :class:`~aquarium.cache.ResponseCache` with the default settings (default : `None`).
+    :type cache: boolean or :class:`~aquarium.cache.ResponseCache`, optional
+    :param codec: JSON codec encoding the requests and decoding the responses: `json`, `orjson` or an object with `dumps` and `loads` methods. By default orjson is used when it is installed (default : `None`).
+    :type codec: string or object, optional
+    :param revalidate: Send conditional requests in :func:`~aquarium.item.Item.get` and :func:`~aquarium.edge.Edge.get`, and reuse the last entity when the item didn't change (default : `False`).
+    :type revalidate: boolean, optional
+    :param transport: Transport sending the requests instead of the connection pool, like :class:`~aquarium.transport.RecordingTransport` or :class:`~aquarium.transport.ReplayTransport` (default : `None`).
+    :type transport: :class:`requests.adapters.BaseAdapter`, optional
+
+    .. note::
+        The client can be shared between threads. The token is protected by a lock, and the connections come from a thread-safe pool.
+
+    .. note::
+        Idempotent requests (GET, PUT, DELETE, queries and traverses) are retried on connection errors and on 429/502/503/504 responses.
+        Other requests are only retried when the server didn't process them: on 429, and on connection errors raised before the request was sent.
+        Item and edge creations are sent with an `Idempotency-Key` header, reused by their retries. They are retried like the idempotent requests with `retry_idempotency_key`.
 
     :var token: Get the current token (populated after a first :func:`~aquarium.aquarium.Aquarium.signin`)
     :var edge: Access to Edge class
@@ -71,18 +140,45 @@ class Aquarium(object):
     :vartype utils: :class:`~aquarium.utils.Utils`
     """
 
-    def __init__(self, api_url='', token='', api_version='v1', domain=None):
+    def __init__(self, api_url='', token='', api_version='v1', domain=None,
+                 pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True,
+                 timeout=(10, 120), timeouts=None, max_retries=3, backoff_factor=0.5, backoff_max=30,
+                 retry_idempotency_key=False, cache=None, revalidate=False, codec=None, transport=None):
         """
         Constructs a new instance.
         """
+        self.lock=threading.RLock()
+
         # Session
         self.session=requests.Session()
+        self.transport=transport
+        self.configure_pool(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                            pool_block=pool_block, keep_alive=keep_alive)
 
         self.api_url=api_url
         self.api_version=api_version
         self.token=token
         self.domain=domain
 
+        # Resilience
+        self.timeout=timeout
+        self.timeouts=list(timeouts or []) + DEFAULT_TIMEOUTS
+        self.max_retries=max(0, int(max_retries))
+        self.backoff_factor=backoff_factor
+        self.backoff_max=backoff_max
+        self.retry_idempotency_key=retry_idempotency_key
+
+        # Responses
+        self.codec=get_codec(codec)
+        if cache is True:
+            cache=ResponseCache()
+        self.cache=cache or None
+        self.revisions=RevisionStore() if revalidate else None
+
+        # Instrumentation
+        self.request_stats=RequestStats()
+        self.hooks=dict(before_request=[], after_request=[self.request_stats])
+
         # Classes
         self.element=Element(parent=self)
         self.item=Item(parent=self)
@@ -98,6 +194,126 @@ class Aquarium(object):
         self.task=Task(parent=self)
         self.shot=Shot(parent=self)
         self.asset=Asset(parent=self)
+        # Item subclasses by type, for cast
+        self.item_types={}
+        for type, cls in ITEM_TYPES.items():
+            self.register_type(type, cls)
+
+    @property
+    def token(self):
+        with self.lock:
+            return self._token
+
+    @token.setter
+    def token(self, value):
+        with self.lock:
+            self._token=value
+
+    def configure_pool(self, pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True):
+        """
+        Configure the connection pool of the session
+
+        :param      pool_connections:  Number of connection pools to cache, one per host
+        :type       pool_connections:  integer, optional
+        :param      pool_maxsize:      Maximum number of connections kept open per host
+        :type       pool_maxsize:      integer, optional
+        :param      pool_block:        Wait for a free connection when all of them are in use
+        :type       pool_block:        boolean, optional
+        :param      keep_alive:        Reuse the connections between requests
+        :type       keep_alive:        boolean, optional
+        """
+        with self.lock:
+            self.pool_maxsize=max(1, int(pool_maxsize))
+            previous=getattr(self, 'adapter', None)
+            self.adapter=HTTPAdapter(pool_connections=max(1, int(pool_connections)),
+                                     pool_maxsize=self.pool_maxsize, pool_block=pool_block)
+            if previous is not None and getattr(self.transport, 'adapter', None) is previous:
+                self.transport.adapter=None
+            self.mount(self.transport)
+            if keep_alive:
+                self.session.headers['Connection']='keep-alive'
+            else:
+                self.session.headers['Connection']='close'
+
+    def mount(self, transport=None):
+        """
+        Send the requests with a transport
+
+        A transport wrapping another one, like :class:`~aquarium.transport.RecordingTransport`, wraps the connection pool by default.
+
+        :param      transport:  The transport, None for the connection pool
+        :type       transport:  :class:`requests.adapters.BaseAdapter`, optional
+        """
+        with self.lock:
+            self.transport=transport
+            if transport is not None and getattr(transport, 'adapter', False) is None:
+                transport.adapter=self.adapter
+            adapter=transport if transport is not None else self.adapter
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+
+    def warm_up(self, connections=None):
+        """
+        Open connections to the server ahead of the first requests, by pinging it in parallel
+
+        :param      connections:  Number of connections to open (default : `pool_maxsize`)
+        :type       connections:  integer, optional
+
+        :returns:   Time spent, in seconds
+        :rtype:     float
+        """
+        connections=max(1, int(connections or self.pool_maxsize))
+        logger.debug('Warm up %s connections to %s', connections, self.api_url)
+        def ping():
+            try:
+                self.do_request('GET', 'ping', decoding=False)
+            except Exception as e:
+                # Any failure is left to the first real request
+                logger.debug('Warm up failed : %s', e)
+
+        start=time.time()
+        threads=[threading.Thread(target=ping) for i in range(connections)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.time() - start
+
+    def get_timeout(self, endpoint=''):
+        """
+        Get the timeout of an endpoint
+
+        :param      endpoint:  The API endpoint
+        :type       endpoint:  string
+
+        :returns:   The (connect, read) timeout
+        :rtype:     tuple or float
+        """
+        endpoint=endpoint.split('?')[0].strip('/')
+        for pattern, timeout in self.timeouts:
+            if re.search(pattern, endpoint):
+                return timeout
+        return self.timeout
+
+    def is_retriable(self, verb='GET', endpoint='', idempotency_key=None):
+        """
+        Check if a request can be sent again after a connection error or a 502/503/504 response
+
+        :param      verb:             The HTTP verb
+        :type       verb:             string
+        :param      endpoint:         The API endpoint
+        :type       endpoint:         string
+        :param      idempotency_key:  The idempotency key sent with the request, only trusted with `retry_idempotency_key`
+        :type       idempotency_key:  string, optional
+
+        :returns:   True if the request is idempotent
+        :rtype:     boolean
+        """
+        verb=verb.upper()
+        if verb in IDEMPOTENT_VERBS or (idempotency_key and self.retry_idempotency_key):
+            return True
+        endpoint=endpoint.split('?')[0].strip('/')
+        return verb == 'POST' and any(re.search(pattern, endpoint) for pattern in READ_ONLY_POSTS)
 
     def do_request(self, *args, **kwargs):
         """
@@ -105,12 +321,13 @@ class Aquarium(object):
 
         :param      args:    Parameters used to send the request : HTTP verb, API endpoint
         :type       args:    tuple
-        :param      kwargs:  Headers, data and parameters used for the request
+        :param      kwargs:  Headers, data and parameters used for the request. `idempotency_key` overrides the generated key, `cache=False` skips the response cache
         :type       kwargs:  dictionary
 
         :returns:   Request response
         :rtype:     List or dictionary
         """
+        # Read the token once, so a request never mixes two tokens
         token=self.token
 
         decoding=True
@@ -125,6 +342,7 @@ class Aquarium(object):
 
         args=list(args)
         typ=args[0]
+        endpoint=args[1] if len(args) > 1 else ''
         path = self.api_url
 
         if len(args) > 1:
@@ -139,58 +357,357 @@ class Aquarium(object):
         else:
             path = urljoin(path, self.api_version)
 
-        logger.debug('Send request : %s %s', typ, path)
-        response=self.session.request(typ, path, headers=headers, auth=AquariumAuth(self.token, self.domain), **kwargs)
-        evaluate(response)
-        if decoding:
-            response=response.json()
+        idempotency_key=kwargs.pop('idempotency_key', None)
+        if idempotency_key is None and typ.upper() == 'POST' and \
+                any(re.search(pattern, endpoint.split('?')[0].strip('/')) for pattern in IDEMPOTENCY_KEY_POSTS):
+            idempotency_key=str(uuid.uuid4())
+        if idempotency_key:
+            headers=dict(headers or {})
+            headers['Idempotency-Key']=idempotency_key
+
+        # Encode the JSON body with the codec, instead of requests
+        payload=kwargs.get('data')
+        if kwargs.get('json') is not None:
+            payload=kwargs.pop('json')
+            kwargs['data']=self.codec.dumps(payload)
+            headers=dict(headers or {})
+            headers.setdefault('Content-Type', 'application/json')
+
+        event=RequestEvent(typ, endpoint, url=path, request_bytes=body_size(kwargs.get('data')), payload=payload)
+
+        use_cache=kwargs.pop('cache', True)
+        cache=self.cache if decoding else None
+        cache_key=None
+        if cache is not None and use_cache and cache.is_cacheable(typ, endpoint):
+            cache_key=cache.make_key(token, typ, endpoint, kwargs.get('params'), payload)
+            result=cache.get(cache_key, self.codec.loads)
+            if result is not None:
+                logger.debug('Cached response : %s %s', typ, endpoint)
+                event.cached=True
+                event.rows=len(result) if isinstance(result, list) else None
+                self.emit('after_request', event)
+                return result
+
+        kwargs.setdefault('timeout', self.get_timeout(endpoint))
+        retriable=self.is_retriable(typ, endpoint, idempotency_key)
+
+        self.emit('before_request', event)
+        start=time.time()
+        try:
+            response=self.send(event, typ, path, headers=headers, auth=AquariumAuth(token, self.domain),
+                               retriable=retriable, **kwargs)
+            event.status_code=response.status_code
+
+            evaluate(response)
+            if decoding:
+                content=response.content
+                event.response_bytes=len(content)
+                # Straight from the bytes, without decoding them to text first
+                result=self.codec.loads(content)
+                event.rows=len(result) if isinstance(result, list) else None
+                if cache_key is not None:
+                    cache.set(cache_key, content, result, endpoint)
+                elif cache is not None and not is_read_only(typ, endpoint):
+                    cache.invalidate_request(endpoint, payload, result)
+                response=result
+            else:
+                event.response_bytes=int(response.headers.get('Content-Length') or 0)
+                if self.cache is not None and not is_read_only(typ, endpoint):
+                    self.cache.invalidate_request(endpoint, payload)
+        except Exception as e:
+            event.error=e
+            raise
+        finally:
+            event.seconds=time.time() - start
+            self.emit('after_request', event)
         return response
 
+    def send(self, event, typ, path, retriable=False, **kwargs):
+        """
+        Send a request with the session, and retry it on connection errors and 429/502/503/504 responses.
+        A request which is not retriable is only retried on 429 and when the connection failed before it was sent.
+        A file upload is never retried: its files are consumed by the first attempt.
+
+        :param      event:      The request, its `retries` is updated
+        :type       event:      :class:`~aquarium.stats.RequestEvent`
+        :param      typ:        The HTTP verb
+        :type       typ:        string
+        :param      path:       The full url
+        :type       path:       string
+        :param      retriable:  The request is idempotent, see :func:`~aquarium.aquarium.Aquarium.is_retriable`
+        :type       retriable:  boolean
+        :param      kwargs:     Headers, data and parameters of `requests.Session.request`
+        :type       kwargs:     dictionary
+
+        :returns:   The last response
+        :rtype:     Response object
+        """
+        max_retries=0 if 'files' in kwargs else self.max_retries
+        attempt=0
+        while True:
+            logger.debug('Send request : %s %s', typ, path)
+            try:
+                response=self.session.request(typ, path, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if not (retriable or is_not_sent(e)) or attempt >= max_retries:
+                    raise
+                delay=backoff_delay(attempt, self.backoff_factor, self.backoff_max)
+                logger.warning('Request %s %s failed (%s), retry in %.1fs', typ, path, e, delay)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= max_retries \
+                        or not (retriable or response.status_code == 429):
+                    return response
+                delay=retry_after(response)
+                if delay is None:
+                    delay=backoff_delay(attempt, self.backoff_factor, self.backoff_max)
+                delay=min(delay, self.backoff_max)
+                logger.warning('Request %s %s answered %s, retry in %.1fs', typ, path, response.status_code, delay)
+                response.close()
+
+            time.sleep(delay)
+            attempt+=1
+            event.retries=attempt
+
+    def add_hook(self, name, hook):
+        """
+        Call a function on each request
+
+        .. code-block:: python
+
+            aq.add_hook('after_request', lambda event: print(event.pattern, event.seconds))
+
+        :param      name:  `before_request`, called before sending a request (not for cached responses), or `after_request`, called once it's done
+        :type       name:  string
+        :param      hook:  The function, called with a :class:`~aquarium.stats.RequestEvent`
+        :type       hook:  callable
+        """
+        if name not in self.hooks:
+            raise ValueError('Unknown hook "{0}", use one of {1}'.format(name, ', '.join(sorted(self.hooks))))
+        with self.lock:
+            self.hooks[name]=self.hooks[name] + [hook]
+
+    def remove_hook(self, name, hook):
+        """
+        Stop calling a function added with :func:`~aquarium.aquarium.Aquarium.add_hook`
+        """
+        with self.lock:
+            self.hooks[name]=[h for h in self.hooks.get(name, []) if h is not hook]
+
+    def emit(self, name, event):
+        # A failing hook never fails the request
+        for hook in self.hooks.get(name, []):
+            try:
+                hook(event)
+            except Exception as e:
+                logger.warning('Hook %s %r failed : %s', name, hook, e)
+
+    def stats(self):
+        """
+        Get the metrics of the requests sent by the client, by endpoint pattern, and of its caches
+
+        :returns:   {requests: {`VERB pattern`: {calls, cached, errors, retries, request_bytes, response_bytes, seconds, mean_ms, max_ms, status_codes, latency_ms}}, cache, revisions}
+        :rtype:     dictionary
+        """
+        result=dict(requests=self.request_stats.to_dict())
+        if self.cache is not None:
+            result['cache']=self.cache.stats()
+        if self.revisions is not None:
+            result['revisions']=self.revisions.stats()
+        return result
+
+    def reset_stats(self):
+        """
+        Reset the metrics of :func:`~aquarium.aquarium.Aquarium.stats`
+        """
+        self.request_stats.reset()
+        if self.cache is not None:
+            self.cache.reset_stats()
+        if self.revisions is not None:
+            self.revisions.reset_stats()
+
+    def iter_request(self, *args, **kwargs):
+        """
+        Execute a request answering a JSON array, and yield its rows while the response is downloaded
+
+        :param      args:    Parameters used to send the request : HTTP verb, API endpoint
+        :type       args:    tuple
+        :param      kwargs:  Headers, data and parameters used for the request. `cast=True` casts each row, `chunk_size` sets the read size
+        :type       kwargs:  dictionary
+
+        :returns:   Generator of rows
+        :rtype:     generator
+        """
+        cast=kwargs.pop('cast', False)
+        chunk_size=kwargs.pop('chunk_size', 64 * 1024)
+        response=self.do_request(*args, decoding=False, stream=True, **kwargs)
+        try:
+            for row in iter_json_array(response.iter_content(chunk_size=chunk_size), response.encoding):
+                yield self.cast_row(row) if cast else row
+        finally:
+            response.close()
+
+    def cast_row(self, row):
+        """
+        Cast a row of a query or traverse: an item or edge with :func:`~aquarium.aquarium.Aquarium.cast`, a VIEW with :func:`~aquarium.element.Element`
+
+        :param      row:  The row
+        :type       row:  object
+
+        :returns:   The casted row
+        :rtype:     :class:`~aquarium.item.Item` | :class:`~aquarium.edge.Edge` | :class:`~aquarium.element.Element` | object
+        """
+        if isinstance(row, dict):
+            if '_id' in row:
+                return self.cast(row)
+            return self.element(row)
+        return row
+
+    def get_entity(self, endpoint='', params=None):
+        """
+        Get an item or an edge and cast it.
+
+        With `revalidate`, the request is conditional: the server answers 304 when the `ETag` didn't change,
+        and the last entity is returned as is when the server answers 304 or the same `_rev`.
+
+        .. warning::
+            A revalidated entity is shared between the calls. Don't change it if you didn't change it on Aquarium too.
+
+        :param      endpoint:  The API endpoint of the item or edge
+        :type       endpoint:  string
+        :param      params:    The parameters of the request
+        :type       params:    dictionary, optional
+
+        :returns:   Item or Edge object
+        :rtype:     :class:`~aquarium.item.Item` or subclass | :class:`~aquarium.edge.Edge`
+        """
+        revisions=self.revisions
+        if revisions is None:
+            result=self.do_request('GET', endpoint, params=params)
+            return self.cast(result)
+
+        key=(self.token or '', endpoint, json.dumps(params, sort_keys=True))
+        known=revisions.get(key)
+        headers={}
+        if known is not None and known.etag:
+            headers['If-None-Match']=known.etag
+
+        response=self.do_request('GET', endpoint, params=params, headers=headers, decoding=False, cache=False)
+        etag=response.headers.get('ETag')
+        if response.status_code == 304 and known is not None:
+            logger.debug('Not modified : %s', endpoint)
+            return revisions.hit(key, etag)
+
+        result=self.codec.loads(response.content)
+        rev=result.get('_rev') if isinstance(result, dict) else None
+        if known is not None and rev and rev == known.rev:
+            logger.debug('Same revision : %s %s', endpoint, rev)
+            return revisions.hit(key, etag)
+
+        entity=self.cast(result)
+        revisions.set(key, etag, rev, entity)
+        return entity
+
+    def register_type(self, type, cls):
+        """
+        Cast the items of a type to a subclass of :class:`~aquarium.item.Item`
+
+        .. code-block:: python
+
+            class Version(Item):
+                def get_medias(self):
+                    return self.traverse(meshql='# -($Child)> $Media')
+
+            aq.version = aq.register_type('Version', Version)
+            aq.cast({'_id': 'items/123', '_key': '123', 'type': 'Version'}).get_medias()
+
+        :param      type:  The item type
+        :type       type:  string
+        :param      cls:   The subclass of Item
+        :type       cls:   class
+
+        :returns:   The instance of the subclass creating the items, like `aq.asset`
+        :rtype:     :class:`~aquarium.item.Item` subclass
+        """
+        if not issubclass(cls, Item):
+            raise TypeError('{0} is not a subclass of Item'.format(cls.__name__))
+        factory=cls(parent=self)
+        with self.lock:
+            item_types=dict(self.item_types)
+            item_types[type]=factory
+            self.item_types=item_types
+        return factory
+
     def cast(self, data={}):
         """
         Creates an item or edge instance from a dictionary
 
+        The class of an item is the one registered for its type (see :func:`~aquarium.aquarium.Aquarium.register_type`), :class:`~aquarium.item.Item` by default.
+
         :param      data:         The object item or edge from Aquarium API
         :type       data:         dictionary
 
         :returns:   Instance of Edge or Item or items subclass
         :rtype:     :class:`~aquarium.edge.Edge` | :class:`~aquarium.item.Item` : [:class:`~aquarium.items.asset.Asset` | :class:`~aquarium.items.project.Project` | :class:`~aquarium.items.shot.Shot` | :class:`~aquarium.items.task.Task` | :class:`~aquarium.items.template.Template` | :class:`~aquarium.items.user.User` | :class:`~aquarium.items.usergroup.Usergroup`]
         """
-        value=data
-        #As Entity
-        if data and '_id' in data.keys():
-            id=data.get('_id')
-            cls=None
-            #As Item
-            if id.split('/')[0]=='items':
-                type=data.get('type')
-                if type=='Project':
-                    cls=self.project
-                elif type=='Playlist':
-                    cls=self.playlist
-                elif type=='User':
-                    cls=self.user
-                elif type=='Template':
-                    cls=self.template
-                elif type=='Usergroup':
-                    cls=self.usergroup
-                elif type=='Asset':
-                    cls=self.asset
-                elif type=='Shot':
-                    cls=self.shot
-                elif type=='Task':
-                    cls=self.task
-                elif type=='Organisation':
-                    cls=self.organisation
-                else:
-                    cls=self.item
-            #As Edge
-            elif id.split('/')[0]=='connections':
-                cls=self.edge
-            if cls is not None:
-                value=cls(data=data)
-
-        return value
+        if not isinstance(data, dict):
+            return data
+        id=data.get('_id')
+        if not id:
+            return data
+        #As Item
+        if id.startswith('items/'):
+            return self.item_types.get(data.get('type'), self.item)(data=data)
+        #As Edge
+        elif id.startswith('connections/'):
+            return self.edge(data=data)
+        return data
+
+    def cast_many(self, rows, lazy=False):
+        """
+        Cast a list of items and edges, like `[aq.cast(data) for data in rows]` with less overhead per row
+
+        :param      rows:  The objects items or edges from Aquarium API
+        :type       rows:  list of dictionary
+        :param      lazy:  Return a :class:`~aquarium.results.Results` casting each row when it is read, instead of a list
+        :type       lazy:  boolean, optional
+
+        :returns:   The casted rows
+        :rtype:     list of :class:`~aquarium.item.Item` | :class:`~aquarium.edge.Edge`
+        """
+        if lazy:
+            return Results(rows, self.cast)
+        item_types=self.item_types
+        item=self.item
+        edge=self.edge
+        result=[]
+        append=result.append
+        for data in rows:
+            id=data.get('_id') if isinstance(data, dict) else None
+            if not id:
+                append(data)
+            elif id.startswith('items/'):
+                append(item_types.get(data.get('type'), item)(data=data))
+            elif id.startswith('connections/'):
+                append(edge(data=data))
+            else:
+                append(data)
+        return result
+
+    def element_many(self, rows, lazy=False):
+        """
+        Create the elements of a list of traverse or query rows, like `[aq.element(data) for data in rows]` with less overhead per row
+
+        :param      rows:  The rows
+        :type       rows:  list of dictionary
+        :param      lazy:  Return a :class:`~aquarium.results.Results` creating each element when it is read, instead of a list
+        :type       lazy:  boolean, optional
+
+        :returns:   The elements
+        :rtype:     list of :class:`~aquarium.element.Element`
+        """
+        if lazy:
+            return Results(rows, self.element)
+        return self.element.many(rows)
 
     def signin(self, email='', password=''):
         """
@@ -289,7 +806,7 @@ class Aquarium(object):
 
         users = self.do_request('GET', 'users')
 
-        users = [self.cast(user) for user in users]
+        users = self.cast_many(users)
         return users
 
     def create_user (self, email, name=None, aquarium_url=None):
@@ -392,6 +909,28 @@ class Aquarium(object):
         result=self.do_request('POST', 'query', json=data)
         return result
 
+    def query_iter(self, meshql='', aliases={}, cast=False):
+        """
+        Query entities, and yield each row as soon as it is downloaded
+
+        .. tip::
+            Use it for large results: the response is never fully loaded in memory
+
+        :param      meshql:        The meshql string
+        :type       meshql:        string
+        :param      aliases:       The aliases used in the meshql query
+        :type       aliases:       dictionary
+        :param      cast:          Cast the rows with :func:`~aquarium.aquarium.Aquarium.cast_row`
+        :type       cast:          boolean, optional
+
+        :returns:   Generator of item, edge or VIEW used in the meshql query
+        :rtype:     generator
+        """
+        logger.debug('Send query (streaming) : meshql : %s / aliases : %r',
+                     meshql, aliases)
+        data=dict(query=meshql, aliases=aliases)
+        return self.iter_request('POST', 'query', json=data, cast=cast)
+
     def get_file(self, file_path):
         """
         Get stored file on Aquarium server
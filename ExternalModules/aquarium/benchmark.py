@@ -0,0 +1,427 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the Aquarium client against a local stand-in server.
+
+Usage::
+
+    python -m aquarium.benchmark pool --threads 1 2 4 8 16 32 --requests 1000 --latency 0.01
+    python -m aquarium.benchmark codec --assets 5000 --repeat 5
+    python -m aquarium.benchmark cast --assets 5000 --repeat 10
+    python -m aquarium.benchmark lazy --assets 5000 --repeat 10
+    python -m aquarium.benchmark replay project.cassette.json --threads 8 --latency 0.02 --repeat 3
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+from .aquarium import Aquarium
+from .codec import CODECS, get_codec
+from .results import Results
+from .transport import Cassette, ReplayTransport, decode_body
+import logging
+logger=logging.getLogger(__name__)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Answers the Aquarium API routes used by the benchmarks with static data, after the server latency.
+    """
+    protocol_version='HTTP/1.1'
+    # Headers and body are written separately: don't wait for the delayed ACK
+    disable_nagle_algorithm=True
+
+    def log_message(self, format, *args):
+        pass
+
+    def end_headers(self):
+        # Tell the client the connection won't be reused, like any HTTP/1.1 server
+        if self.headers.get('Connection', '').lower() == 'close':
+            self.send_header('Connection', 'close')
+        BaseHTTPRequestHandler.end_headers(self)
+
+    def send_json(self, data, status=200):
+        body=json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self):
+        length=int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def handle_request(self):
+        self.read_body()
+        self.server.count()
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        path=self.path.split('?')[0].rstrip('/')
+        if path.endswith('/ping'):
+            body=b'pong'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        match=re.search(r'/items/([^/]+)(/traverse)?$', path)
+        if match is None:
+            return self.send_json({'error': 'Not found'}, status=404)
+
+        item=self.server.item(match.group(1))
+        if match.group(2):
+            return self.send_json([{'item': item}])
+        return self.send_json(item)
+
+    do_GET=handle_request
+    do_POST=handle_request
+    do_PATCH=handle_request
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Local HTTP server standing in for Aquarium, started in a background thread
+
+    :param      latency:  Seconds spent by the server on each request
+    :type       latency:  float, optional
+    :param      handler:  The request handler class
+    :type       handler:  class, optional
+    """
+    daemon_threads=True
+    request_queue_size=128
+
+    def __init__(self, latency=0, handler=StandInHandler):
+        ThreadingHTTPServer.__init__(self, ('127.0.0.1', 0), handler)
+        self.latency=latency
+        self.requests=0
+        self._lock=threading.Lock()
+        self._thread=threading.Thread(target=self.serve_forever, name='AquariumStandIn')
+        self._thread.daemon=True
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{0}/'.format(self.server_address[1])
+
+    def count(self):
+        with self._lock:
+            self.requests+=1
+
+    def item(self, key):
+        return {
+            '_id': 'items/' + key,
+            '_key': key,
+            '_rev': '_rev' + key,
+            'type': 'Asset',
+            'createdAt': '2023-01-01T00:00:00.000Z',
+            'updatedAt': '2023-01-01T00:00:00.000Z',
+            'data': {'name': 'asset_' + key}
+        }
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+def bench_pool(threads=(1, 2, 4, 8, 16, 32), requests=1000, latency=0.01, pool_block=True, keep_alive=True):
+    """
+    Measure the throughput of one shared client driven by a growing number of threads
+
+    :returns:   One result per thread count: {threads, seconds, rps}
+    :rtype:     list of dictionary
+    """
+    results=[]
+    with StandInServer(latency=latency) as server:
+        for count in threads:
+            aq=Aquarium(api_url=server.url, token='benchmark', pool_maxsize=count,
+                        pool_block=pool_block, keep_alive=keep_alive)
+            aq.warm_up(count)
+
+            start=time.time()
+            with ThreadPoolExecutor(max_workers=count) as executor:
+                list(executor.map(lambda i: aq.item(str(i % 100)).get(), range(requests)))
+            seconds=time.time() - start
+
+            results.append(dict(threads=count, seconds=seconds, rps=requests / seconds))
+            aq.session.close()
+    return results
+
+
+def synthetic_traverse(assets=5000, tasks=8):
+    """
+    Build a traverse response like the Prism plugin's project assets query: items with their tasks and assignees
+
+    :returns:   The response rows
+    :rtype:     list
+    """
+    rows=[]
+    for i in range(assets):
+        rows.append({
+            'item': {
+                '_id': 'items/{0}'.format(i), '_key': str(i), '_rev': '_rev{0}'.format(i), 'type': 'Asset',
+                'createdAt': '2023-01-01T00:00:00.000Z', 'updatedAt': '2023-06-01T12:30:00.000Z',
+                'data': {'name': 'asset_{0:05d}'.format(i), 'description': u'Synthetic asset n°{0}'.format(i),
+                         'thumbnail': '/files/{0}.jpg'.format(i), 'frameIn': 1001, 'frameOut': 1001 + i % 240}
+            },
+            'path': '/chars/asset_{0:05d}'.format(i),
+            'tasks': [{
+                'item': {
+                    '_key': '{0}_{1}'.format(i, t), 'type': 'Task', 'updatedAt': '2023-06-01T12:30:00.000Z',
+                    'data': {'name': 'task_{0}'.format(t), 'status': 'WIP', 'completion': 0.3,
+                             'startdate': '2023-01-01T00:00:00.000Z', 'deadline': '2023-12-31T00:00:00.000Z'}
+                },
+                'assignees': [{'_key': 'user{0}'.format((i + t) % 50), 'data': {'name': 'Artist {0}'.format((i + t) % 50)}}]
+            } for t in range(tasks)]
+        })
+    return rows
+
+
+def bench_codec(assets=5000, repeat=5):
+    """
+    Measure the decode time and peak memory of each available codec on a synthetic traverse response
+
+    :returns:   One result per codec: {codec, seconds, peak}
+    :rtype:     list of dictionary
+    """
+    content=get_codec('json').dumps(synthetic_traverse(assets))
+    decoders=[('requests', lambda data: json.loads(data.decode('utf-8')))]
+    for name in sorted(CODECS):
+        try:
+            decoders.append((name, get_codec(name).loads))
+        except ImportError:
+            logger.info('Skip the %s codec, it is not installed', name)
+
+    results=[]
+    for name, loads in decoders:
+        seconds=min(timed(loads, content) for i in range(repeat))
+
+        tracemalloc.start()
+        loads(content)
+        peak=tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results.append(dict(codec=name, bytes=len(content), seconds=seconds, peak=peak))
+    return results
+
+
+def bench_cast(assets=5000, repeat=10):
+    """
+    Measure the rows per second casted one by one (`[aq.element(data) for data in rows]`) and in batch (`aq.element_many(rows)`)
+
+    :returns:   One result per kind of rows: {rows, name, single, batch}, the rows per second casted one by one and in batch
+    :rtype:     list of dictionary
+    """
+    aq=Aquarium(api_url='http://cast.invalid', token='cast')
+    views=synthetic_traverse(assets)
+    items=[row['item'] for row in views]
+    # Default rows of a traverse without VIEW
+    edges=[{'item': item, 'edge': {'_id': 'connections/{0}'.format(i), '_key': str(i), 'type': 'Child',
+                                   '_from': 'items/0', '_to': item['_id'], 'data': {}}}
+           for i, item in enumerate(items)]
+    cases=[
+        ('views', views, lambda rows: [aq.element(data) for data in rows], aq.element_many),
+        ('items', items, lambda rows: [aq.cast(data) for data in rows], aq.cast_many),
+        ('item + edge', edges, lambda rows: [aq.element(data) for data in rows], aq.element_many),
+    ]
+
+    results=[]
+    for name, rows, single, batch in cases:
+        # Interleaved, the best CPU time of each
+        times=dict(single=[], batch=[])
+        for i in range(repeat):
+            for kind, fn in (('single', single), ('batch', batch)):
+                start=time.process_time()
+                fn(rows)
+                times[kind].append(time.process_time() - start)
+        results.append(dict(name=name, rows=len(rows), single=len(rows) / max(min(times['single']), 1e-9),
+                            batch=len(rows) / max(min(times['batch']), 1e-9)))
+    return results
+
+
+def bench_lazy(assets=5000, repeat=10):
+    """
+    Measure the milliseconds to read the first row and all the rows of a traverse, casted eagerly (`aq.element_many(rows)`)
+    and lazily (:class:`~aquarium.results.Results`)
+
+    :returns:   One result per access: {name, rows, eager, lazy}, the best milliseconds of each
+    :rtype:     list of dictionary
+    """
+    aq=Aquarium(api_url='http://lazy.invalid', token='lazy')
+    rows=synthetic_traverse(assets)
+    cases=[
+        ('first row', lambda: aq.element_many(rows)[0], lambda: Results(rows, aq.element)[0]),
+        ('all rows', lambda: aq.element_many(rows), lambda: list(Results(rows, aq.element))),
+        ('raw rows', lambda: aq.element_many(rows), lambda: list(Results(rows))),
+    ]
+
+    results=[]
+    for name, eager, lazy in cases:
+        # Interleaved, the best CPU time of each
+        times=dict(eager=[], lazy=[])
+        for i in range(repeat):
+            for kind, fn in (('eager', eager), ('lazy', lazy)):
+                start=time.process_time()
+                fn()
+                times[kind].append(time.process_time() - start)
+        results.append(dict(name=name, rows=len(rows), eager=min(times['eager']) * 1000,
+                            lazy=min(times['lazy']) * 1000))
+    return results
+
+
+def replayed_requests(cassette, api_version='v1'):
+    """
+    Get the arguments of :func:`~aquarium.aquarium.Aquarium.do_request` sending the recorded requests again
+
+    :returns:   The api url prefix, and a list of (verb, endpoint, kwargs)
+    :rtype:     tuple
+    """
+    prefix=''
+    calls=[]
+    for interaction in cassette.interactions:
+        request=interaction['request']
+        path, _, query=request['url'].partition('?')
+        kwargs=dict(params=dict(parse_qsl(query, keep_blank_values=True)) or None, cache=False)
+        body=request.get('body') or {}
+        if 'json' in body:
+            kwargs['json']=body['json']
+        elif body and 'multipart' not in body:
+            kwargs['data']=decode_body(body)
+
+        marker='/{0}/'.format(api_version)
+        if marker in path:
+            prefix, _, endpoint=path.partition(marker)
+        else:
+            endpoint=path
+        calls.append((request['method'], endpoint, kwargs))
+    return prefix, calls
+
+
+def bench_replay(path, threads=1, latency=0, repeat=1, codec=None):
+    """
+    Send the requests of a cassette again through the client, to measure its CPU time and memory without network
+
+    :returns:   {requests, misses, seconds, cpu_seconds, peak}
+    :rtype:     dictionary
+    """
+    cassette=Cassette.load(path)
+    transport=ReplayTransport(cassette, latency=latency)
+    prefix, calls=replayed_requests(cassette)
+    aq=Aquarium(api_url='http://replay.invalid' + prefix, token='replay', pool_maxsize=threads,
+                max_retries=0, codec=codec, transport=transport)
+
+    def send(call):
+        verb, endpoint, kwargs=call
+        try:
+            aq.do_request(verb, endpoint, **dict(kwargs))
+        except Exception as e:
+            logger.debug('Replay of %s %s failed : %s', verb, endpoint, e)
+
+    def run(count):
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for i in range(count):
+                cassette.rewind()
+                list(executor.map(send, calls))
+
+    start=time.perf_counter()
+    cpu_start=time.process_time()
+    run(repeat)
+    result=dict(requests=transport.replayed, misses=transport.misses,
+                seconds=time.perf_counter() - start, cpu_seconds=time.process_time() - cpu_start)
+
+    # Tracing slows everything down: the peak memory is measured on another pass
+    tracemalloc.start()
+    run(1)
+    result['peak']=tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result
+
+
+def timed(fn, *args):
+    start=time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(prog='python -m aquarium.benchmark', description=__doc__.strip().splitlines()[0])
+    commands=parser.add_subparsers(dest='command')
+    commands.required=True
+
+    pool=commands.add_parser('pool', help='Throughput of one shared client by thread count')
+    pool.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    pool.add_argument('--requests', type=int, default=1000)
+    pool.add_argument('--latency', type=float, default=0.01, help='Server latency in seconds')
+    pool.add_argument('--no-keep-alive', dest='keep_alive', action='store_false')
+
+    codec=commands.add_parser('codec', help='Decode time and peak memory of the JSON codecs')
+    codec.add_argument('--assets', type=int, default=5000, help='Number of assets in the synthetic traverse')
+    codec.add_argument('--repeat', type=int, default=5)
+
+    cast=commands.add_parser('cast', help='Rows per second casted one by one and in batch')
+    cast.add_argument('--assets', type=int, default=5000, help='Number of rows of each kind')
+    cast.add_argument('--repeat', type=int, default=10)
+
+    lazy=commands.add_parser('lazy', help='Time to read the first and all the rows, casted eagerly and lazily')
+    lazy.add_argument('--assets', type=int, default=5000, help='Number of rows of the traverse')
+    lazy.add_argument('--repeat', type=int, default=10)
+
+    replay=commands.add_parser('replay', help='Client time, CPU and peak memory replaying a recorded cassette')
+    replay.add_argument('cassette', help='Cassette file of a RecordingTransport')
+    replay.add_argument('--threads', type=int, default=1)
+    replay.add_argument('--latency', type=float, default=0, help='Injected latency per request in seconds')
+    replay.add_argument('--repeat', type=int, default=1)
+    replay.add_argument('--codec', default=None, help='JSON codec of the client')
+
+    args=parser.parse_args(argv)
+    if args.command == 'pool':
+        results=bench_pool(threads=args.threads, requests=args.requests, latency=args.latency,
+                           keep_alive=args.keep_alive)
+        print('{0:>8} {1:>10} {2:>10} {3:>8}'.format('threads', 'seconds', 'req/s', 'speedup'))
+        for result in results:
+            print('{threads:>8} {seconds:>10.3f} {rps:>10.1f} {speedup:>7.1f}x'.format(
+                speedup=result['rps'] / results[0]['rps'], **result))
+
+    elif args.command == 'codec':
+        results=bench_codec(assets=args.assets, repeat=args.repeat)
+        print('Payload: {0:.1f} MB'.format(results[0]['bytes'] / 1024.0 / 1024.0))
+        print('{0:>10} {1:>10} {2:>10} {3:>8}'.format('codec', 'decode ms', 'peak MB', 'speedup'))
+        for result in results:
+            print('{codec:>10} {ms:>10.1f} {mb:>10.1f} {speedup:>7.1f}x'.format(
+                codec=result['codec'], ms=result['seconds'] * 1000, mb=result['peak'] / 1024.0 / 1024.0,
+                speedup=results[0]['seconds'] / result['seconds']))
+
+    elif args.command == 'cast':
+        results=bench_cast(assets=args.assets, repeat=args.repeat)
+        print('{0:>12} {1:>8} {2:>12} {3:>12} {4:>8}'.format('rows', 'count', 'single/s', 'batch/s', 'speedup'))
+        for result in results:
+            print('{name:>12} {rows:>8} {single:>12.0f} {batch:>12.0f} {speedup:>7.2f}x'.format(
+                speedup=result['batch'] / result['single'], **result))
+
+    elif args.command == 'lazy':
+        results=bench_lazy(assets=args.assets, repeat=args.repeat)
+        print('{0:>12} {1:>8} {2:>10} {3:>10} {4:>8}'.format('access', 'rows', 'eager ms', 'lazy ms', 'speedup'))
+        for result in results:
+            print('{name:>12} {rows:>8} {eager:>10.2f} {lazy:>10.2f} {speedup:>7.1f}x'.format(
+                speedup=result['eager'] / max(result['lazy'], 1e-6), **result))
+
+    elif args.command == 'replay':
+        result=bench_replay(args.cassette, threads=args.threads, latency=args.latency, repeat=args.repeat,
+                            codec=args.codec)
+        print('{requests} requests ({misses} not recorded) in {seconds:.3f}s, {rps:.1f} req/s'.format(
+            rps=result['requests'] / result['seconds'], **result))
+        print('CPU {0:.3f}s, peak memory {1:.1f} MB'.format(result['cpu_seconds'], result['peak'] / 1024.0 / 1024.0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+import logging
+logger=logging.getLogger(__name__)
+
+# Verbs which only read data
+READ_VERBS=('GET', 'HEAD', 'OPTIONS')
+# POST endpoints which only read data
+READ_ONLY_POSTS=(r'^query$', r'/traverse$')
+# Endpoints never cached
+UNCACHED=(r'^ping$', r'^status$', r'^/?files/', r'/download$', r'/export/json$')
+# Segments of an endpoint followed by an item or edge _key
+KEY_SEGMENT=re.compile(r'(?:^|/)(?:items|trashed_items|edges|usergroups|templates|apply|sync|compare|path)/([^/]+)')
+
+
+def normalize_endpoint(endpoint=''):
+    return endpoint.split('?')[0].strip('/')
+
+
+def is_read_only(verb='GET', endpoint=''):
+    """
+    Check if a request only reads data
+
+    :param      verb:      The HTTP verb
+    :type       verb:      string
+    :param      endpoint:  The API endpoint
+    :type       endpoint:  string
+
+    :returns:   True if the request doesn't change any data
+    :rtype:     boolean
+    """
+    verb=verb.upper()
+    if verb in READ_VERBS:
+        return True
+    endpoint=normalize_endpoint(endpoint)
+    return verb == 'POST' and any(re.search(pattern, endpoint) for pattern in READ_ONLY_POSTS)
+
+
+def endpoint_keys(endpoint=''):
+    """
+    Get the _key of the items and edges in an endpoint, like `items/<key>/append`
+
+    :returns:   Set of _key
+    :rtype:     set
+    """
+    return set(KEY_SEGMENT.findall(normalize_endpoint(endpoint)))
+
+
+def payload_keys(payload=None):
+    """
+    Get the _key sent in a request body, like `fromKey`, `toKey` or `newParentKey`
+
+    :returns:   Set of _key
+    :rtype:     set
+    """
+    keys=set()
+    if isinstance(payload, dict):
+        for name, value in payload.items():
+            if (name == 'key' or name.endswith('Key')) and isinstance(value, (str, type(u''), int)):
+                keys.add(str(value))
+    return keys
+
+
+def result_keys(result=None, keys=None):
+    """
+    Get the _key of all the items and edges of a decoded response, recursively
+
+    :returns:   Set of _key
+    :rtype:     set
+    """
+    if keys is None:
+        keys=set()
+    if isinstance(result, dict):
+        for name, value in result.items():
+            if name == '_key' and value is not None:
+                keys.add(str(value))
+            elif name in ('_from', '_to') and value:
+                keys.add(str(value).split('/')[-1])
+            elif isinstance(value, (dict, list)):
+                result_keys(value, keys)
+    elif isinstance(result, list):
+        for value in result:
+            if isinstance(value, (dict, list)):
+                result_keys(value, keys)
+    return keys
+
+
+class CacheEntry(object):
+    def __init__(self, content, keys, expires):
+        self.content=content
+        self.keys=keys
+        self.expires=expires
+
+    @property
+    def size(self):
+        return len(self.content)
+
+
+class ResponseCache(object):
+    """
+    This class describes a cache of the read requests of the Aquarium client.
+
+    Responses are stored encoded, so every hit returns new objects, and evicted by LRU, TTL and memory budget.
+    Mutations sent by the same client invalidate the responses containing the items or edges they change.
+
+    .. code-block:: python
+
+        aq = Aquarium(api_url=url, token=token, cache=ResponseCache(ttl=30))
+        aq.item(key).get()  # miss
+        aq.item(key).get()  # hit
+        aq.item(key).update_data({'name': 'new'})  # invalidates the entries containing key
+        aq.cache.stats()
+
+    :param      max_entries:  Maximum number of responses
+    :type       max_entries:  integer, optional
+    :param      ttl:          Seconds a response stays valid. 0 or None to keep them until they are evicted
+    :type       ttl:          float, optional
+    :param      max_bytes:    Memory budget of the stored responses
+    :type       max_bytes:    integer, optional
+    """
+
+    def __init__(self, max_entries=1000, ttl=60, max_bytes=64 * 1024 * 1024):
+        self.max_entries=max_entries
+        self.ttl=ttl
+        self.max_bytes=max_bytes
+
+        self._lock=threading.RLock()
+        self._entries=OrderedDict()
+        self._keys={}
+        self.size=0
+        self.reset_stats()
+
+    def reset_stats(self):
+        """
+        Reset the hit, miss, eviction and invalidation counters
+        """
+        with self._lock:
+            self.hits=0
+            self.misses=0
+            self.evictions=0
+            self.invalidations=0
+
+    def stats(self):
+        """
+        Get the counters of the cache
+
+        :returns:   {hits, misses, hit_ratio, evictions, invalidations, entries, bytes}
+        :rtype:     dictionary
+        """
+        with self._lock:
+            total=self.hits + self.misses
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                hit_ratio=float(self.hits) / total if total else 0.0,
+                evictions=self.evictions,
+                invalidations=self.invalidations,
+                entries=len(self._entries),
+                bytes=self.size
+            )
+
+    def is_cacheable(self, verb='GET', endpoint=''):
+        """
+        Check if the response of a request can be cached
+
+        :returns:   True for read requests
+        :rtype:     boolean
+        """
+        endpoint=normalize_endpoint(endpoint)
+        if any(re.search(pattern, endpoint) for pattern in UNCACHED):
+            return False
+        return is_read_only(verb, endpoint)
+
+    def make_key(self, token='', verb='GET', endpoint='', params=None, payload=None):
+        """
+        Build the key of a request. The meshql whitespaces and the order of the parameters don't matter.
+
+        :returns:   The key
+        :rtype:     tuple
+        """
+        if isinstance(payload, dict) and 'query' in payload:
+            payload=dict(payload)
+            payload['query']=' '.join(str(payload['query']).split())
+        return (
+            token or '',
+            verb.upper(),
+            normalize_endpoint(endpoint),
+            json.dumps(params, sort_keys=True, default=str),
+            json.dumps(payload, sort_keys=True, default=str)
+        )
+
+    def get(self, key, loads=None):
+        """
+        Get a cached response
+
+        :param      key:    The key from :func:`~aquarium.cache.ResponseCache.make_key`
+        :type       key:    tuple
+        :param      loads:  The function decoding the response (default : `json.loads`)
+        :type       loads:  callable, optional
+
+        :returns:   The decoded response, or None on miss
+        :rtype:     list or dictionary
+        """
+        with self._lock:
+            entry=self._entries.get(key)
+            if entry is not None and entry.expires is not None and entry.expires < time.time():
+                self._remove(key)
+                entry=None
+            if entry is None:
+                self.misses+=1
+                return None
+            # Most recently used last
+            del self._entries[key]
+            self._entries[key]=entry
+            self.hits+=1
+            content=entry.content
+        return (loads or json.loads)(content)
+
+    def set(self, key, content, result=None, endpoint=''):
+        """
+        Store a response
+
+        :param      key:       The key from :func:`~aquarium.cache.ResponseCache.make_key`
+        :type       key:       tuple
+        :param      content:   The encoded response
+        :type       content:   bytes
+        :param      result:    The decoded response, to find the items and edges it contains
+        :type       result:    list or dictionary
+        :param      endpoint:  The API endpoint
+        :type       endpoint:  string
+        """
+        if self.max_bytes and len(content) > self.max_bytes:
+            return
+
+        keys=endpoint_keys(endpoint) | result_keys(result)
+        expires=time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._remove(key)
+            self._entries[key]=CacheEntry(content, keys, expires)
+            self.size+=len(content)
+            for k in keys:
+                self._keys.setdefault(k, set()).add(key)
+            self._evict()
+
+    def invalidate(self, keys=()):
+        """
+        Remove the responses containing the items or edges
+
+        :param      keys:  The _key of the changed items and edges
+        :type       keys:  iterable
+        """
+        with self._lock:
+            for k in keys:
+                for key in list(self._keys.get(k, ())):
+                    self._remove(key)
+                    self.invalidations+=1
+
+    def invalidate_request(self, endpoint='', payload=None, result=None):
+        """
+        Remove the responses changed by a mutation request
+
+        :param      endpoint:  The API endpoint of the mutation
+        :type       endpoint:  string
+        :param      payload:   The body of the mutation
+        :type       payload:   dictionary
+        :param      result:    The decoded response of the mutation
+        :type       result:    list or dictionary
+        """
+        keys=endpoint_keys(endpoint) | payload_keys(payload) | result_keys(result)
+        if keys:
+            logger.debug('Invalidate cached responses of %s', ', '.join(sorted(keys)))
+            self.invalidate(keys)
+
+    def clear(self):
+        """
+        Remove all the responses
+        """
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self.size=0
+
+    def _remove(self, key):
+        entry=self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.size-=entry.size
+        for k in entry.keys:
+            cached=self._keys.get(k)
+            if cached is not None:
+                cached.discard(key)
+                if not cached:
+                    del self._keys[k]
+
+    def _evict(self):
+        while self._entries and ((self.max_entries and len(self._entries) > self.max_entries) or
+                                 (self.max_bytes and self.size > self.max_bytes)):
+            key=next(iter(self._entries))
+            self._remove(key)
+            self.evictions+=1
+
+
+class Revision(object):
+    def __init__(self, etag, rev, entity):
+        self.etag=etag
+        self.rev=rev
+        self.entity=entity
+
+
+class RevisionStore(object):
+    """
+    This class describes the last known version of the items and edges read with a conditional GET.
+
+    For each request, the `ETag` and `_rev` of the response are kept with the entity built from it,
+    so an unchanged item is not downloaded (304) or not rebuilt (same `_rev`) again.
+
+    :param      max_entries:  Maximum number of remembered entities
+    :type       max_entries:  integer, optional
+    """
+
+    def __init__(self, max_entries=1000):
+        self.max_entries=max_entries
+        self._lock=threading.Lock()
+        self._entries=OrderedDict()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """
+        Reset the hit and miss counters
+        """
+        with self._lock:
+            self.hits=0
+            self.misses=0
+
+    def stats(self):
+        """
+        Get the counters of the store
+
+        :returns:   {hits, misses, entries}
+        :rtype:     dictionary
+        """
+        with self._lock:
+            return dict(hits=self.hits, misses=self.misses, entries=len(self._entries))
+
+    def get(self, key):
+        """
+        Get the last known version of a request
+
+        :returns:   The revision, or None
+        :rtype:     :class:`~aquarium.cache.Revision`
+        """
+        with self._lock:
+            revision=self._entries.pop(key, None)
+            if revision is not None:
+                self._entries[key]=revision
+            return revision
+
+    def hit(self, key, etag=None):
+        """
+        Count an unchanged response, and keep its new `ETag`
+
+        :returns:   The entity of the last known version
+        :rtype:     :class:`~aquarium.entity.Entity`
+        """
+        with self._lock:
+            self.hits+=1
+            revision=self._entries.get(key)
+            if etag and revision is not None:
+                revision.etag=etag
+            return revision.entity if revision is not None else None
+
+    def set(self, key, etag, rev, entity):
+        """
+        Store the new version of a request
+        """
+        with self._lock:
+            self.misses+=1
+            self._entries.pop(key, None)
+            self._entries[key]=Revision(etag, rev, entity)
+            while self.max_entries and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Forget all the versions
+        """
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import json
+import re
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+import logging
+logger=logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson=None
+
+# Integers of 19 digits or more may not fit in 64 bits: orjson reads them as floats
+BIG_INTEGER=re.compile(br'\d{19}')
+# The strings and the runs of 19 digits, to find the runs outside of the strings
+STRING_OR_BIG_INTEGER=re.compile(br'"(?:[^"\\]|\\.)*"|\d{19}')
+
+
+class JsonCodec(object):
+    """
+    This class describes the JSON codec of the standard library
+    """
+    name='json'
+
+    def dumps(self, data):
+        """
+        Encode data to JSON
+
+        :param      data:  The data
+        :type       data:  object
+
+        :returns:   The encoded JSON
+        :rtype:     bytes
+        """
+        return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, content):
+        """
+        Decode JSON
+
+        :param      content:  The encoded JSON
+        :type       content:  bytes
+
+        :returns:   The data
+        :rtype:     object
+        """
+        if isinstance(content, bytes) and not isinstance(content, str):
+            content=content.decode('utf-8')
+        return json.loads(content)
+
+
+def has_big_integer(content):
+    """
+    Check if a JSON document has a number of 19 digits or more, outside of its strings
+
+    :param      content:  The encoded JSON
+    :type       content:  bytes
+
+    :returns:   True if a number may not fit in 64 bits
+    :rtype:     boolean
+    """
+    if BIG_INTEGER.search(content) is None:
+        return False
+    return any(not match.group().startswith(b'"') for match in STRING_OR_BIG_INTEGER.finditer(content))
+
+
+def to_serializable(data):
+    # Mappings like DotMap keep their values outside of the dict itself
+    if hasattr(data, 'toDict'):
+        return data.toDict()
+    elif isinstance(data, Mapping):
+        return dict(data)
+    elif isinstance(data, (set, frozenset, tuple)):
+        return list(data)
+    raise TypeError('Object of type {0} is not JSON serializable'.format(type(data).__name__))
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    This class describes a JSON codec using `orjson <https://github.com/ijl/orjson>`_, several times faster than the standard library.
+
+    Data orjson can't encode (integers over 64 bits, non string keys...) falls back to the standard library,
+    like the JSON it can't decode exactly (lone surrogates, numbers of 19 digits or more).
+    """
+    name='orjson'
+
+    def dumps(self, data):
+        try:
+            return orjson.dumps(data, default=to_serializable,
+                                option=orjson.OPT_PASSTHROUGH_SUBCLASS | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            return super(OrjsonCodec, self).dumps(data)
+
+    def loads(self, content):
+        try:
+            data=orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return super(OrjsonCodec, self).loads(content)
+
+        if has_big_integer(content.encode('utf-8') if isinstance(content, str) else content):
+            return super(OrjsonCodec, self).loads(content)
+        return data
+
+
+CODECS={
+    'json': JsonCodec,
+    'orjson': OrjsonCodec,
+}
+
+
+def get_codec(codec=None):
+    """
+    Get a JSON codec
+
+    :param      codec:  The codec name (`json`, `orjson`) or instance. None uses orjson when it is installed, the standard library otherwise
+    :type       codec:  string or object, optional
+
+    :returns:   The codec, with `dumps(data) -> bytes` and `loads(bytes) -> data` methods
+    :rtype:     :class:`~aquarium.codec.JsonCodec`
+    """
+    if codec is None or codec == 'auto':
+        codec='orjson' if orjson is not None else 'json'
+
+    if isinstance(codec, str):
+        if codec == 'orjson' and orjson is None:
+            raise ImportError('The orjson codec requires the orjson module')
+        if codec not in CODECS:
+            raise ValueError('Unknown JSON codec "{0}", use one of {1}'.format(codec, ', '.join(sorted(CODECS))))
+        codec=CODECS[codec]()
+
+    logger.debug('Use JSON codec %s', getattr(codec, 'name', codec))
+    return codec
@@ -98,9 +98,8 @@ class Edge(Entity):
         :returns:   Edge object
         :rtype:     :class:`~aquarium.edge.Edge`
         """
-        result = self.do_request(
-            'GET', 'edges/{0}/?populate={1}'.format(self._key, to_string_url(populate)))
-        result = self.parent.cast(result)
+        result = self.parent.get_entity(
+            'edges/{0}/?populate={1}'.format(self._key, to_string_url(populate)))
         return result
 
     def delete(self):
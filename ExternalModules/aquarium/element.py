@@ -7,14 +7,35 @@ class Element(object):
         self.parent=parent
 
     def __call__(self, data={}):
-        inst=self.__class__()
-        for key, value in data.items():
-            if isinstance(value, dict):
-                value=self.parent.cast(value)
-            elif isinstance(value, list):
-                value=[self.parent.cast(v) if isinstance(v, dict) else v for v in value]
-            setattr(inst, key, value)
-        return inst
+        return self.many((data,))[0]
+
+    def many(self, rows):
+        """
+        Create the elements of a list of rows. Items and edges in their values are casted.
+
+        :param      rows:  The rows
+        :type       rows:  list of dictionary
+
+        :returns:   The elements
+        :rtype:     list of :class:`~aquarium.element.Element`
+        """
+        cls=self.__class__
+        cast=self.parent.cast
+        result=[]
+        for data in rows:
+            inst=cls()
+            # Same as setattr, Element has no descriptor
+            values=inst.__dict__
+            for key, value in data.items():
+                if isinstance(value, dict):
+                    if '_id' in value:
+                        value=cast(value)
+                elif isinstance(value, list):
+                    # Dictionaries without _id are kept as is by cast: don't call it for them
+                    value=[cast(v) if isinstance(v, dict) and '_id' in v else v for v in value]
+                values[key]=value
+            result.append(inst)
+        return result
 
     def __getattr__(self, name):
         attrs_names=list(vars(self).keys())
@@ -43,9 +43,15 @@ class ConflictError(Error):
 #413
 class UploadExceedLimit(Error):
     pass
+#429
+class TooManyRequestsError(Error):
+    pass
 #500
 class InternalError(Error):
     pass
+#502, 503, 504
+class UnavailableError(Error):
+    pass
 
 class Deprecated(Error):
     pass
\ No newline at end of file
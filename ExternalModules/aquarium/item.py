@@ -1,5 +1,4 @@
 # -*- coding: utf-8 -*-
-import json
 import re
 import os
 from .tools import jsonify
@@ -119,6 +118,29 @@ class Item(Entity):
             'POST', 'items/'+self._key+'/traverse', json=data)
         return result
 
+    def traverse_iter(self, meshql='', aliases={}, cast=False):
+        """
+        Execute a traverse from the current item, and yield each row as soon as it is downloaded
+
+        .. tip::
+            Use it for large results: the response is never fully loaded in memory
+
+        :param      meshql:        The meshql string
+        :type       meshql:        string
+        :param      aliases:       The aliases used in the meshql query
+        :type       aliases:       dictionary, optional
+        :param      cast:          Cast the rows with :func:`~aquarium.aquarium.Aquarium.cast_row`
+        :type       cast:          boolean, optional
+
+        :returns:   Generator of item and/or edge or VIEW used in the meshql query
+        :rtype:     generator
+        """
+        logger.debug('Send traverse (streaming) : meshql : %s / aliases : %r',
+                     meshql, aliases)
+        data = dict(query=meshql, aliases=aliases)
+        return self.parent.iter_request(
+            'POST', 'items/'+self._key+'/traverse', json=data, cast=cast)
+
     def traverse_trashed(self, meshql='', aliases={}):
         """
         Execute a traverse from the current item on trashed_items
@@ -197,7 +219,7 @@ class Item(Entity):
         result = self.do_request(
             'POST', 'items/'+self._key+'/copy', json=data)
 
-        result = [self.parent.cast(data) for data in result]
+        result = self.parent.cast_many(result)
         return result
 
     def convert_to_template(self, parent_key=''):
@@ -277,9 +299,8 @@ class Item(Entity):
 
         jsonify(params)
 
-        result = self.do_request('GET', 'items/{0}/'.format(
+        result = self.parent.get_entity('items/{0}/'.format(
             self._key), params=params)
-        result = self.parent.cast(result)
         return result
 
     def get_history(self, populate=False):
@@ -300,7 +321,7 @@ class Item(Entity):
 
         result = self.do_request(
             'GET', 'items/{0}/history'.format(self._key), params=params)
-        result = [self.parent.cast(data) for data in result]
+        result = self.parent.cast_many(result)
         return result
 
     def get_versions(self, populate=False):
@@ -321,7 +342,7 @@ class Item(Entity):
         """
         result = self.do_request(
             'GET', 'items/'+self._key+'/path/'+key)
-        result = [self.parent.cast(data) for data in result]
+        result = self.parent.cast_many(result)
         return result
 
     def get_permissions(self, sort=None, populate=False, offset=0, limit=50, depth=1, includeMembers=False):
@@ -356,7 +377,7 @@ class Item(Entity):
 
         result = self.do_request('GET', 'items/{0}/permissions'.format(
             self._key), params=params)
-        result = [self.parent.element(data) for data in result]
+        result = self.parent.element_many(result)
         return result
 
     def create_permission(self, participant_key, permissions, propagate = True):
@@ -456,7 +477,7 @@ class Item(Entity):
         result['user'] = self.parent.cast(result['user'])
         return result
 
-    def get_parents(self, limit = 50, offset = 0):
+    def get_parents(self, limit = 50, offset = 0, lazy = False):
         """
         Gets the parents of the item
 
@@ -464,6 +485,8 @@ class Item(Entity):
         :type       limit:   integer, optional
         :param      offset:  Number of skipped items. Used for pagination
         :type       offset:  integer, optional
+        :param      lazy:    Return a :class:`~aquarium.results.Results` casting each row when it is read, instead of a list
+        :type       lazy:    boolean, optional
 
         :returns:   List of item and edge object
         :rtype:     list of {item: :class:`~aquarium.item.Item`, edge: :class:`~aquarium.edge.Edge`}
@@ -474,10 +497,10 @@ class Item(Entity):
         )
 
         result = self.traverse(meshql=query)
-        result = [self.parent.element(data) for data in result]
+        result = self.parent.element_many(result, lazy=lazy)
         return result
 
-    def get_children(self, show_hidden=False, types=None, names=None, limit=50, offset=0):
+    def get_children(self, show_hidden=False, types=None, names=None, limit=50, offset=0, lazy=False):
         """
         Gets the children of the item
 
@@ -491,6 +514,8 @@ class Item(Entity):
         :type       limit:   integer, optional
         :param      offset:  Number of skipped items. Used for pagination
         :type       offset:  integer, optional
+        :param      lazy:         Return a :class:`~aquarium.results.Results` casting each row when it is read, instead of a list
+        :type       lazy:         boolean, optional
 
         :returns:   List of item and edge object
         :rtype:     list of {item: :class:`~aquarium.item.Item`, edge: :class:`~aquarium.edge.Edge`}
@@ -517,21 +542,23 @@ class Item(Entity):
             query.append('AND edge.data.isHidden != true')
 
         result = self.traverse(meshql=' '.join(query), aliases=aliases)
-        result = [self.parent.element(data) for data in result]
+        result = self.parent.element_many(result, lazy=lazy)
         return result
 
-    def get_trash(self, meshql='# -($Child)> *'):
+    def get_trash(self, meshql='# -($Child)> *', lazy=False):
         """
         Gets the trashed items
 
         :param      meshql:  The meshql string. Default is : # -($Child)> *
         :type       meshql:  string, optional
+        :param      lazy:    Return a :class:`~aquarium.results.Results` casting each row when it is read, instead of a list
+        :type       lazy:    boolean, optional
 
         :returns:   List of trashed item and edge object
         :rtype:     list of {item: :class:`~aquarium.item.Item`, edge: :class:`~aquarium.edge.Edge`}
         """
         result = self.traverse_trashed(meshql)
-        result = [self.parent.element(data) for data in result]
+        result = self.parent.element_many(result, lazy=lazy)
         return result
 
     def move(self, old_parent_key=None, new_parent_key=None):
@@ -630,7 +657,7 @@ class Item(Entity):
 
         files = dict(
             file=(filename, file, file_content_type),
-            data=(None, json.dumps(data), 'text/plain'),
+            data=(None, self.parent.codec.dumps(data), 'text/plain'),
             message=(None, message, 'text/plain')
         )
         result = self.do_request(
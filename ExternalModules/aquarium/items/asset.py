@@ -66,15 +66,17 @@ class Asset(Item):
                     type='Version', data=dict(name=version_name)).item
 
             if override_media:
-                medias = version.get_children(types='Media')
+                medias = version.get_children(types='Media', lazy=True)
 
                 if len(medias) > 0:
-                    existing_medias = [media for media in medias if media.item.data.originalname == mediaName]
+                    # Filter the raw rows, only the matching media is casted
+                    existing_medias = [index for index, row in enumerate(medias.raw)
+                                       if (row['item'].get('data') or {}).get('originalname') == mediaName]
                     if len(existing_medias) > 0:
                         if path is None:
-                            return existing_medias[0]
+                            return medias[existing_medias[0]]
 
-                        media = existing_medias[0].item
+                        media = medias[existing_medias[0]].item
                         return media.upload_file(
                             path=path, data=data, message=message)
                     else:
@@ -85,7 +87,7 @@ class Asset(Item):
                 return version.append(type='Media', data=data, path=path)
 
 
-    def get_tasks(self, task_name='', task_status=''):
+    def get_tasks(self, task_name='', task_status='', lazy=False):
         """
         Gets the tasks of the asset
 
@@ -93,6 +95,8 @@ class Asset(Item):
         :type       task_name:    string, optional
         :param      task_status:  The status of the task
         :type       task_status:  string, optional
+        :param      lazy:         Return a :class:`~aquarium.results.Results` casting each row when it is read, instead of a list
+        :type       lazy:         boolean, optional
 
         :returns:   List of Task object and Edge object
         :rtype:     List of dictionary {item: :class:`~aquarium.items.task.Task`, edge: :class:`~aquarium.edge.Edge`}
@@ -104,10 +108,10 @@ class Asset(Item):
             query+=" AND item.data.status == '{0}'".format(task_status)
 
         result=self.traverse(meshql=query)
-        result=[self.parent.element(data) for data in result]
+        result=self.parent.element_many(result, lazy=lazy)
         return result
 
-    def get_assigned_tasks(self, user_key= '', task_name='', task_status=''):
+    def get_assigned_tasks(self, user_key= '', task_name='', task_status='', lazy=False):
         """
         Gets the asset's assigned tasks to specific user
 
@@ -117,6 +121,8 @@ class Asset(Item):
         :type       task_name:    string, optional
         :param      task_status:  The status of the task used to filter
         :type       task_status:  string, optional
+        :param      lazy:         Return a :class:`~aquarium.results.Results` casting each row when it is read, instead of a list
+        :type       lazy:         boolean, optional
 
         :returns:   List of Task object and Edge object
         :rtype:     List of dictionary {item: :class:`~aquarium.items.task.Task`, edge: :class:`~aquarium.edge.Edge`}
@@ -131,10 +137,10 @@ class Asset(Item):
         query+=" AND -($Assigned)> item._key == '{0}'".format(user_key)
 
         result=self.traverse(meshql=query)
-        result=[self.parent.element(data) for data in result]
+        result=self.parent.element_many(result, lazy=lazy)
         return result
 
-    def get_by_task(self, project_key='', task_status='', task_name='', task_completed=False):
+    def get_by_task(self, project_key='', task_status='', task_name='', task_completed=False, lazy=False):
 
         """
         Gets project tasks by filters.
@@ -147,6 +153,8 @@ class Asset(Item):
         :type       task_name:       string, optional
         :param      task_completed:  Task is completed
         :type       task_completed:  boolean
+        :param      lazy:            Return a :class:`~aquarium.results.Results` casting each row when it is read, instead of a list
+        :type       lazy:            boolean, optional
 
         :returns:   The tasks.
         :rtype:     dictionary
@@ -166,5 +174,5 @@ class Asset(Item):
         query="# $Asset AND {0} AND {1}".format(' '.join(project), ' '.join(task))
 
         result=self.parent.query(meshql=query)
-        result=[self.parent.element(data) for data in result]
+        result=self.parent.element_many(result, lazy=lazy)
         return result
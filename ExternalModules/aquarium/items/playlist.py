@@ -9,12 +9,14 @@ class Playlist(Item):
     This class describes a Playlist object child of Item class.
     """
 
-    def get_medias(self, track=None):
+    def get_medias(self, track=None, lazy=False):
         """
         Gets the medias of the playlist
 
         :param      track:    The ID of the track. If no track specified, all medias will be returned
         :type       track:    integer (0 or 1), optional (default: None)
+        :param      lazy:     Return a :class:`~aquarium.results.Results` casting each row when it is read, instead of a list
+        :type       lazy:     boolean, optional
 
         :returns:   List of Media object
         :rtype:     List of dictionary {media: :class:`~aquarium.items.media.Media`, track: integer, versionKey: integer}
@@ -35,13 +37,16 @@ class Playlist(Item):
         }
 
         result=self.traverse(meshql=query, aliases=aliases)
-        result=[self.parent.element(data) for data in result]
+        result=self.parent.element_many(result, lazy=lazy)
         return result
 
-    def get_playlists(self):
+    def get_playlists(self, lazy=False):
         """
         Gets the playlists added in this playlist
 
+        :param      lazy:  Return a :class:`~aquarium.results.Results` casting each row when it is read, instead of a list
+        :type       lazy:  boolean, optional
+
         :returns:   List of Playlist object
         :rtype:     List of :class:`~aquarium.items.playlist.Playlist`
         """
@@ -49,7 +54,7 @@ class Playlist(Item):
         query = '# -($Child)> $Playlist VIEW item'
 
         result=self.traverse(meshql=query)
-        result = [self.parent.cast(item) for item in result]
+        result = self.parent.cast_many(result, lazy=lazy)
         return result
 
     def import_medias(self, media_paths, track=0):
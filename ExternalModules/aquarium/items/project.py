@@ -7,12 +7,14 @@ class Project(Item):
     This class describes a project object child of Item class
     """
 
-    def get_all(self, show_all=False):
+    def get_all(self, show_all=False, lazy=False):
         """
         Gets all projects accessible by the connected user
 
         :param      show_all:  Add completed and trashed projects
         :type       show_all:  boolean, optional
+        :param      lazy:      Return a :class:`~aquarium.results.Results` casting each row when it is read, instead of a list
+        :type       lazy:      boolean, optional
 
         :returns:   List of Project class
         :rtype:     List of :class:`~aquarium.items.project.Project`
@@ -25,13 +27,16 @@ class Project(Item):
 
         query.append('SORT item.data.name ASC')
         result = self.parent.query(meshql=' '.join(query))
-        result = [self.parent.cast(data) for data in result]
+        result = self.parent.cast_many(result, lazy=lazy)
         return result
 
-    def get_shots(self):
+    def get_shots(self, lazy=False):
         """
         Gets all the shots of the project
 
+        :param      lazy:  Return a :class:`~aquarium.results.Results` casting each row when it is read, instead of a list
+        :type       lazy:  boolean, optional
+
         :returns:   List of Shot class, Edge class and Tasks
         :rtype:     List of dictionary {item: :class:`~aquarium.items.shot.Shot`, edge: :class:`~aquarium.edge.Edge`, tasks: [:class:`~aquarium.items.task.Task`]}
         """
@@ -44,13 +49,16 @@ class Project(Item):
             }
         }
         result = self.traverse(meshql=query, aliases=aliases)
-        result = [self.parent.element(data) for data in result]
+        result = self.parent.element_many(result, lazy=lazy)
         return result
 
-    def get_assets(self):
+    def get_assets(self, lazy=False):
         """
         Gets all the assets of the project
 
+        :param      lazy:  Return a :class:`~aquarium.results.Results` casting each row when it is read, instead of a list
+        :type       lazy:  boolean, optional
+
         :returns:   List of Asset class, Edge class and Tasks
         :rtype:     List of dictionary {item: :class:`~aquarium.items.asset.Asset`, edge: :class:`~aquarium.edge.Edge`, tasks: [:class:`~aquarium.items.task.Task`]}
         """
@@ -63,5 +71,5 @@ class Project(Item):
             }
         }
         result = self.traverse(meshql=query, aliases=aliases)
-        result = [self.parent.element(data) for data in result]
+        result = self.parent.element_many(result, lazy=lazy)
         return result
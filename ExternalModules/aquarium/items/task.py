@@ -90,7 +90,7 @@ class Task(Item):
         result = statuses_dct or DEFAULT_STATUSES
         return result
 
-    def get_subtasks(self, status='', name='', is_completed=True):
+    def get_subtasks(self, status='', name='', is_completed=True, lazy=False):
         """
         Gets the subtasks of the task
 
@@ -100,6 +100,8 @@ class Task(Item):
         :type       name:          boolean, optional
         :param      is_completed:  Get completed subtasks
         :type       is_completed:  boolean, optional
+        :param      lazy:          Return a :class:`~aquarium.results.Results` casting each row when it is read, instead of a list
+        :type       lazy:          boolean, optional
 
         :returns:   List of Task object and Edge object
         :rtype:     List of dictionary {item: :class:`~aquarium.items.task.Task`, edge: :class:`~aquarium.edge.Edge`}
@@ -116,15 +118,17 @@ class Task(Item):
         query.append(')')
 
         result = self.traverse(meshql=' '.join(query))
-        result = [self.parent.element(data) for data in result]
+        result = self.parent.element_many(result, lazy=lazy)
         return result
 
-    def get_dependencies(self, mode='BOTH'):
+    def get_dependencies(self, mode='BOTH', lazy=False):
         """
         Gets the dependencies of the task
 
         :param      mode:  The mode ("BOTH", "IN" or "OUT"). Used to get incoming dependencies, outgoing or both.
         :type       mode:  string, optional
+        :param      lazy:  Return a :class:`~aquarium.results.Results` casting each row when it is read, instead of a list
+        :type       lazy:  boolean, optional
 
         :returns:   List of Item object and Edge object
         :rtype:     List of dictionary {item: :class:`~aquarium.item.Item` or subclass : :class:`~aquarium.items.asset.Asset` | :class:`~aquarium.items.project.Project` | :class:`~aquarium.items.shot.Shot` | :class:`~aquarium.items.task.Task` | :class:`~aquarium.items.template.Template` | :class:`~aquarium.items.user.User` | :class:`~aquarium.items.usergroup.Usergroup`, edge: :class:`~aquarium.edge.Edge}`
@@ -140,29 +144,35 @@ class Task(Item):
                 'Wrong value for "mode". Use "BOTH", "IN" or "OUT"')
 
         result = self.traverse(meshql=query)
-        result = [self.parent.element(data) for data in result]
+        result = self.parent.element_many(result, lazy=lazy)
         return result
 
-    def get_assigned_users(self):
+    def get_assigned_users(self, lazy=False):
         """
         Gets all the assigned users to the task
 
+        :param      lazy:  Return a :class:`~aquarium.results.Results` casting each row when it is read, instead of a list
+        :type       lazy:  boolean, optional
+
         :returns:   List of User or Usergroup object and Edge object
         :rtype:     List of dictionary {item: :class:`~aquarium.items.user.User` | :class:`~aquarium.items.usergroup.Usergroup`, edge: :class:`~aquarium.edge.Edge}`
         """
         query = "# -($Assigned)> *"
         result = self.traverse(meshql=query)
-        result = [self.parent.element(data) for data in result]
+        result = self.parent.element_many(result, lazy=lazy)
         return result
 
-    def get_attachments(self):
+    def get_attachments(self, lazy=False):
         """
         Gets all the task's attachments
 
+        :param      lazy:  Return a :class:`~aquarium.results.Results` casting each row when it is read, instead of a list
+        :type       lazy:  boolean, optional
+
         :returns:   List of Item object and Edge object
         :rtype:     List of dictionary {item: :class:`~aquarium.item.Item` or subclass : :class:`~aquarium.items.asset.Asset` | :class:`~aquarium.items.project.Project` | :class:`~aquarium.items.shot.Shot` | :class:`~aquarium.items.task.Task` | :class:`~aquarium.items.template.Template` | :class:`~aquarium.items.user.User` | :class:`~aquarium.items.usergroup.Usergroup`, edge: :class:`~aquarium.edge.Edge`}
         """
         query = "# -($Attached)> *"
         result = self.traverse(meshql=query)
-        result = [self.parent.element(data) for data in result]
+        result = self.parent.element_many(result, lazy=lazy)
         return result
@@ -40,7 +40,8 @@ class User(Item):
 
        # Store authentification information
         token = result.pop("token")
-        self.parent.token = token
+        with self.parent.lock:
+            self.parent.token = token
         result = self.parent.element(result)
 
         return result
@@ -64,7 +65,8 @@ class User(Item):
             'POST', 'signout', decoding=False)
 
        # Remove authentification information
-        self.parent.token = None
+        with self.parent.lock:
+            self.parent.token = None
 
         return None
 
@@ -89,7 +91,7 @@ class User(Item):
         result = self.get_profile().user
         return result
 
-    def get_tasks(self, project_key='', task_status='', task_name='', task_completed=False):
+    def get_tasks(self, project_key='', task_status='', task_name='', task_completed=False, lazy=False):
         """
         Gets the assigned task of the user
 
@@ -101,6 +103,8 @@ class User(Item):
         :type       task_name:        string, optional
         :param      task_completed:   Filter the completed tasks
         :type       task_completed:  boolean, optional
+        :param      lazy:             Return a :class:`~aquarium.results.Results` casting each row when it is read, instead of a list
+        :type       lazy:             boolean, optional
 
         :returns:   List of Task object with there edge
         :rtype:     List of dict {item: :class:`~aquarium.items.task.Task`, edge: :class:`~aquarium.edge.Edge`}
@@ -127,7 +131,7 @@ class User(Item):
         query.append(")")
 
         result = self.traverse(meshql=' '.join(query))
-        result = [self.parent.element(data) for data in result]
+        result = self.parent.element_many(result, lazy=lazy)
         return result
 
     def promote_as_admin(self):
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import random
+import re
+import sys
+import threading
+import logging
+logger=logging.getLogger(__name__)
+
+# Endpoints sending a meshql query
+MESHQL_PATTERNS=('query', 'items/{key}/traverse', 'trashed_items/{key}/traverse')
+STRING_LITERAL=re.compile(r'\'(?:[^\'\\]|\\.)*\'|"(?:[^"\\]|\\.)*"')
+NUMBER_LITERAL=re.compile(r'(?<![\w$@.])-?\d+(?:\.\d+)?(?![\w])')
+PACKAGE_DIRECTORY=os.path.dirname(os.path.abspath(__file__))
+
+
+def meshql_template(meshql=''):
+    """
+    Get the template of a meshql query: whitespaces are collapsed, strings and numbers are replaced by `?`
+
+    :param      meshql:  The meshql string
+    :type       meshql:  string
+
+    :returns:   The template
+    :rtype:     string
+    """
+    template=STRING_LITERAL.sub('?', meshql or '')
+    template=NUMBER_LITERAL.sub('?', template)
+    return ' '.join(template.split())
+
+
+def alias_shape(value):
+    """
+    Get the shape of the aliases: the names and types, without the values. The keys of VIEW dictionaries are kept.
+
+    :param      value:  The aliases
+    :type       value:  dictionary
+
+    :returns:   The shape
+    :rtype:     dictionary or string
+    """
+    if isinstance(value, dict):
+        return dict((key, alias_shape(v)) for key, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        return 'list'
+    elif value is None:
+        return 'null'
+    return type(value).__name__
+
+
+def function_name(code):
+    """
+    Get the name of the function of a code object. A nested function or lambda is named after its enclosing function,
+    like `getAqProjectAssets` for the `fetchPage` closure of `getAqProjectAssets` run in a thread pool.
+    The enclosing function is only known from Python 3.11, the nested function name is used before.
+
+    :param      code:  The code object
+    :type       code:  code
+
+    :returns:   The function name
+    :rtype:     string
+    """
+    qualname=getattr(code, 'co_qualname', None)
+    if not qualname:
+        return code.co_name
+    return qualname.split('.<locals>.')[0].split('.')[-1]
+
+
+def calling_function(depth=2):
+    """
+    Get the first function calling the Aquarium module, like `Prism_Aquarium_init.py:getAqProjectAssets`
+
+    :returns:   `file:function`
+    :rtype:     string
+    """
+    frame=sys._getframe(depth)
+    while frame is not None:
+        filename=os.path.abspath(frame.f_code.co_filename)
+        if not filename.startswith(PACKAGE_DIRECTORY) and 'concurrent' not in filename and 'threading' not in filename:
+            return '{0}:{1}'.format(os.path.basename(filename), function_name(frame.f_code))
+        frame=frame.f_back
+    return 'unknown'
+
+
+def percentile(values, ratio):
+    if not values:
+        return 0.0
+    values=sorted(values)
+    index=min(len(values) - 1, int(round(ratio * (len(values) - 1))))
+    return values[index]
+
+
+class QueryProfile(object):
+    # Maximum number of latencies kept for the percentiles
+    SAMPLES=1000
+
+    def __init__(self, pattern, template, shape):
+        self.pattern=pattern
+        self.template=template
+        self.shape=shape
+        self.count=0
+        self.errors=0
+        self.seconds=0.0
+        self.max_seconds=0.0
+        self.samples=[]
+        self.rows=0
+        self.bytes=0
+        self.callers={}
+
+    def add(self, event, caller):
+        self.count+=1
+        if event.error is not None:
+            self.errors+=1
+        self.seconds+=event.seconds
+        self.max_seconds=max(self.max_seconds, event.seconds)
+        # Reservoir sampling keeps the percentiles representative with a bounded memory
+        if len(self.samples) < self.SAMPLES:
+            self.samples.append(event.seconds)
+        else:
+            index=random.randint(0, self.count - 1)
+            if index < self.SAMPLES:
+                self.samples[index]=event.seconds
+        self.rows+=event.rows or 0
+        self.bytes+=event.response_bytes or 0
+        self.callers[caller]=self.callers.get(caller, 0) + 1
+
+    def to_dict(self):
+        return dict(
+            endpoint=self.pattern,
+            meshql=self.template,
+            aliases=self.shape,
+            count=self.count,
+            errors=self.errors,
+            total_ms=self.seconds * 1000,
+            p50_ms=percentile(self.samples, 0.5) * 1000,
+            p95_ms=percentile(self.samples, 0.95) * 1000,
+            max_ms=self.max_seconds * 1000,
+            rows=self.rows,
+            bytes=self.bytes,
+            callers=sorted(self.callers.items(), key=lambda item: -item[1])
+        )
+
+
+class MeshQLProfiler(object):
+    """
+    This class describes a profiler of the meshql queries sent by :func:`~aquarium.aquarium.Aquarium.query` and :func:`~aquarium.item.Item.traverse`.
+
+    Queries are grouped by meshql template and alias shape, see :func:`~aquarium.profiler.meshql_template` and :func:`~aquarium.profiler.alias_shape`.
+
+    .. code-block:: python
+
+        with MeshQLProfiler(aq) as profiler:
+            run_the_tool()
+        print(profiler.dumps(top=10, format='text'))
+
+    :param      aquarium:  The client to profile
+    :type       aquarium:  :class:`~aquarium.aquarium.Aquarium`
+    """
+
+    def __init__(self, aquarium):
+        self.aquarium=aquarium
+        self._lock=threading.Lock()
+        self._profiles={}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def __call__(self, event):
+        self.record(event)
+
+    def start(self):
+        """
+        Start recording the queries of the client
+
+        :returns:   The profiler
+        :rtype:     :class:`~aquarium.profiler.MeshQLProfiler`
+        """
+        self.aquarium.add_hook('after_request', self)
+        return self
+
+    def stop(self):
+        """
+        Stop recording the queries of the client
+        """
+        self.aquarium.remove_hook('after_request', self)
+
+    def reset(self):
+        """
+        Forget the recorded queries
+        """
+        with self._lock:
+            self._profiles={}
+
+    def record(self, event):
+        """
+        Add a finished request, ignored if it's not a meshql query
+
+        :param      event:  The request
+        :type       event:  :class:`~aquarium.stats.RequestEvent`
+        """
+        if event.pattern not in MESHQL_PATTERNS or not isinstance(event.payload, dict):
+            return
+
+        template=meshql_template(event.payload.get('query'))
+        shape=alias_shape(event.payload.get('aliases') or {})
+        key=(event.pattern, template, json.dumps(shape, sort_keys=True))
+        caller=calling_function()
+        with self._lock:
+            profile=self._profiles.get(key)
+            if profile is None:
+                profile=self._profiles[key]=QueryProfile(event.pattern, template, shape)
+            profile.add(event, caller)
+
+    def report(self, top=10, sort='total_ms'):
+        """
+        Get the most expensive queries
+
+        :param      top:   Number of queries, None for all of them
+        :type       top:   integer, optional
+        :param      sort:  The sorting column: `total_ms`, `count`, `p95_ms`, `max_ms`, `rows` or `bytes`
+        :type       sort:  string, optional
+
+        :returns:   List of {endpoint, meshql, aliases, count, errors, total_ms, p50_ms, p95_ms, max_ms, rows, bytes, callers}
+        :rtype:     list
+        """
+        with self._lock:
+            profiles=[profile.to_dict() for profile in self._profiles.values()]
+        profiles.sort(key=lambda profile: -profile[sort])
+        return profiles[:top] if top else profiles
+
+    def dumps(self, top=10, sort='total_ms', format='json'):
+        """
+        Format the report of :func:`~aquarium.profiler.MeshQLProfiler.report`
+
+        :param      format:  `json` or `text`
+        :type       format:  string, optional
+
+        :returns:   The report
+        :rtype:     string
+        """
+        report=self.report(top=top, sort=sort)
+        if format == 'json':
+            return json.dumps(report, indent=2)
+        elif format != 'text':
+            raise ValueError('Unknown report format "{0}", use json or text'.format(format))
+
+        lines=[]
+        for index, profile in enumerate(report):
+            lines.append('{0}. {endpoint} x{count} | total {total_ms:.0f}ms | p50 {p50_ms:.0f}ms | '
+                         'p95 {p95_ms:.0f}ms | max {max_ms:.0f}ms | {rows} rows | {kb:.0f} KB | {errors} errors'.format(
+                             index + 1, kb=profile['bytes'] / 1024.0, **profile))
+            lines.append('   ' + profile['meshql'])
+            lines.append('   aliases: ' + json.dumps(profile['aliases'], sort_keys=True))
+            lines.append('   callers: ' + ', '.join('{0} ({1})'.format(name, count) for name, count in profile['callers']))
+        return '\n'.join(lines)
+
+    def dump(self, path, top=10, sort='total_ms', format=None):
+        """
+        Write the report to a file. The format is guessed from the extension: `.json` or text.
+
+        :param      path:  The file path
+        :type       path:  string
+        """
+        if format is None:
+            format='json' if path.lower().endswith('.json') else 'text'
+        with open(path, 'w') as f:
+            f.write(self.dumps(top=top, sort=sort, format=format))
+        return path
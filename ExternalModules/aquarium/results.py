@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+import logging
+logger=logging.getLogger(__name__)
+
+# Marks the rows not casted yet: None is a valid casted value
+NOT_CASTED=object()
+# Rows casted at once by an iteration
+CHUNK_SIZE=64
+
+
+class Results(Sequence):
+    """
+    This class describes the lazy list of rows returned by a traverse or a query, with `lazy=True` on the helpers returning lists
+    (:func:`~aquarium.item.Item.get_children`, :func:`~aquarium.items.asset.Asset.get_tasks`...).
+
+    The rows are kept as decoded from the JSON response, and each one is casted the first time it is read,
+    by index or iteration, then cached. Reading the first row of a long list only casts this row, an iteration casts
+    the rows by chunks of :data:`CHUNK_SIZE`.
+
+    .. code-block:: python
+
+        tasks = asset.get_tasks(lazy=True)
+        task = tasks[0].item                                      # Only the first row is casted
+        names = [row['item']['data']['name'] for row in tasks.raw]  # No row is casted
+
+    The rows are not locked: a row read by two threads at the same time may be casted twice, the last one is kept.
+
+    :param      rows:  The rows of the response
+    :type       rows:  list of dictionary
+    :param      cast:  The function casting a row, like :func:`~aquarium.aquarium.Aquarium.element`. Without it, the rows are returned as is (raw mode)
+    :type       cast:  function, optional
+
+    :var raw: The rows of the response, never casted
+    :vartype raw: list of dictionary
+    """
+
+    def __init__(self, rows=None, cast=None):
+        self.raw=list(rows) if rows is not None else []
+        self.cast=cast
+        self._rows=[NOT_CASTED] * len(self.raw)
+
+    def __len__(self):
+        return len(self.raw)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.raw)))]
+        if self.cast is None:
+            return self.raw[index]
+        row=self._rows[index]
+        if row is NOT_CASTED:
+            row=self._rows[index]=self.cast(self.raw[index])
+        return row
+
+    def __iter__(self):
+        cast=self.cast
+        if cast is None:
+            for data in self.raw:
+                yield data
+            return
+        # Element casts a batch of rows faster than one by one
+        many=getattr(cast, 'many', None)
+        raw, rows=self.raw, self._rows
+        for start in range(0, len(raw), CHUNK_SIZE):
+            stop=min(start + CHUNK_SIZE, len(raw))
+            missing=[index for index in range(start, stop) if rows[index] is NOT_CASTED]
+            if missing:
+                if many is not None:
+                    casted=many([raw[index] for index in missing])
+                else:
+                    casted=[cast(raw[index]) for index in missing]
+                for index, row in zip(missing, casted):
+                    rows[index]=row
+            for index in range(start, stop):
+                yield rows[index]
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __eq__(self, other):
+        if isinstance(other, Results):
+            return self.raw == other.raw and self.cast == other.cast
+        return isinstance(other, list) and list(self) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__=None
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def casted(self):
+        """
+        Get the number of rows already casted
+
+        :returns:   Number of casted rows
+        :rtype:     integer
+        """
+        if self.cast is None:
+            return 0
+        return sum(1 for row in self._rows if row is not NOT_CASTED)
+
+    def to_list(self):
+        """
+        Cast all the rows
+
+        :returns:   The casted rows
+        :rtype:     list
+        """
+        return list(self)
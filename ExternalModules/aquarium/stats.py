@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+import re
+import threading
+import logging
+logger=logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS=(5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+# Segments of an endpoint followed by an item or edge _key
+KEY_PATTERN=re.compile(r'(^|/)(items|trashed_items|edges|usergroups|templates|apply|sync|compare|path)/[^/]+')
+FILE_PATTERN=re.compile(r'^files/.+$')
+
+
+def endpoint_pattern(endpoint=''):
+    """
+    Get the pattern of an endpoint, without its keys and parameters: `items/123/traverse` is `items/{key}/traverse`
+
+    :param      endpoint:  The API endpoint
+    :type       endpoint:  string
+
+    :returns:   The endpoint pattern
+    :rtype:     string
+    """
+    endpoint=endpoint.split('?')[0].strip('/')
+    endpoint=FILE_PATTERN.sub('files/{file}', endpoint)
+    return KEY_PATTERN.sub(r'\1\2/{key}', endpoint)
+
+
+def body_size(data=None):
+    """
+    Get the size of a request body
+
+    :returns:   Size in bytes, 0 for form data and files
+    :rtype:     integer
+    """
+    if isinstance(data, bytes):
+        return len(data)
+    elif isinstance(data, type(u'')):
+        return len(data.encode('utf-8'))
+    return 0
+
+
+class RequestEvent(object):
+    """
+    This class describes a request sent by :func:`~aquarium.aquarium.Aquarium.do_request`, given to the hooks.
+
+    :var verb: The HTTP verb
+    :var endpoint: The API endpoint
+    :var pattern: The endpoint pattern, see :func:`~aquarium.stats.endpoint_pattern`
+    :var url: The full url
+    :var request_bytes: Size of the request body
+    :var payload: The request body, before its encoding
+    :var response_bytes: Size of the response body, once received
+    :var rows: Number of rows of a decoded list response, once received
+    :var status_code: HTTP status code, once received
+    :var seconds: Time spent, retries included, once received
+    :var retries: Number of retries
+    :var cached: The response came from the client cache
+    :var error: The exception raised, if any
+    """
+
+    def __init__(self, verb='GET', endpoint='', url='', request_bytes=0, payload=None):
+        self.verb=verb.upper()
+        self.endpoint=endpoint
+        self.pattern=endpoint_pattern(endpoint)
+        self.url=url
+        self.request_bytes=request_bytes
+        self.payload=payload
+        self.response_bytes=0
+        self.rows=None
+        self.status_code=None
+        self.seconds=0.0
+        self.retries=0
+        self.cached=False
+        self.error=None
+
+    def __repr__(self):
+        return '<RequestEvent {0} {1} {2} {3:.1f}ms>'.format(self.verb, self.pattern, self.status_code, self.seconds * 1000)
+
+
+class Histogram(object):
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets=buckets
+        self.counts=[0] * len(buckets)
+
+    def add(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index]+=1
+                return
+
+    def to_dict(self):
+        return dict(('<={0}'.format(bound) if bound != float('inf') else '>{0}'.format(self.buckets[-2]), count)
+                    for bound, count in zip(self.buckets, self.counts) if count)
+
+
+class EndpointStats(object):
+    def __init__(self):
+        self.calls=0
+        self.cached=0
+        self.errors=0
+        self.retries=0
+        self.request_bytes=0
+        self.response_bytes=0
+        self.seconds=0.0
+        self.max_seconds=0.0
+        self.status_codes={}
+        self.latency_ms=Histogram()
+
+    def add(self, event):
+        self.calls+=1
+        if event.cached:
+            self.cached+=1
+        if event.error is not None:
+            self.errors+=1
+        self.retries+=event.retries
+        self.request_bytes+=event.request_bytes or 0
+        self.response_bytes+=event.response_bytes or 0
+        self.seconds+=event.seconds
+        self.max_seconds=max(self.max_seconds, event.seconds)
+        if event.status_code is not None:
+            self.status_codes[event.status_code]=self.status_codes.get(event.status_code, 0) + 1
+        self.latency_ms.add(event.seconds * 1000)
+
+    def to_dict(self):
+        return dict(
+            calls=self.calls,
+            cached=self.cached,
+            errors=self.errors,
+            retries=self.retries,
+            request_bytes=self.request_bytes,
+            response_bytes=self.response_bytes,
+            seconds=self.seconds,
+            mean_ms=self.seconds * 1000 / self.calls if self.calls else 0.0,
+            max_ms=self.max_seconds * 1000,
+            status_codes=dict(self.status_codes),
+            latency_ms=self.latency_ms.to_dict()
+        )
+
+
+class RequestStats(object):
+    """
+    This class describes the built-in collector of the requests, grouped by verb and endpoint pattern.
+
+    .. code-block:: python
+
+        aq.stats()
+        # {'requests': {'POST items/{key}/traverse': {'calls': 12, 'mean_ms': 85.2, 'response_bytes': 3145728, ...}}, ...}
+    """
+
+    def __init__(self):
+        self._lock=threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Clear all the counters
+        """
+        with self._lock:
+            self._endpoints={}
+
+    def __call__(self, event):
+        self.record(event)
+
+    def record(self, event):
+        """
+        Add a finished request
+
+        :param      event:  The request
+        :type       event:  :class:`~aquarium.stats.RequestEvent`
+        """
+        name='{0} {1}'.format(event.verb, event.pattern)
+        with self._lock:
+            stats=self._endpoints.get(name)
+            if stats is None:
+                stats=self._endpoints[name]=EndpointStats()
+            stats.add(event)
+
+    def to_dict(self):
+        """
+        Get the counters of each endpoint pattern
+
+        :returns:   {`VERB pattern`: {calls, cached, errors, retries, request_bytes, response_bytes, seconds, mean_ms, max_ms, status_codes, latency_ms}}
+        :rtype:     dictionary
+        """
+        with self._lock:
+            return dict((name, stats.to_dict()) for name, stats in self._endpoints.items())
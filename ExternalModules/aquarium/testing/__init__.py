@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+In-process fake of the Aquarium API, to test and benchmark the client and the Prism plugin without a server.
+
+.. code-block:: python
+
+    from aquarium import Aquarium
+    from aquarium.testing import FakeAquarium, FakeTransport, generate_project
+
+    fake = FakeAquarium()
+    project = generate_project(fake, assets=7000, shots=7000)  # about 100k items
+    aq = Aquarium(api_url='http://fake.aquarium', token=fake.token, transport=FakeTransport(fake))
+
+Use :class:`~aquarium.testing.server.FakeServer` to serve it over HTTP instead.
+"""
+from .graph import Graph
+from .meshql import MeshQLError
+from .server import FakeAquarium, FakeTransport, FakeServer
+from .generator import generate_project, count_items
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+import random
+import logging
+logger=logging.getLogger(__name__)
+
+STATUSES=(
+    {'status': 'TO DO', 'color': '#FBEB06', 'valid': False, 'completion': 0},
+    {'status': 'WIP', 'color': '#F3A215', 'valid': False, 'completion': 0.3},
+    {'status': 'PENDING REVIEW', 'color': '#15c8f3', 'valid': False, 'completion': 0.9},
+    {'status': 'DONE', 'color': '#9cde4d', 'valid': True, 'completion': 1},
+)
+ASSET_CATEGORIES=('Characters', 'Props', 'Sets', 'Vehicles', 'FX')
+ASSET_TASKS=('Modeling', 'Surfacing', 'Rigging', 'Lookdev', 'Grooming', 'Layout', 'Animation', 'Lighting')
+SHOT_TASKS=('Layout', 'Animation', 'FX', 'Lighting', 'Compositing', 'Matchmove', 'Cloth', 'Grading')
+CREATED_AT='2023-01-01T00:00:00.000Z'
+
+
+def count_items(assets=1000, shots=1000, tasks=6, users=20, playlists=0, medias=0, sequences=None):
+    """
+    Get the number of items :func:`~aquarium.testing.generator.generate_project` creates
+
+    :returns:   Number of items
+    :rtype:     integer
+    """
+    sequences=sequences or max(1, shots // 50)
+    # Admin, users, project, Prism properties, statuses, locations, categories and sequences
+    return (1 + users + 1 + 1 + len(STATUSES) + 2 + len(ASSET_CATEGORIES) + sequences +
+            (assets + shots) * (1 + tasks) + playlists * (1 + medias))
+
+
+def generate_project(fake, name='Synthetic', assets=1000, shots=1000, tasks=6, users=20, playlists=0, medias=0,
+                     sequences=None, seed=0):
+    """
+    Fill a fake server with a project organised like the Prism plugin expects it.
+
+    The project has a Prism `Properties` item, the statuses, an assets and a shots location linked with
+    `PrismAssetsLocation` and `PrismShotsLocation` edges, assets in categories and shots in sequences, each with
+    its tasks assigned to users, and optionally playlists of medias.
+
+    .. code-block:: python
+
+        fake = FakeAquarium()
+        # About 100k items
+        project = generate_project(fake, assets=7000, shots=7000, tasks=6)
+
+    :param      fake:       The fake server
+    :type       fake:       :class:`~aquarium.testing.server.FakeAquarium`
+    :param      assets:     Number of assets
+    :type       assets:     integer, optional
+    :param      shots:      Number of shots
+    :type       shots:      integer, optional
+    :param      tasks:      Number of tasks per asset and shot, up to 8
+    :type       tasks:      integer, optional
+    :param      users:      Number of users assigned to the tasks
+    :type       users:      integer, optional
+    :param      playlists:  Number of playlists
+    :type       playlists:  integer, optional
+    :param      medias:     Number of medias per playlist
+    :type       medias:     integer, optional
+    :param      sequences:  Number of sequences (default : one per 50 shots)
+    :type       sequences:  integer, optional
+    :param      seed:       Seed of the random statuses and assignments
+    :type       seed:       integer, optional
+
+    :returns:   The project item
+    :rtype:     dictionary
+    """
+    rand=random.Random(seed)
+    tasks=min(tasks, len(ASSET_TASKS))
+    sequences=sequences or max(1, shots // 50)
+
+    def add(parent, type, data, edge_type='Child', edge_data=None):
+        item=fake.add_item(type, data, created_at=CREATED_AT)
+        fake.add_edge(edge_type, parent['_key'], item['_key'], edge_data, created_at=CREATED_AT)
+        return item
+
+    team=[fake.add_user('Artist {0}'.format(i), 'artist{0}@fake.aquarium'.format(i), 'artist')
+          for i in range(users)]
+
+    project=fake.add_item('Project', {'name': name, 'completion': 0, 'status': 'WIP', 'thumbnail': None,
+                                      'startDate': CREATED_AT, 'endDate': '2024-01-01T00:00:00.000Z'},
+                          created_at=CREATED_AT)
+    add(project, 'Properties', {'name': 'Prism', 'prism': {
+        'version': '2.0.0',
+        'usePrismNamingConvention': False,
+        'departments': {
+            'asset': [{'name': task, 'tasks': [task]} for task in ASSET_TASKS[:tasks]],
+            'shot': [{'name': task, 'tasks': [task]} for task in SHOT_TASKS[:tasks]],
+        }
+    }})
+    for status in STATUSES:
+        add(project, 'Properties', {'name': status['status'], 'tasks_status': dict(status)})
+
+    assets_location=add(project, 'Folder', {'name': 'Assets'})
+    shots_location=add(project, 'Folder', {'name': 'Shots'})
+    fake.add_edge('PrismAssetsLocation', project['_key'], assets_location['_key'], created_at=CREATED_AT)
+    fake.add_edge('PrismShotsLocation', project['_key'], shots_location['_key'], created_at=CREATED_AT)
+
+    def add_tasks(parent, names):
+        for weight, name in enumerate(names[:tasks]):
+            status=rand.choice(STATUSES)
+            task=add(parent, 'Task', {'name': name, 'status': status['status'], 'completion': status['completion'],
+                                      'startdate': CREATED_AT, 'deadline': '2023-12-31T00:00:00.000Z'},
+                     edge_data={'weight': weight})
+            if team:
+                fake.add_edge('Assigned', task['_key'], rand.choice(team)['_key'], created_at=CREATED_AT)
+
+    categories=[add(assets_location, 'Folder', {'name': name}) for name in ASSET_CATEGORIES]
+    for i in range(assets):
+        category=categories[i % len(categories)]
+        asset=add(category, 'Asset', {'name': '{0}_{1:05d}'.format(category['data']['name'].lower()[:4], i),
+                                      'description': 'Synthetic asset {0}'.format(i), 'thumbnail': None})
+        add_tasks(asset, ASSET_TASKS)
+
+    folders=[add(shots_location, 'Sequence', {'name': 'sq{0:03d}'.format(i + 1)}) for i in range(sequences)]
+    for i in range(shots):
+        sequence=folders[i * sequences // max(1, shots)]
+        shot=add(sequence, 'Shot', {'name': 'sh{0:04d}'.format((i + 1) * 10), 'frameIn': 1001,
+                                    'frameOut': 1001 + rand.randint(24, 240), 'thumbnail': None})
+        add_tasks(shot, SHOT_TASKS)
+
+    for i in range(playlists):
+        playlist=add(project, 'Playlist', {'name': 'Review {0:03d}'.format(i + 1)})
+        for j in range(medias):
+            add(playlist, 'Media', {'name': 'media_{0:03d}_{1:03d}'.format(i + 1, j + 1)})
+
+    logger.debug('Generated project %s: %s items, %s edges', name, len(fake.items), len(fake.edges))
+    return project
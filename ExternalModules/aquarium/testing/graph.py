@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+import itertools
+import threading
+import uuid
+from datetime import datetime, timezone
+import logging
+logger=logging.getLogger(__name__)
+
+
+def timestamp():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super(HTTPError, self).__init__(message)
+        self.status=status
+
+
+class Graph(object):
+    """
+    This class describes an in-memory graph of items and edges, with the indexes used by the traversals.
+
+    The documents look like the ones of Aquarium: `_id`, `_key`, `_rev`, `type`, `data`, `createdAt` and `updatedAt`,
+    with `_from` and `_to` for the edges.
+    """
+
+    def __init__(self):
+        self.lock=threading.RLock()
+        self.items={}
+        self.edges={}
+        self.trashed=set()
+        self._types={}
+        self._out={}
+        self._in={}
+        self._keys=itertools.count(1)
+
+    def new_key(self):
+        return str(next(self._keys))
+
+    def add_item(self, type='', data=None, key=None, created_at=None):
+        """
+        Add an item
+
+        :returns:   The item document
+        :rtype:     dictionary
+        """
+        with self.lock:
+            key=str(key) if key is not None else self.new_key()
+            if key in self.items:
+                raise HTTPError(409, 'Item {0} already exists'.format(key))
+            created_at=created_at or timestamp()
+            item={'_id': 'items/' + key, '_key': key, '_rev': uuid.uuid4().hex[:11], 'type': type,
+                  'data': dict(data or {}), 'createdAt': created_at, 'updatedAt': created_at}
+            self.items[key]=item
+            self._types.setdefault(type, []).append(key)
+            return item
+
+    def add_edge(self, type='', from_key='', to_key='', data=None, created_at=None):
+        """
+        Add an edge between two items
+
+        :returns:   The edge document
+        :rtype:     dictionary
+        """
+        with self.lock:
+            for key in (from_key, to_key):
+                if key not in self.items:
+                    raise HTTPError(404, 'Item {0} not found'.format(key))
+            key=self.new_key()
+            created_at=created_at or timestamp()
+            edge={'_id': 'connections/' + key, '_key': key, '_rev': uuid.uuid4().hex[:11], 'type': type,
+                  '_from': 'items/' + from_key, '_to': 'items/' + to_key, 'data': dict(data or {}),
+                  'createdAt': created_at, 'updatedAt': created_at}
+            self.edges[key]=edge
+            self._out.setdefault(from_key, []).append((edge, to_key))
+            self._in.setdefault(to_key, []).append((edge, from_key))
+            return edge
+
+    def update_item(self, key, data, replace=False):
+        with self.lock:
+            item=self.get_item(key)
+            item=dict(item, data=dict(data) if replace else dict(item['data'], **data),
+                      _rev=uuid.uuid4().hex[:11], updatedAt=timestamp())
+            self.items[key]=item
+            return item
+
+    def update_edge(self, key, data, replace=False):
+        with self.lock:
+            edge=self.edges.get(key)
+            if edge is None:
+                raise HTTPError(404, 'Edge {0} not found'.format(key))
+            # Updated in place: the adjacency lists share the edge documents
+            edge.update(data=dict(data) if replace else dict(edge['data'], **data),
+                        _rev=uuid.uuid4().hex[:11], updatedAt=timestamp())
+            return edge
+
+    def remove_edge(self, key):
+        with self.lock:
+            edge=self.edges.pop(key, None)
+            if edge is None:
+                raise HTTPError(404, 'Edge {0} not found'.format(key))
+            from_key, to_key=edge['_from'][6:], edge['_to'][6:]
+            self._out[from_key]=[pair for pair in self._out.get(from_key, []) if pair[0] is not edge]
+            self._in[to_key]=[pair for pair in self._in.get(to_key, []) if pair[0] is not edge]
+            return edge
+
+    def get_item(self, key):
+        item=self.items.get(key)
+        if item is None:
+            raise HTTPError(404, 'Item {0} not found'.format(key))
+        return item
+
+    def scan(self, type=None, trashed=False):
+        """
+        Yield the (item, edge, path) rows of a query without traversal
+        """
+        keys=self._types.get(type, []) if type is not None else list(self.items)
+        for key in keys:
+            item=self.items.get(key)
+            if item is not None and (key in self.trashed) == trashed:
+                yield item, None, {'vertices': [item], 'edges': []}
+
+    def neighbours(self, key, direction, types=None):
+        if direction in ('out', 'any'):
+            for edge, other in self._out.get(key, ()):
+                if types is None or edge['type'] in types:
+                    yield edge, other
+        if direction in ('in', 'any'):
+            for edge, other in self._in.get(key, ()):
+                if types is None or edge['type'] in types:
+                    yield edge, other
+
+    def walk(self, start, traversal, trashed=False):
+        """
+        Yield the (item, edge, path) rows of a traversal, depth first in the order of the edges. A vertex appears once per path.
+
+        Trashed items are not traversed, unless `trashed` is True: then only them are yielded.
+        """
+        if not start:
+            return
+        start=self.items.get(start['_key'], start)
+        stack=[(self.neighbours(start['_key'], traversal.direction, traversal.types), [start], [])]
+        while stack:
+            neighbours, vertices, edges=stack[-1]
+            pair=next(neighbours, None)
+            if pair is None:
+                stack.pop()
+                continue
+
+            edge, key=pair
+            item=self.items.get(key)
+            if item is None or any(vertex['_key'] == key for vertex in vertices):
+                continue
+            is_trashed=key in self.trashed
+            if is_trashed and not trashed:
+                continue
+
+            path={'vertices': vertices + [item], 'edges': edges + [edge]}
+            if is_trashed == trashed:
+                yield item, edge, path
+            if len(path['edges']) < traversal.depth:
+                stack.append((self.neighbours(key, traversal.direction, traversal.types), path['vertices'], path['edges']))
@@ -0,0 +1,552 @@
+# -*- coding: utf-8 -*-
+"""
+Evaluation of the MeshQL subset used by the client and the Prism plugin, on a :class:`~aquarium.testing.graph.Graph`.
+
+Supported:
+
+- Traversals `-($Child, 3)>`, `<($Child)-`, `<($Dependency)>`, `-($Child OR $Playlist)>` and `-()>`
+- `offset,limit` (a limit of 0 means no limit)
+- Filters: `$Type`, `*`, comparisons (`==`, `!=`, `<`, `<=`, `>`, `>=`, `IN`, `NOT IN`), `AND`, `OR`, `NOT`,
+  `ANY`/`ALL`/`NONE` on `[*]` expansions, `@binds`, nested traversals as conditions
+- `UNIQUE`, `SET $alias`, `SORT expr [ASC|DESC]`, `VIEW $alias|expression`, VIEW values being nested queries
+- Functions: `FIRST`, `populate`, `SUBSTITUTE`, `JSON_PARSE`, `LENGTH`, `LOWER`, `UPPER`, `CONCAT`
+"""
+import functools
+import json
+import re
+import logging
+logger=logging.getLogger(__name__)
+
+TOKEN=re.compile(r'''
+    (?P<space>\s+)
+  | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+  | (?P<number>-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)
+  | (?P<arrow>-\(|<\(|\)>|\)-)
+  | (?P<op>==|!=|>=|<=|>|<)
+  | (?P<bind>@\w+)
+  | (?P<alias>\$\w+)
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<punct>[()\[\],.*\#])
+''', re.VERBOSE)
+CLAUSES=('UNIQUE', 'SET', 'SORT', 'VIEW')
+QUANTIFIERS=('ANY', 'ALL', 'NONE')
+# Order of the types in comparisons, like ArangoDB
+TYPE_RANKS=((type(None), 0), (bool, 1), (int, 2), (float, 2), (str, 3), (list, 4), (dict, 5))
+
+
+class MeshQLError(ValueError):
+    pass
+
+
+def tokenize(meshql):
+    tokens=[]
+    position=0
+    while position < len(meshql):
+        match=TOKEN.match(meshql, position)
+        if match is None:
+            raise MeshQLError('Unexpected character {0!r} at {1} in {2}'.format(meshql[position], position, meshql))
+        position=match.end()
+        kind=match.lastgroup
+        if kind != 'space':
+            tokens.append((kind, match.group()))
+    return tokens
+
+
+def rank(value):
+    for cls, index in TYPE_RANKS:
+        if isinstance(value, cls):
+            return index
+    return 6
+
+
+def compare(a, b):
+    """
+    Compare two values of any type, like ArangoDB: null < bool < number < string < array < object
+
+    :returns:   -1, 0 or 1
+    :rtype:     integer
+    """
+    ra, rb=rank(a), rank(b)
+    if ra != rb:
+        return -1 if ra < rb else 1
+    if ra == 4:
+        for x, y in zip(a, b):
+            result=compare(x, y)
+            if result:
+                return result
+        return compare(len(a), len(b))
+    if ra == 5:
+        return 0 if a == b else compare(json.dumps(a, sort_keys=True), json.dumps(b, sort_keys=True))
+    if ra == 0:
+        return 0
+    return (a > b) - (a < b)
+
+
+def truthy(value):
+    return bool(value) if not isinstance(value, (list, dict)) else True
+
+
+OPERATORS={
+    '==': lambda a, b: compare(a, b) == 0,
+    '!=': lambda a, b: compare(a, b) != 0,
+    '<': lambda a, b: compare(a, b) < 0,
+    '<=': lambda a, b: compare(a, b) <= 0,
+    '>': lambda a, b: compare(a, b) > 0,
+    '>=': lambda a, b: compare(a, b) >= 0,
+    'IN': lambda a, b: isinstance(b, list) and any(compare(a, x) == 0 for x in b),
+}
+
+
+def substitute(value, search, replace=''):
+    if isinstance(value, list):
+        return [substitute(v, search, replace) for v in value]
+    if not isinstance(value, str):
+        return value
+    for s in (search if isinstance(search, list) else [search]):
+        value=value.replace(s, replace)
+    return value
+
+
+FUNCTIONS={
+    'FIRST': lambda value: value[0] if isinstance(value, list) and value else None,
+    'POPULATE': lambda value: value,
+    'SUBSTITUTE': substitute,
+    'JSON_PARSE': lambda value: json.loads(value) if isinstance(value, str) else value,
+    'LENGTH': lambda value: len(value) if isinstance(value, (list, dict, str)) else 0,
+    'LOWER': lambda value: value.lower() if isinstance(value, str) else value,
+    'UPPER': lambda value: value.upper() if isinstance(value, str) else value,
+    'CONCAT': lambda *values: ''.join('' if v is None else str(v) for v in values),
+}
+
+
+def get_path(value, steps):
+    for index, (kind, arg) in enumerate(steps):
+        if kind == 'expand':
+            if not isinstance(value, list):
+                return []
+            rest=steps[index + 1:]
+            return [get_path(v, rest) for v in value]
+        elif kind == 'attr':
+            value=value.get(arg) if isinstance(value, dict) else None
+        elif isinstance(value, list) and -len(value) <= arg < len(value):
+            value=value[arg]
+        else:
+            value=None
+    return value
+
+
+class Traversal(object):
+    def __init__(self, direction='out', types=None, depth=1):
+        self.direction=direction
+        self.types=types
+        self.depth=depth
+
+
+class Query(object):
+    def __init__(self):
+        self.traversal=None
+        self.offset=0
+        self.limit=0
+        self.type_hint=None
+        self.filter=None
+        self.unique=False
+        self.set=None
+        self.sort=[]
+        self.view=None
+
+
+class Parser(object):
+    def __init__(self, meshql):
+        self.meshql=meshql
+        self.tokens=tokenize(meshql)
+        self.position=0
+
+    def peek(self, offset=0):
+        index=self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def next(self):
+        token=self.peek()
+        if token[0] is None:
+            raise MeshQLError('Unexpected end of {0}'.format(self.meshql))
+        self.position+=1
+        return token
+
+    def accept(self, value, kind=None):
+        token=self.peek()
+        if token[1] == value and (kind is None or token[0] == kind):
+            self.position+=1
+            return True
+        return False
+
+    def expect(self, value):
+        token=self.next()
+        if token[1] != value:
+            raise MeshQLError('Expected {0!r}, got {1!r} in {2}'.format(value, token[1], self.meshql))
+        return token
+
+    def at_end(self):
+        kind, value=self.peek()
+        return kind is None or value == ')' or value == ',' or value == ']' or \
+            (kind == 'name' and value in CLAUSES)
+
+    def parse(self):
+        query=self.parse_query()
+        if self.peek()[0] is not None:
+            raise MeshQLError('Unexpected {0!r} in {1}'.format(self.peek()[1], self.meshql))
+        return query
+
+    def parse_query(self):
+        self.expect('#')
+        query=Query()
+        if self.peek()[1] in ('-(', '<('):
+            query.traversal=self.parse_traversal()
+        self.parse_range(query)
+        if not self.at_end():
+            query.filter=self.parse_or()
+            # A filter starting with `$Type AND` only reads the items of this type
+            first=getattr(query.filter, 'first', query.filter)
+            query.type_hint=getattr(first, 'type_name', None)
+
+        while self.peek()[0] == 'name' and self.peek()[1] in CLAUSES:
+            clause=self.next()[1]
+            if clause == 'UNIQUE':
+                query.unique=True
+            elif clause == 'SET':
+                query.set=self.parse_alias()
+            elif clause == 'SORT':
+                while True:
+                    expression=self.parse_operand()
+                    descending=False
+                    if self.accept('DESC', 'name'):
+                        descending=True
+                    else:
+                        self.accept('ASC', 'name')
+                    query.sort.append((expression, descending))
+                    if not self.accept(','):
+                        break
+            elif clause == 'VIEW':
+                if self.peek()[0] == 'alias':
+                    query.view=('alias', self.parse_alias())
+                else:
+                    query.view=('expression', self.parse_or())
+        return query
+
+    def parse_alias(self):
+        kind, value=self.next()
+        if kind != 'alias':
+            raise MeshQLError('Expected an alias, got {0!r} in {1}'.format(value, self.meshql))
+        return value[1:]
+
+    def parse_range(self, query):
+        if self.peek()[0] == 'number' and self.peek(1)[1] == ',' and self.peek(2)[0] == 'number':
+            query.offset=int(self.next()[1])
+            self.next()
+            query.limit=int(self.next()[1])
+
+    def parse_traversal(self):
+        opening=self.next()[1]
+        types=[]
+        depth=1
+        while self.peek()[1] not in (')>', ')-', None):
+            kind, value=self.next()
+            if kind == 'alias':
+                types.append(value[1:])
+            elif value == ',':
+                depth=int(self.next()[1])
+            elif value == '*' or value == 'OR':
+                continue
+            else:
+                raise MeshQLError('Unexpected {0!r} in a traversal of {1}'.format(value, self.meshql))
+        closing=self.next()[1]
+        if opening == '-(' and closing == ')>':
+            direction='out'
+        elif opening == '<(' and closing == ')-':
+            direction='in'
+        elif opening == '<(' and closing == ')>':
+            direction='any'
+        else:
+            raise MeshQLError('Invalid traversal {0}...{1} in {2}'.format(opening, closing, self.meshql))
+        return Traversal(direction, set(types) or None, depth)
+
+    def parse_or(self):
+        nodes=[self.parse_and()]
+        while self.accept('OR', 'name'):
+            nodes.append(self.parse_and())
+        if len(nodes) == 1:
+            return nodes[0]
+        return lambda ctx: any(truthy(node(ctx)) for node in nodes)
+
+    def parse_and(self):
+        nodes=[self.parse_not()]
+        while self.accept('AND', 'name'):
+            nodes.append(self.parse_not())
+        if len(nodes) == 1:
+            return nodes[0]
+
+        def node(ctx):
+            return all(truthy(node(ctx)) for node in nodes)
+        node.first=nodes[0]
+        return node
+
+    def parse_not(self):
+        if self.accept('NOT', 'name'):
+            node=self.parse_not()
+            return lambda ctx: not truthy(node(ctx))
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        start=self.position
+        left=self.parse_operand()
+        expanded=any(kind == 'expand' for kind, _ in getattr(left, 'steps', ()))
+        quantifier=None
+        if self.peek()[0] == 'name' and self.peek()[1] in QUANTIFIERS:
+            quantifier=self.next()[1]
+        negate=False
+        if self.peek()[1] == 'NOT' and self.peek(1)[1] == 'IN':
+            self.next()
+            negate=True
+
+        kind, value=self.peek()
+        if kind == 'op' or (kind == 'name' and value == 'IN'):
+            self.next()
+            right=self.parse_operand()
+            operator=OPERATORS[value]
+            if negate:
+                operator=lambda a, b, operator=operator: not operator(a, b)
+            if quantifier is None and expanded:
+                # An expansion matches when all its values match, like path.edges[*].data.hidden != true
+                quantifier='ALL'
+            return self.quantified(left, right, operator, quantifier)
+        elif quantifier or negate:
+            raise MeshQLError('Expected an operator after {0!r} in {1}'.format(self.tokens[start][1], self.meshql))
+        return left
+
+    def quantified(self, left, right, operator, quantifier):
+        if quantifier is None:
+            return lambda ctx: operator(left(ctx), right(ctx))
+
+        def node(ctx):
+            values=left(ctx)
+            if not isinstance(values, list):
+                values=[values]
+            value=right(ctx)
+            if quantifier == 'ANY':
+                return any(operator(v, value) for v in values)
+            elif quantifier == 'ALL':
+                return all(operator(v, value) for v in values)
+            return not any(operator(v, value) for v in values)
+        return node
+
+    def parse_operand(self):
+        kind, value=self.peek()
+        if kind == 'string':
+            self.next()
+            text=re.sub(r'\\(.)', r'\1', value[1:-1])
+            return lambda ctx: text
+        elif kind == 'number':
+            self.next()
+            number=float(value) if re.search(r'[.eE]', value) else int(value)
+            return lambda ctx: number
+        elif kind == 'bind':
+            self.next()
+            name=value[1:]
+            return lambda ctx: ctx['__aliases__'].get(name)
+        elif kind == 'alias':
+            self.next()
+            type_name=value[1:]
+
+            def node(ctx):
+                return (ctx.get('item') or {}).get('type') == type_name
+            node.type_name=type_name
+            return node
+        elif kind == 'arrow' and value in ('-(', '<('):
+            return self.parse_condition()
+        elif value == '*':
+            self.next()
+            return lambda ctx: True
+        elif value == '#':
+            query=self.parse_query()
+            return lambda ctx: ctx['__engine__'].run(query, ctx)
+        elif value == '(':
+            self.next()
+            node=self.parse_or()
+            self.expect(')')
+            return node
+        elif value == '[':
+            self.next()
+            nodes=[]
+            while not self.accept(']'):
+                nodes.append(self.parse_or())
+                self.accept(',')
+            return lambda ctx: [node(ctx) for node in nodes]
+        elif kind == 'name':
+            self.next()
+            if value in ('true', 'false', 'null'):
+                constant={'true': True, 'false': False, 'null': None}[value]
+                return lambda ctx: constant
+            if self.peek()[1] == '(':
+                return self.parse_function(value)
+            return self.parse_path(value)
+        elif kind is None:
+            raise MeshQLError('Unexpected end of {0}'.format(self.meshql))
+        raise MeshQLError('Unexpected {0!r} in {1}'.format(value, self.meshql))
+
+    def parse_condition(self):
+        # A traversal in a filter matches if it reaches at least one item matching its own filter
+        query=Query()
+        query.traversal=self.parse_traversal()
+        self.parse_range(query)
+        if not self.at_end():
+            query.filter=self.parse_or()
+        return lambda ctx: ctx['__engine__'].exists(query, ctx)
+
+    def parse_function(self, name):
+        function=FUNCTIONS.get(name.upper())
+        if function is None:
+            raise MeshQLError('Unknown function {0} in {1}'.format(name, self.meshql))
+        self.expect('(')
+        nodes=[]
+        while not self.accept(')'):
+            nodes.append(self.parse_or())
+            self.accept(',')
+        return lambda ctx: function(*[node(ctx) for node in nodes])
+
+    def parse_path(self, name):
+        steps=[]
+        while True:
+            if self.accept('.'):
+                steps.append(('attr', self.next()[1]))
+            elif self.peek()[1] == '[' and self.peek(2)[1] == ']' and self.peek(1)[0] in ('number', 'punct'):
+                self.next()
+                kind, value=self.next()
+                steps.append(('expand', None) if value == '*' else ('index', int(value)))
+                self.next()
+            else:
+                break
+        steps=tuple(steps)
+
+        def node(ctx):
+            return get_path(ctx.get(name), steps)
+        node.steps=steps
+        return node
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_query(meshql):
+    """
+    Parse a MeshQL query, cached by text
+
+    :raises     MeshQLError:  The query is not in the supported subset
+    """
+    return Parser(meshql.strip()).parse()
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_expression(text):
+    """
+    Parse a MeshQL expression, like the values of a VIEW alias, cached by text
+    """
+    text=text.strip()
+    if text.startswith('#'):
+        query=parse_query(text)
+        return lambda ctx: ctx['__engine__'].run(query, ctx)
+    parser=Parser(text)
+    node=parser.parse_or()
+    if parser.peek()[0] is not None:
+        raise MeshQLError('Unexpected {0!r} in {1}'.format(parser.peek()[1], text))
+    return node
+
+
+class Engine(object):
+    """
+    This class describes the evaluation of the queries of one request on a graph
+
+    :param      graph:    The graph
+    :type       graph:    :class:`~aquarium.testing.graph.Graph`
+    :param      aliases:  The aliases of the request
+    :type       aliases:  dictionary
+    :param      trashed:  Return the trashed items instead of the others
+    :type       trashed:  boolean
+    """
+
+    def __init__(self, graph, aliases=None, trashed=False):
+        self.graph=graph
+        self.aliases=aliases or {}
+        self.trashed=trashed
+        self._views={}
+
+    def execute(self, meshql, start=None):
+        """
+        Run a query from an item, or on all the items
+
+        :returns:   The rows
+        :rtype:     list
+        """
+        ctx={'__engine__': self, '__aliases__': self.aliases, 'item': start}
+        return self.run(parse_query(meshql), ctx, root=True)
+
+    def rows(self, query, ctx):
+        if query.traversal is not None:
+            return self.graph.walk(ctx.get('item'), query.traversal, self.trashed)
+        return self.graph.scan(query.type_hint, self.trashed)
+
+    def exists(self, query, ctx):
+        for item, edge, path in self.rows(query, ctx):
+            row=dict(ctx, item=item, edge=edge, path=path)
+            if query.filter is None or truthy(query.filter(row)):
+                return True
+        return False
+
+    def run(self, query, ctx, root=False):
+        stop=query.offset + query.limit if query.limit and not query.sort and not query.unique else None
+        matches=[]
+        setters=self.setters(query.set)
+        for item, edge, path in self.rows(query, ctx):
+            row=dict(ctx, item=item, edge=edge, path=path)
+            if query.filter is not None and not truthy(query.filter(row)):
+                continue
+            for name, node in setters:
+                row[name]=node(row)
+            matches.append(row)
+            if stop is not None and len(matches) >= stop:
+                break
+
+        if query.unique:
+            seen=set()
+            matches=[row for row in matches if not (row['item']['_key'] in seen or seen.add(row['item']['_key']))]
+        for node, descending in reversed(query.sort):
+            matches.sort(key=functools.cmp_to_key(lambda a, b: compare(node(a), node(b))), reverse=descending)
+        if query.offset or query.limit:
+            matches=matches[query.offset:query.offset + query.limit if query.limit else None]
+
+        view=self.view(query.view)
+        if view is None:
+            if query.traversal is None and root:
+                return [row['item'] for row in matches]
+            return [{'item': row['item'], 'edge': row['edge']} for row in matches]
+        return [view(row) for row in matches]
+
+    def setters(self, name):
+        if name is None:
+            return []
+        values=self.aliases.get(name) or {}
+        return [(key, parse_expression(value)) for key, value in values.items()]
+
+    def view(self, view):
+        if view is None:
+            return None
+        kind, value=view
+        if kind == 'expression':
+            return value
+        if value not in self._views:
+            self._views[value]=self.compile_view(self.aliases.get(value))
+        return self._views[value]
+
+    def compile_view(self, value):
+        if isinstance(value, dict):
+            nodes=[(key, self.compile_view(v)) for key, v in value.items()]
+            return lambda ctx: dict((key, node(ctx)) for key, node in nodes)
+        elif isinstance(value, str):
+            return parse_expression(value)
+        return lambda ctx: value
@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+import json
+import re
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from urllib.parse import urlsplit, parse_qsl
+
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from ..benchmark import StandInHandler, StandInServer
+from ..codec import get_codec
+from ..profiler import meshql_template
+from ..stats import endpoint_pattern
+from .graph import Graph, HTTPError, timestamp
+from .meshql import Engine, MeshQLError
+import logging
+logger=logging.getLogger(__name__)
+
+# Endpoints answered without a token
+PUBLIC_ENDPOINTS=('signin', 'ping', 'status')
+API_VERSION=re.compile(r'^/?(?:[^/]+/)*?v\d+/')
+
+
+class FakeAquarium(Graph):
+    """
+    This class describes an in-process fake of the Aquarium API, serving an in-memory graph.
+
+    Served endpoints: `signin`, `signout`, `users/me`, `ping`, `status`, `query`, `items` (create, get, update, replace),
+    `items/{key}/append`, `items/{key}/traverse`, `items/{key}/upload`, `items/{key}/trash`,
+    `trashed_items/{key}/traverse`, `trashed_items/{key}/restore`, `edges` (create, get, update, replace, delete) and `files`.
+    The queries are evaluated by :mod:`aquarium.testing.meshql`.
+
+    .. code-block:: python
+
+        fake = FakeAquarium()
+        project = generate_project(fake, assets=1000, shots=1000)
+        aq = Aquarium(api_url='http://fake', token=fake.token, transport=FakeTransport(fake))
+        aq.item(project['_key']).traverse(meshql='# -($Child, 3)> $Asset')
+
+    :param      token:  Token of the admin user, accepted from the start
+    :type       token:  string, optional
+    :param      auth:   Reject the requests without a known token with 401
+    :type       auth:   boolean, optional
+    """
+
+    def __init__(self, token='fake-token', auth=True):
+        super(FakeAquarium, self).__init__()
+        self.token=token
+        self.auth=auth
+        self.codec=get_codec()
+        self.files={}
+        self.passwords={}
+        self.tokens={}
+        self.requests=0
+        self.hits={}
+        self._counter_lock=threading.Lock()
+        admin=self.add_user('Admin', 'admin@fake.aquarium', 'admin')
+        self.tokens[token]=admin['_key']
+
+        self.routes=[
+            ('GET', r'^ping$', self.ping),
+            ('GET', r'^status$', self.status),
+            ('POST', r'^signin$', self.signin),
+            ('POST', r'^signout$', self.signout),
+            ('GET', r'^users/me$', self.me),
+            ('POST', r'^query$', self.query),
+            ('POST', r'^items$', self.create_item),
+            ('GET', r'^items/([^/]+)$', self.read_item),
+            ('PATCH', r'^items/([^/]+)$', self.patch_item),
+            ('PUT', r'^items/([^/]+)$', self.put_item),
+            ('POST', r'^items/([^/]+)/append$', self.append),
+            ('POST', r'^items/([^/]+)/traverse$', self.traverse),
+            ('POST', r'^items/([^/]+)/upload$', self.upload),
+            ('DELETE', r'^items/([^/]+)/trash$', self.trash),
+            ('POST', r'^trashed_items/([^/]+)/traverse$', self.traverse_trashed),
+            ('POST', r'^trashed_items/([^/]+)/restore$', self.restore),
+            ('POST', r'^edges$', self.create_edge),
+            ('GET', r'^edges/([^/]+)$', self.read_edge),
+            ('PATCH', r'^edges/([^/]+)$', self.patch_edge),
+            ('PUT', r'^edges/([^/]+)$', self.put_edge),
+            ('DELETE', r'^edges/([^/]+)$', self.delete_edge),
+            ('GET', r'^files/(.+)$', self.download),
+        ]
+
+    def add_user(self, name='', email='', password=''):
+        """
+        Add a user who can sign in
+
+        :returns:   The user item
+        :rtype:     dictionary
+        """
+        user=self.add_item('User', {'name': name, 'email': email})
+        self.passwords[email]=(password, user['_key'])
+        return user
+
+    def handle(self, method='GET', url='', headers=None, body=b''):
+        """
+        Answer a request
+
+        :param      method:   The HTTP verb
+        :type       method:   string
+        :param      url:      The url, or its path
+        :type       url:      string
+        :param      headers:  The request headers
+        :type       headers:  dictionary
+        :param      body:     The request body
+        :type       body:     bytes
+
+        :returns:   (status code, headers, body)
+        :rtype:     tuple
+        """
+        start=time.perf_counter()
+        with self._counter_lock:
+            self.requests+=1
+        headers=CaseInsensitiveDict(headers or {})
+        parts=urlsplit(url)
+        if '/files/' in parts.path:
+            endpoint='files/' + parts.path.split('/files/', 1)[1]
+        else:
+            endpoint=API_VERSION.sub('', parts.path, count=1).strip('/')
+        request=dict(method=method.upper(), endpoint=endpoint, headers=headers,
+                     params=dict(parse_qsl(parts.query)), body=body or b'')
+
+        response=self.route(request)
+        self.count_hit(request, response[0], time.perf_counter() - start)
+        return response
+
+    def route(self, request):
+        endpoint=request['endpoint']
+        try:
+            if self.auth and endpoint not in PUBLIC_ENDPOINTS and request['headers'].get('authorization') not in self.tokens:
+                raise HTTPError(401, 'Not authenticated')
+            for verb, pattern, handler in self.routes:
+                match=re.match(pattern, endpoint)
+                if match is not None and verb == request['method']:
+                    result=handler(request, *match.groups())
+                    break
+            else:
+                raise HTTPError(404, 'Not found')
+        except HTTPError as e:
+            return self.json_response({'error': str(e)}, status=e.status)
+        except MeshQLError as e:
+            return self.json_response({'error': str(e)}, status=400)
+
+        if isinstance(result, tuple):
+            return result
+        return self.json_response(result)
+
+    def count_hit(self, request, status, seconds):
+        name='{0} {1}'.format(request['method'], endpoint_pattern(request['endpoint']))
+        if request.get('meshql') is not None:
+            name='{0} {1}'.format(name, meshql_template(request['meshql']))
+        with self._counter_lock:
+            hits=self.hits.get(name)
+            if hits is None:
+                hits=self.hits[name]={'hits': 0, 'errors': 0, 'seconds': 0.0}
+            hits['hits']+=1
+            hits['errors']+=1 if status >= 400 else 0
+            hits['seconds']+=seconds
+
+    def hit_counts(self):
+        """
+        Get the requests answered, by verb, endpoint pattern and meshql template for the queries
+
+        .. code-block:: python
+
+            fake.hit_counts()
+            # {'POST items/{key}/traverse # -($Child, ?)> $Task VIEW $view': {'hits': 12, 'errors': 0, 'seconds': 0.85}, ...}
+
+        :returns:   {`VERB pattern [template]`: {hits, errors, seconds}}
+        :rtype:     dictionary
+        """
+        with self._counter_lock:
+            return dict((name, dict(hits)) for name, hits in self.hits.items())
+
+    def reset_hits(self):
+        with self._counter_lock:
+            self.hits={}
+
+    def json_response(self, data, status=200, headers=None):
+        headers=dict(headers or {})
+        headers['Content-Type']='application/json'
+        return status, headers, self.codec.dumps(data)
+
+    def payload(self, request):
+        body=request['body']
+        if not body:
+            return {}
+        content_type=request['headers'].get('Content-Type') or ''
+        if 'application/x-www-form-urlencoded' in content_type:
+            return dict(parse_qsl(body.decode('utf-8')))
+        try:
+            return self.codec.loads(body)
+        except ValueError:
+            raise HTTPError(400, 'Invalid JSON body')
+
+    def user(self, request):
+        return self.items.get(self.tokens.get(request['headers'].get('authorization')))
+
+    # Endpoints
+
+    def ping(self, request):
+        return 200, {'Content-Type': 'text/plain'}, b'pong'
+
+    def status(self, request):
+        return {'status': 'ok', 'items': len(self.items), 'edges': len(self.edges)}
+
+    def signin(self, request):
+        payload=self.payload(request)
+        password, key=self.passwords.get(payload.get('email'), (None, None))
+        if key is None or password != payload.get('password'):
+            raise HTTPError(401, 'Wrong email or password')
+        token=uuid.uuid4().hex
+        with self.lock:
+            self.tokens[token]=key
+        return {'token': token, 'user': self.get_item(key)}
+
+    def signout(self, request):
+        with self.lock:
+            self.tokens.pop(request['headers'].get('authorization'), None)
+        return {}
+
+    def me(self, request):
+        user=self.user(request)
+        if user is None:
+            raise HTTPError(401, 'Not authenticated')
+        return {'user': user, 'usergroups': [], 'organisations': []}
+
+    def query(self, request):
+        payload=self.payload(request)
+        request['meshql']=payload.get('query') or ''
+        engine=Engine(self, payload.get('aliases'))
+        return engine.execute(payload.get('query') or '')
+
+    def traverse(self, request, key):
+        payload=self.payload(request)
+        request['meshql']=payload.get('query') or ''
+        engine=Engine(self, payload.get('aliases'))
+        return engine.execute(payload.get('query') or '', start=self.get_item(key))
+
+    def traverse_trashed(self, request, key):
+        payload=self.payload(request)
+        request['meshql']=payload.get('query') or ''
+        engine=Engine(self, payload.get('aliases'), trashed=True)
+        return engine.execute(payload.get('query') or '', start=self.get_item(key))
+
+    def create_item(self, request):
+        payload=self.payload(request)
+        return self.add_item(payload.get('type', ''), payload.get('data'))
+
+    def read_item(self, request, key):
+        item=self.get_item(key)
+        etag='"{0}"'.format(item['_rev'])
+        if request['headers'].get('If-None-Match') == etag:
+            return 304, {'ETag': etag}, b''
+        return self.json_response(item, headers={'ETag': etag})
+
+    def patch_item(self, request, key):
+        return self.update_item(key, self.payload(request).get('data') or {})
+
+    def put_item(self, request, key):
+        return self.update_item(key, self.payload(request).get('data') or {}, replace=True)
+
+    def append(self, request, key):
+        payload=self.payload(request)
+        self.get_item(key)
+        item_payload=payload.get('item') or {}
+        edge_payload=payload.get('edge') or {}
+        with self.lock:
+            item=self.add_item(item_payload.get('type', ''), item_payload.get('data'))
+            edge=self.add_edge(edge_payload.get('type') or 'Child', key, item['_key'], edge_payload.get('data'))
+        return {'item': item, 'edge': edge}
+
+    def upload(self, request, key):
+        self.get_item(key)
+        content_type=request['headers'].get('Content-Type') or ''
+        message=BytesParser().parsebytes(b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + request['body'])
+        data={}
+        for part in message.get_payload() if message.is_multipart() else []:
+            name=part.get_param('name', header='content-disposition')
+            if name == 'file':
+                path='/files/{0}/{1}'.format(key, part.get_filename())
+                self.files[path]=part.get_payload(decode=True)
+                data['file']=path
+            elif name == 'data':
+                try:
+                    data.update(json.loads(part.get_payload(decode=True) or b'{}'))
+                except ValueError:
+                    pass
+        return self.update_item(key, data)
+
+    def download(self, request, path):
+        content=self.files.get('/files/' + path)
+        if content is None:
+            raise HTTPError(404, 'File {0} not found'.format(path))
+        return 200, {'Content-Type': 'application/octet-stream'}, content
+
+    def trash(self, request, key):
+        item=self.get_item(key)
+        with self.lock:
+            # Trashing updates the item, like on Aquarium
+            item=self.items[key]=dict(item, _rev=uuid.uuid4().hex[:11], updatedAt=timestamp())
+            self.trashed.add(key)
+        return item
+
+    def restore(self, request, key):
+        item=self.get_item(key)
+        with self.lock:
+            item=self.items[key]=dict(item, _rev=uuid.uuid4().hex[:11], updatedAt=timestamp())
+            self.trashed.discard(key)
+        return item
+
+    def create_edge(self, request):
+        payload=self.payload(request)
+        return self.add_edge(payload.get('type', ''), payload.get('fromKey', ''), payload.get('toKey', ''),
+                             payload.get('data'))
+
+    def read_edge(self, request, key):
+        edge=self.edges.get(key)
+        if edge is None:
+            raise HTTPError(404, 'Edge {0} not found'.format(key))
+        return edge
+
+    def patch_edge(self, request, key):
+        return self.update_edge(key, self.payload(request).get('data') or {})
+
+    def put_edge(self, request, key):
+        return self.update_edge(key, self.payload(request).get('data') or {}, replace=True)
+
+    def delete_edge(self, request, key):
+        return self.remove_edge(key)
+
+
+class FakeTransport(BaseAdapter):
+    """
+    This class describes a transport answering the requests of the client with a :class:`~aquarium.testing.server.FakeAquarium`, without network.
+
+    :param      fake:     The fake server
+    :type       fake:     :class:`~aquarium.testing.server.FakeAquarium`
+    :param      latency:  Seconds waited before each response
+    :type       latency:  float, optional
+    """
+
+    def __init__(self, fake, latency=0):
+        super(FakeTransport, self).__init__()
+        self.fake=fake
+        self.latency=latency
+
+    def send(self, request, **kwargs):
+        body=request.body
+        if hasattr(body, 'read'):
+            body=body.read()
+        elif isinstance(body, str):
+            body=body.encode('utf-8')
+        status, headers, content=self.fake.handle(request.method, request.url, request.headers, body)
+        if self.latency:
+            time.sleep(self.latency)
+
+        response=Response()
+        response.status_code=status
+        response.headers=CaseInsensitiveDict(headers)
+        response.headers['Content-Length']=str(len(content))
+        response._content=content
+        response._content_consumed=True
+        response.encoding='utf-8'
+        response.url=request.url
+        response.request=request
+        return response
+
+    def close(self):
+        pass
+
+
+class FakeHandler(StandInHandler):
+    def handle_request(self):
+        body=self.read_body()
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        status, headers, content=self.server.fake.handle(self.command, self.path, dict(self.headers.items()), body)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET=handle_request
+    do_POST=handle_request
+    do_PATCH=handle_request
+    do_PUT=handle_request
+    do_DELETE=handle_request
+
+
+class FakeServer(StandInServer):
+    """
+    Local HTTP server serving a :class:`~aquarium.testing.server.FakeAquarium`, started in a background thread
+
+    .. code-block:: python
+
+        with FakeServer(fake, latency=0.02) as server:
+            aq = Aquarium(api_url=server.url, token=fake.token)
+
+    :param      fake:     The fake server
+    :type       fake:     :class:`~aquarium.testing.server.FakeAquarium`
+    :param      latency:  Seconds spent by the server on each request
+    :type       latency:  float, optional
+    """
+
+    def __init__(self, fake=None, latency=0):
+        StandInServer.__init__(self, latency=latency, handler=FakeHandler)
+        self.fake=fake if fake is not None else FakeAquarium()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os.path
+import sys
+import unittest
+
+
+if __name__ == '__main__':
+    # Only munge path if invoked as a script. Testrunners should have setup
+    # the paths already
+    sys.path.insert(0, os.path.abspath(os.path.join(os.pardir, os.pardir)))
+
+
+from aquarium import Aquarium
+from aquarium.aio import AsyncAquarium, AsyncProxy, STREAM_CHUNK_SIZE
+from aquarium.testing import FakeAquarium, FakeServer, generate_project
+
+
+QUERY = '# -($Child, 5)> $Task SORT item._key'
+
+
+class AsyncAquariumTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = FakeAquarium()
+        cls.project = generate_project(cls.fake, assets=40, shots=40, tasks=3)
+        cls.server = FakeServer(cls.fake, latency=0.05).__enter__()
+        cls.sync = Aquarium(api_url=cls.server.url, token=cls.fake.token)
+        cls.expected = [row['item']['_key'] for row in cls.sync.item(cls.project['_key']).traverse(QUERY)]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.__exit__(None, None, None)
+
+    def setUp(self):
+        self.aq = AsyncAquarium(api_url=self.server.url, token=self.fake.token, concurrency=4)
+
+    def tearDown(self):
+        self.aq.close()
+
+    def run_async(self, coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    def test_coroutine(self):
+        async def main():
+            return await self.aq.item(self.project['_key']).traverse(QUERY)
+
+        rows = self.run_async(main())
+        self.assertEqual([row['item']['_key'] for row in rows], self.expected)
+
+    def test_traverse_iter(self):
+        self.assertGreater(len(self.expected), STREAM_CHUNK_SIZE)
+
+        async def main():
+            return [row async for row in self.aq.item(self.project['_key']).traverse_iter(QUERY)]
+
+        rows = self.run_async(main())
+        self.assertEqual([row['item']['_key'] for row in rows], self.expected)
+
+    def test_query_iter_cast(self):
+        query = "# $Task AND <($Child, 5)- item._key == '{0}' SORT item._key".format(self.project['_key'])
+
+        async def main():
+            return [row async for row in self.aq.query_iter(query, cast=True)]
+
+        rows = self.run_async(main())
+        self.assertEqual([row._key for row in rows], self.expected)
+        self.assertIsInstance(rows[0], AsyncProxy)
+
+    def test_traverse_iter_doesnt_block(self):
+        # The event loop keeps running while the server answers
+        async def main():
+            ticks = []
+
+            async def tick():
+                while True:
+                    ticks.append(1)
+                    await asyncio.sleep(0.005)
+
+            ticker = asyncio.ensure_future(tick())
+            async for row in self.aq.item(self.project['_key']).traverse_iter(QUERY):
+                pass
+            ticker.cancel()
+            return len(ticks)
+
+        self.assertGreater(self.run_async(main()), 3)
+
+    def test_traverse_iter_stop(self):
+        async def main():
+            rows = self.aq.item(self.project['_key']).traverse_iter(QUERY)
+            async for row in rows:
+                break
+            await rows.aclose()
+            return row
+
+        row = self.run_async(main())
+        self.assertEqual(row['item']['_key'], self.expected[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
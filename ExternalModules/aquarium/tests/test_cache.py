@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+import os.path
+import sys
+import unittest
+from unittest import mock
+
+
+if __name__ == '__main__':
+    # Only munge path if invoked as a script. Testrunners should have setup
+    # the paths already
+    sys.path.insert(0, os.path.abspath(os.path.join(os.pardir, os.pardir)))
+
+
+from aquarium import Aquarium
+from aquarium.cache import ResponseCache
+from aquarium.testing import FakeAquarium, FakeServer, generate_project
+
+
+CHILDREN = '# -($Child)> * SORT item._key'
+GET = 'GET items/{key}'
+TRAVERSE = 'POST items/{key}/traverse # -($Child)> * SORT item._key'
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = FakeAquarium()
+        cls.server = FakeServer(cls.fake).__enter__()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.__exit__(None, None, None)
+
+    def setUp(self):
+        self.project = generate_project(self.fake, assets=3, shots=3, tasks=1, users=2)
+        self.cache = ResponseCache(ttl=60)
+        self.aq = Aquarium(api_url=self.server.url, token=self.fake.token, cache=self.cache)
+        self.fake.reset_hits()
+
+    def hits(self, name):
+        return self.fake.hit_counts().get(name, {}).get('hits', 0)
+
+    def keys(self, rows):
+        return [row['item']['_key'] for row in rows]
+
+    def test_hit(self):
+        project = self.aq.item(self.project['_key'])
+        first = project.traverse(CHILDREN)
+        second = project.traverse(CHILDREN)
+        self.assertEqual(self.keys(first), self.keys(second))
+        self.assertEqual(self.hits(TRAVERSE), 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+        # Same query with other whitespaces
+        project.traverse(' #  -($Child)>   *  SORT item._key ')
+        self.assertEqual(self.hits(TRAVERSE), 1)
+
+        # Every hit returns new objects
+        first[0]['item']['data']['name'] = 'Changed'
+        self.assertNotEqual(project.traverse(CHILDREN)[0]['item']['data'].get('name'), 'Changed')
+
+    def test_ttl(self):
+        project = self.aq.item(self.project['_key'])
+        now = 1000.0
+        with mock.patch('aquarium.cache.time.time', side_effect=lambda: now):
+            project.get()
+            now += 59
+            project.get()
+            self.assertEqual(self.hits(GET), 1)
+            now += 2
+            project.get()
+            self.assertEqual(self.hits(GET), 2)
+
+    def test_lru_max_bytes(self):
+        items = [self.aq.item(key) for key in self.keys(self.aq.item(self.project['_key']).traverse(CHILDREN))[:3]]
+        sizes = []
+        for item in items:
+            size = self.cache.size
+            item.get()
+            sizes.append(self.cache.size - size)
+        self.cache.clear()
+        self.fake.reset_hits()
+
+        # Room for the first item and one other
+        self.cache.max_bytes = sizes[0] + max(sizes[1:])
+        items[0].get()
+        items[1].get()
+        items[0].get()
+        items[2].get()
+        self.assertEqual(self.hits(GET), 3)
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+        # The least recently used was evicted
+        items[0].get()
+        self.assertEqual(self.hits(GET), 3)
+        items[1].get()
+        self.assertEqual(self.hits(GET), 4)
+        self.assertLessEqual(self.cache.size, self.cache.max_bytes)
+
+    def test_append_invalidates(self):
+        project = self.aq.item(self.project['_key'])
+        before = self.keys(project.traverse(CHILDREN))
+        child = project.append(type='Asset', data=dict(name='New'))
+
+        after = self.keys(project.traverse(CHILDREN))
+        self.assertEqual(self.hits(TRAVERSE), 2)
+        self.assertEqual(sorted(after), sorted(before + [child.item._key]))
+
+    def test_patch_invalidates(self):
+        key = self.keys(self.aq.item(self.project['_key']).traverse(CHILDREN))[0]
+        item = self.aq.item(key)
+        item.get()
+        item.update_data(dict(name='Patched'))
+
+        self.assertEqual(item.get().data['name'], 'Patched')
+        self.assertEqual(self.hits(GET), 2)
+
+        # The traverse containing the item is invalidated too
+        rows = self.aq.item(self.project['_key']).traverse(CHILDREN)
+        self.assertEqual(self.hits(TRAVERSE), 2)
+        self.assertIn('Patched', [row['item']['data'].get('name') for row in rows])
+
+
+if __name__ == '__main__':
+    unittest.main()
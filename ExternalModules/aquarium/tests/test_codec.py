@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import os.path
+import sys
+import unittest
+from unittest import mock
+
+
+if __name__ == '__main__':
+    # Only munge path if invoked as a script. Testrunners should have setup
+    # the paths already
+    sys.path.insert(0, os.path.abspath(os.path.join(os.pardir, os.pardir)))
+
+
+from aquarium.codec import JsonCodec, OrjsonCodec, get_codec, has_big_integer, orjson
+
+
+# Payloads orjson alone rejects or decodes differently from the standard library
+PAYLOADS = [
+    b'{"a":"\\ud800"}',
+    b'{"a":"\\udfff\\ud800x"}',
+    b'{"n":18446744073709551616}',
+    b'{"n":-9223372036854775809}',
+    b'[123456789012345678901234567890,1]',
+    b'{"n":9223372036854775807,"m":-9223372036854775808}',
+    b'{"key":"1234567890123456789012"}',
+    b'{"key":"a \\" 1234567890123456789012","n":12345678901234567890123}',
+]
+
+
+@unittest.skipIf(orjson is None, 'orjson is not installed')
+class OrjsonCodecTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.codec = OrjsonCodec()
+        self.json = JsonCodec()
+
+    def test_default(self):
+        self.assertEqual(get_codec().name, 'orjson')
+
+    def test_loads_like_json(self):
+        for payload in PAYLOADS:
+            expected = self.json.loads(payload)
+            self.assertEqual(self.codec.loads(payload), expected, payload)
+            self.assertEqual(self.codec.loads(payload.decode('utf-8')), expected, payload)
+
+    def test_loads_big_integers_exactly(self):
+        data = self.codec.loads(b'{"n":18446744073709551616}')
+        self.assertIsInstance(data['n'], int)
+        self.assertEqual(data['n'], 2 ** 64)
+
+    def test_digits_in_strings_stay_on_orjson(self):
+        payload = b'{"_key":"1234567890123456789012","data":{"name":"\\"1234567890123456789\\""},"n":123}'
+        expected = self.json.loads(payload)
+        with mock.patch.object(JsonCodec, 'loads', side_effect=AssertionError('Decoded by json')):
+            self.assertEqual(self.codec.loads(payload), expected)
+            self.assertEqual(self.codec.loads(payload.decode('utf-8')), expected)
+
+    def test_has_big_integer(self):
+        self.assertFalse(has_big_integer(b'{"a":"1234567890123456789","b":123456789012345678}'))
+        self.assertFalse(has_big_integer(b'["\\\\", "x\\"1234567890123456789"]'))
+        self.assertTrue(has_big_integer(b'{"a":"x","b":1234567890123456789}'))
+        self.assertTrue(has_big_integer(b'["\\\\",-1234567890123456789]'))
+
+    def test_loads_invalid(self):
+        with self.assertRaises(ValueError):
+            self.codec.loads(b'{"a":')
+
+    def test_roundtrip(self):
+        for payload in PAYLOADS:
+            data = self.json.loads(payload)
+            self.assertEqual(self.codec.loads(self.codec.dumps(data)), data, payload)
+
+
+if __name__ == '__main__':
+    unittest.main()
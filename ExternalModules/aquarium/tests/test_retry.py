@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import os.path
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+
+if __name__ == '__main__':
+    # Only munge path if invoked as a script. Testrunners should have setup
+    # the paths already
+    sys.path.insert(0, os.path.abspath(os.path.join(os.pardir, os.pardir)))
+
+
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from aquarium import Aquarium
+from aquarium.exceptions import Error
+from aquarium.testing import FakeAquarium, FakeTransport, generate_project
+
+
+class FaultyTransport(FakeTransport):
+    """
+    Fake transport failing the next requests with the queued faults:
+    a status code, a (status code, headers) tuple, or a `not_sent` or `timeout` string.
+    """
+
+    def __init__(self, fake):
+        super(FaultyTransport, self).__init__(fake)
+        self.faults = []
+        self.sent = []
+
+    def send(self, request, **kwargs):
+        self.sent.append((request.method, request.url))
+        fault = self.faults.pop(0) if self.faults else None
+        if fault is None:
+            return super(FaultyTransport, self).send(request, **kwargs)
+
+        if fault == 'not_sent':
+            reason = NewConnectionError(None, 'Connection refused')
+            raise requests.ConnectionError(MaxRetryError(None, request.url, reason), request=request)
+        if fault == 'timeout':
+            # The server received the request, only its response is lost
+            super(FaultyTransport, self).send(request, **kwargs)
+            raise requests.ReadTimeout('Read timed out', request=request)
+
+        status, headers = fault if isinstance(fault, tuple) else (fault, {})
+        response = super(FaultyTransport, self).send(request, **kwargs)
+        response.status_code = status
+        response.headers.update(headers)
+        response._content = b'{"message": "Unavailable"}'
+        return response
+
+
+class RetryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeAquarium()
+        self.project = generate_project(self.fake, assets=2, shots=2, tasks=1, users=2)
+        self.transport = FaultyTransport(self.fake)
+        self.aq = Aquarium(api_url='http://fake.aquarium', token=self.fake.token, transport=self.transport,
+                           backoff_factor=0.5, backoff_max=30)
+        self.events = []
+        self.aq.add_hook('after_request', self.events.append)
+        self.sleep = mock.patch('aquarium.aquarium.time.sleep').start()
+        self.addCleanup(mock.patch.stopall)
+
+    def count(self, endpoint):
+        return len([url for method, url in self.transport.sent if endpoint in url])
+
+    def children(self):
+        return self.aq.item(self.project['_key']).traverse('# -($Child)> *')
+
+    def test_get_retried_after_503(self):
+        self.transport.faults = [503]
+        item = self.aq.item(self.project['_key']).get()
+        self.assertEqual(item._key, self.project['_key'])
+        self.assertEqual(self.count('items/' + self.project['_key']), 2)
+        self.assertEqual(self.events[-1].retries, 1)
+        self.assertEqual(self.sleep.call_count, 1)
+
+    def test_append_not_retried_after_timeout(self):
+        before = len(self.children())
+        self.transport.faults = ['timeout']
+        with self.assertRaises(requests.ReadTimeout):
+            self.aq.item(self.project['_key']).append(type='Asset', data=dict(name='Timeout'))
+        self.assertEqual(self.count('/append'), 1)
+        # The server created it once
+        self.assertEqual(len(self.children()), before + 1)
+
+    def test_append_retried_with_idempotency_key(self):
+        self.aq.retry_idempotency_key = True
+        self.transport.faults = ['timeout']
+        self.aq.item(self.project['_key']).append(type='Asset', data=dict(name='Timeout'))
+        self.assertEqual(self.count('/append'), 2)
+
+    def test_retry_after(self):
+        self.transport.faults = [(429, {'Retry-After': '7'})]
+        self.aq.item(self.project['_key']).append(type='Asset', data=dict(name='Throttled'))
+        self.assertEqual(self.count('/append'), 2)
+        self.sleep.assert_called_once_with(7.0)
+
+    def test_retry_after_capped(self):
+        self.transport.faults = [(429, {'Retry-After': '3600'})]
+        self.aq.item(self.project['_key']).get()
+        self.sleep.assert_called_once_with(30)
+
+    def test_upload_never_retried(self):
+        with tempfile.NamedTemporaryFile(suffix='.txt', delete=False) as f:
+            f.write(b'content')
+        self.addCleanup(os.remove, f.name)
+
+        item = self.aq.item(self.project['_key'])
+        for fault in (503, (429, {'Retry-After': '1'})):
+            self.transport.sent = []
+            self.transport.faults = [fault]
+            with self.assertRaises(Error):
+                item.upload_file(path=f.name)
+            self.assertEqual(self.count('/upload'), 1)
+
+        self.transport.sent = []
+        self.transport.faults = ['not_sent']
+        with self.assertRaises(requests.ConnectionError):
+            item.upload_file(path=f.name)
+        self.assertEqual(self.count('/upload'), 1)
+        self.assertFalse(self.sleep.called)
+
+    def test_not_sent_retried(self):
+        before = len(self.children())
+        self.transport.faults = ['not_sent']
+        self.aq.item(self.project['_key']).append(type='Asset', data=dict(name='Refused'))
+        self.assertEqual(self.count('/append'), 2)
+        self.assertEqual(len(self.children()), before + 1)
+
+    def test_max_retries(self):
+        self.transport.faults = [503] * 10
+        with self.assertRaises(Error):
+            self.aq.item(self.project['_key']).get()
+        self.assertEqual(len(self.transport.sent), self.aq.max_retries + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import json
+import os.path
+import sys
+import unittest
+
+
+if __name__ == '__main__':
+    # Only munge path if invoked as a script. Testrunners should have setup
+    # the paths already
+    sys.path.insert(0, os.path.abspath(os.path.join(os.pardir, os.pardir)))
+
+
+from aquarium.tools import iter_json_array
+
+
+DOCUMENTS = [
+    b'[]',
+    b' [ ] ',
+    b'[1]',
+    b'[123456,-7.5e+3,true,false,null]',
+    b'[{"a": "quote \\" and ] and [ and , inside"}, "\\\\", "}{"]',
+    b'[[1, [2, []]], {"b": [{"c": []}]}, [], {}]',
+    '[{"name": "éléphant ✓"}, "\\u00e9"]'.encode('utf-8'),
+    b'\n[\n  {"item": {"_key": "1"}},\n  {"item": {"_key": "2"}}\n]\n',
+]
+
+MALFORMED = [
+    b'',
+    b'   ',
+    b'{"a": 1}',
+    b'[,1,,2,]',
+    b'[,]',
+    b'[,1]',
+    b'[1,,2]',
+    b'[1,2,]',
+    b'[1 2]',
+    b'[1;2]',
+    b'["a" "b"]',
+]
+
+
+def splits(document):
+    # The document cut in two at every position, then byte by byte
+    for index in range(len(document) + 1):
+        yield [document[:index], document[index:]]
+    yield [document[index:index + 1] for index in range(len(document))]
+
+
+class IterJsonArrayTestCase(unittest.TestCase):
+
+    def parse(self, chunks):
+        return list(iter_json_array(iter(chunks)))
+
+    def test_documents(self):
+        for document in DOCUMENTS:
+            expected = json.loads(document.decode('utf-8'))
+            for chunks in splits(document):
+                self.assertEqual(self.parse(chunks), expected, chunks)
+
+    def test_malformed(self):
+        for document in MALFORMED:
+            for chunks in splits(document):
+                with self.assertRaises(ValueError, msg=chunks):
+                    self.parse(chunks)
+
+    def test_truncated(self):
+        for document in DOCUMENTS:
+            end = document.rindex(b']')
+            for index in range(end):
+                with self.assertRaises(ValueError, msg=document[:index]):
+                    self.parse([document[:index]])
+
+    def test_yields_before_the_end(self):
+        rows = iter_json_array(iter([b'[{"a": 1},', b' {"b"']))
+        self.assertEqual(next(rows), {'a': 1})
+        with self.assertRaises(ValueError):
+            next(rows)
+
+    def test_number_split(self):
+        self.assertEqual(self.parse([b'[12', b'34,1e', b'5]']), [1234, 1e5])
+
+
+if __name__ == '__main__':
+    unittest.main()
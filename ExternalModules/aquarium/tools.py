@@ -1,10 +1,18 @@
 # -*- coding: utf-8 -*-
+import codecs
+import json
 import pprint
+import random
+import time
+from email.utils import parsedate_tz, mktime_tz
+import requests
+from urllib3.exceptions import ConnectTimeoutError
 import logging
 logger=logging.getLogger(__name__)
 from .exceptions import RequestError, AuthentificationError,\
                         AutorisationError, PathNotFoundError, \
-                        MethodNotAllowed, ConflictError, UploadExceedLimit, InternalError
+                        MethodNotAllowed, ConflictError, UploadExceedLimit, InternalError, \
+                        TooManyRequestsError, UnavailableError
 
 def pretty_print_format(data={}, indent=8, width=80, depth=10):
     dict_string=pprint.pformat(data, indent=indent, width=width, depth=depth)
@@ -36,10 +44,12 @@ def evaluate(response=None):
     """
     status_code=response.status_code
     url=response.url
-    text=response.text
     logger.debug('Evaluate request response : status_code : %s / url : %s', status_code, url)
     if status_code == 200:
         return True
+    elif status_code == 304:
+        # Not modified, answer of a conditional request
+        return True
     elif status_code==400:
         raise RequestError(response)
     elif status_code==401:
@@ -54,12 +64,16 @@ def evaluate(response=None):
         raise ConflictError(response)
     elif status_code==413:
         raise UploadExceedLimit(response)
+    elif status_code==429:
+        raise TooManyRequestsError(response)
     elif status_code==500:
         raise InternalError(response)
+    elif status_code in (502, 503, 504):
+        raise UnavailableError(response)
     else:
         raise RuntimeError('code {status_code} | url:{url} | {content}'.format(
             status_code=status_code,
-            content=text,
+            content=response.text,
             url=url
         ))
 
@@ -76,3 +90,154 @@ def jsonify(dictionnary):
     for key, value in dictionnary.items():
         if isinstance(value, bool):
             dictionnary[key] = str(value).lower()
+
+def backoff_delay(attempt=0, factor=0.5, maximum=30):
+    """
+    Get the delay before a retry: exponential backoff with full jitter
+
+    :param      attempt:  The number of the failed attempt, starting at 0
+    :type       attempt:  integer
+    :param      factor:   The delay of the first retry, doubled after each attempt
+    :type       factor:   float
+    :param      maximum:  The maximum delay
+    :type       maximum:  float
+
+    :returns:   Delay in seconds
+    :rtype:     float
+    """
+    return random.uniform(0, min(maximum, factor * (2 ** attempt)))
+
+def is_not_sent(error=None):
+    """
+    Check if a connection error happened before the request was sent: the connection was refused, the host not found or the connection timed out
+
+    :param      error:  The error raised by requests
+    :type       error:  Exception
+
+    :returns:   True if the server can't have received the request
+    :rtype:     boolean
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError):
+        return False
+    # requests wraps the urllib3 error, itself wrapped in a MaxRetryError by the connection pool
+    reason=error.args[0] if error.args else None
+    reason=getattr(reason, 'reason', reason)
+    return isinstance(reason, ConnectTimeoutError)
+
+def retry_after(response=None):
+    """
+    Read the `Retry-After` header of a response
+
+    :param      response:  The response
+    :type       response:  Response object
+
+    :returns:   Delay in seconds, or None without a valid header
+    :rtype:     float
+    """
+    value=response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    # HTTP-date
+    date=parsedate_tz(value)
+    if date is None:
+        return None
+    return max(0.0, mktime_tz(date) - time.time())
+
+def iter_json_array(chunks, encoding='utf-8'):
+    """
+    Parse a JSON array incrementally, yielding each row as soon as it is complete
+
+    :param      chunks:    The encoded JSON document, chunk by chunk
+    :type       chunks:    iterable of bytes
+    :param      encoding:  The encoding of the document
+    :type       encoding:  string, optional
+
+    :returns:   Generator of rows
+    :rtype:     generator
+
+    :raises     ValueError:  The document is not a valid JSON array
+    """
+    decoder=json.JSONDecoder()
+    text_decoder=codecs.getincrementaldecoder(encoding or 'utf-8')()
+    chunks=iter(chunks)
+    buffer=''
+    position=0
+    started=False
+    done=False
+    # What comes next: 'first' row or "]", a 'row' after a comma, or a 'separator' after a row
+    expected='first'
+
+    while not done:
+        chunk=next(chunks, None)
+        if chunk is None:
+            buffer+=text_decoder.decode(b'', final=True)
+            done=True
+        else:
+            buffer+=text_decoder.decode(chunk)
+
+        while True:
+            # Skip whitespaces
+            while position < len(buffer) and buffer[position] in ' \t\r\n':
+                position+=1
+            if position >= len(buffer):
+                break
+
+            character=buffer[position]
+            if not started:
+                if character != '[':
+                    raise ValueError('Expected a JSON array, got {0!r}'.format(buffer[position:position + 20]))
+                started=True
+                position+=1
+                continue
+
+            if expected == 'separator':
+                if character == ']':
+                    return
+                if character != ',':
+                    raise ValueError('Expected "," or "]" at {0}, got {1!r}'.format(position, character))
+                expected='row'
+                position+=1
+                continue
+
+            if character == ']' and expected == 'first':
+                return
+            if character in ',]':
+                raise ValueError('Expected a row at {0}, got {1!r}'.format(position, character))
+
+            try:
+                row, end=decoder.raw_decode(buffer, position)
+            except ValueError:
+                if done:
+                    raise
+                # Incomplete row, wait for the next chunk
+                break
+
+            # A number may continue in the next chunk: only yield rows followed by a separator
+            following=end
+            while following < len(buffer) and buffer[following] in ' \t\r\n':
+                following+=1
+            if following >= len(buffer) or buffer[following] not in ',]':
+                if done:
+                    raise ValueError('Expected "," or "]" after the row at {0}'.format(end))
+                break
+
+            position=end
+            expected='separator'
+            yield row
+
+        # Drop the parsed rows from the buffer
+        if position > 65536:
+            buffer=buffer[position:]
+            position=0
+
+    if not started:
+        raise ValueError('Expected a JSON array, got an empty document')
+    raise ValueError('Unterminated JSON array')
@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+"""
+Transports recording the requests of the client to a cassette file, and replaying them without network.
+
+.. code-block:: python
+
+    # Record the real traffic
+    cassette=Cassette()
+    aq=Aquarium(api_url=url, token=token, transport=RecordingTransport(cassette))
+    run_the_tool(aq)
+    cassette.save('project.cassette.json')
+
+    # Replay it offline, with 20ms of latency per request
+    aq=Aquarium(api_url=url, token='replay', transport=ReplayTransport(Cassette.load('project.cassette.json'), latency=0.02))
+    run_the_tool(aq)
+"""
+import base64
+import json
+import random
+import threading
+import time
+
+from requests import RequestException
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+import sys
+if sys.version_info[0] > 2:
+    from urllib.parse import urlsplit, parse_qsl, urlencode
+else:
+    from urlparse import urlsplit, parse_qsl
+    from urllib import urlencode
+
+import logging
+logger=logging.getLogger(__name__)
+
+CASSETTE_VERSION=1
+SANITIZED='<sanitized>'
+# Headers never written to a cassette
+SENSITIVE_HEADERS=('authorization', 'proxy-authorization', 'cookie', 'set-cookie')
+# JSON keys and url parameters whose values are replaced by SANITIZED
+SENSITIVE_KEYS=('token', 'accesstoken', 'refreshtoken', 'password', 'apikey', 'secret')
+# Headers kept in a cassette
+RECORDED_HEADERS=('content-type', 'content-length', 'content-encoding', 'etag', 'retry-after', 'idempotency-key')
+
+
+def sanitize(data):
+    """
+    Replace the values of the sensitive keys, recursively
+
+    :param      data:  Decoded JSON
+    :type       data:  object
+
+    :returns:   A sanitized copy
+    :rtype:     object
+    """
+    if isinstance(data, dict):
+        return dict((key, SANITIZED if str(key).lower() in SENSITIVE_KEYS and value else sanitize(value))
+                    for key, value in data.items())
+    elif isinstance(data, list):
+        return [sanitize(value) for value in data]
+    return data
+
+
+def sanitize_url(url=''):
+    """
+    Get the path and sorted parameters of an url, without its host and with the sensitive parameters sanitized
+
+    :returns:   Like `/v1/items/123?limit=10`
+    :rtype:     string
+    """
+    parts=urlsplit(url)
+    params=sorted((key, SANITIZED if key.lower() in SENSITIVE_KEYS else value)
+                  for key, value in parse_qsl(parts.query, keep_blank_values=True))
+    return parts.path + ('?' + urlencode(params) if params else '')
+
+
+def encode_body(content=None, content_type='', secrets=()):
+    """
+    Encode a body for a cassette. JSON is sanitized and kept readable, text is kept as is and binary in base64.
+
+    :param      content:       The body
+    :type       content:       bytes or string
+    :param      content_type:  The Content-Type header
+    :type       content_type:  string
+    :param      secrets:       Strings replaced by SANITIZED, like the token of the request
+    :type       secrets:       tuple
+
+    :returns:   {json} or {text} or {base64}, None without body
+    :rtype:     dictionary
+    """
+    if not content:
+        return None
+    if isinstance(content, type(u'')):
+        content=content.encode('utf-8')
+    if 'multipart/' in (content_type or ''):
+        # Uploaded files: only the size matters for a replay
+        return dict(multipart=len(content))
+
+    try:
+        text=content.decode('utf-8')
+    except (UnicodeDecodeError, AttributeError):
+        return dict(base64=base64.b64encode(content).decode('ascii'))
+
+    for secret in secrets:
+        if secret:
+            text=text.replace(secret, SANITIZED)
+    if 'json' in (content_type or '') or text[:1] in ('{', '['):
+        try:
+            return dict(json=sanitize(json.loads(text)))
+        except ValueError:
+            pass
+    return dict(text=text)
+
+
+def decode_body(body=None):
+    """
+    Decode a body of a cassette
+
+    :returns:   The content
+    :rtype:     bytes
+    """
+    if not body:
+        return b''
+    if 'json' in body:
+        return json.dumps(body['json'], separators=(',', ':')).encode('utf-8')
+    elif 'text' in body:
+        return body['text'].encode('utf-8')
+    elif 'base64' in body:
+        return base64.b64decode(body['base64'])
+    return b''
+
+
+def body_key(body=None):
+    # JSON bodies match whatever their key order or whitespaces
+    if not body or 'multipart' in body:
+        return ''
+    return json.dumps(body, sort_keys=True)
+
+
+class CassetteMissError(RequestException):
+    """
+    Raised by :class:`~aquarium.transport.ReplayTransport` when a request was not recorded
+    """
+    pass
+
+
+class Cassette(object):
+    """
+    This class describes recorded requests and responses, saved as a JSON file.
+
+    Requests match on verb, path, parameters and body. A request recorded several times is answered with
+    its responses in the recorded order, then from the first one again.
+
+    :param      interactions:  The recorded {request, response, seconds}
+    :type       interactions:  list, optional
+    """
+
+    def __init__(self, interactions=None):
+        self._lock=threading.Lock()
+        self.interactions=[]
+        self._index={}
+        self._positions={}
+        for interaction in interactions or []:
+            self.append(interaction)
+
+    def __len__(self):
+        return len(self.interactions)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a cassette file
+
+        :param      path:  The file path
+        :type       path:  string
+
+        :returns:   The cassette
+        :rtype:     :class:`~aquarium.transport.Cassette`
+        """
+        with open(path, 'rb') as f:
+            data=json.loads(f.read().decode('utf-8'))
+        if data.get('version') != CASSETTE_VERSION:
+            raise ValueError('Unsupported cassette version {0} in {1}'.format(data.get('version'), path))
+        return cls(data.get('interactions'))
+
+    def save(self, path):
+        """
+        Write the cassette to a file
+
+        :param      path:  The file path
+        :type       path:  string
+        """
+        with self._lock:
+            data=dict(version=CASSETTE_VERSION, interactions=list(self.interactions))
+        with open(path, 'wb') as f:
+            f.write(json.dumps(data, indent=1).encode('utf-8'))
+        logger.debug('Saved %s interactions to %s', len(data['interactions']), path)
+        return path
+
+    def key(self, request):
+        return (request['method'].upper(), request['url'], body_key(request.get('body')))
+
+    def append(self, interaction):
+        """
+        Add a recorded interaction
+
+        :param      interaction:  {request: {method, url, headers, body}, response: {status, reason, headers, body}, seconds}
+        :type       interaction:  dictionary
+        """
+        with self._lock:
+            self.interactions.append(interaction)
+            self._index.setdefault(self.key(interaction['request']), []).append(interaction)
+
+    def find(self, request):
+        """
+        Get the next recorded interaction of a request
+
+        :param      request:  {method, url, body}, see :func:`~aquarium.transport.Cassette.append`
+        :type       request:  dictionary
+
+        :returns:   The interaction, or None
+        :rtype:     dictionary
+        """
+        key=self.key(request)
+        with self._lock:
+            interactions=self._index.get(key)
+            if not interactions:
+                return None
+            position=self._positions.get(key, 0)
+            self._positions[key]=position + 1
+            return interactions[position % len(interactions)]
+
+    def rewind(self):
+        """
+        Answer the requests from their first recorded response again
+        """
+        with self._lock:
+            self._positions={}
+
+
+def record_request(request):
+    """
+    Build the sanitized request of an interaction from a prepared request
+    """
+    secrets=[request.headers.get('authorization') or '']
+    return dict(
+        method=request.method.upper(),
+        url=sanitize_url(request.url),
+        body=encode_body(request.body, request.headers.get('Content-Type'), secrets)
+    )
+
+
+class RecordingTransport(BaseAdapter):
+    """
+    This class describes a transport sending the requests with another transport, and recording them to a cassette.
+
+    The `Authorization` and cookie headers are not recorded. The token of the request, and the values of the
+    JSON keys and parameters like `token` or `password`, are replaced by `<sanitized>`.
+
+    .. note::
+        The responses are read entirely to be recorded, streamed responses included.
+
+    :param      cassette:  The cassette receiving the interactions
+    :type       cassette:  :class:`~aquarium.transport.Cassette`
+    :param      adapter:   The transport sending the requests (default : the transport of the client)
+    :type       adapter:   :class:`requests.adapters.BaseAdapter`, optional
+    """
+
+    def __init__(self, cassette=None, adapter=None):
+        super(RecordingTransport, self).__init__()
+        self.cassette=cassette if cassette is not None else Cassette()
+        self.adapter=adapter
+
+    def send(self, request, **kwargs):
+        adapter=self.adapter
+        if adapter is None:
+            adapter=self.adapter=HTTPAdapter()
+        start=time.time()
+        response=adapter.send(request, **kwargs)
+        content=response.content
+        seconds=time.time() - start
+
+        secrets=[request.headers.get('authorization') or '']
+        headers=dict((name.lower(), value) for name, value in response.headers.items()
+                     if name.lower() in RECORDED_HEADERS)
+        self.cassette.append(dict(
+            request=record_request(request),
+            response=dict(status=response.status_code, reason=response.reason, headers=headers,
+                          body=encode_body(content, response.headers.get('Content-Type'), secrets)),
+            seconds=seconds
+        ))
+        return response
+
+    def close(self):
+        if self.adapter is not None:
+            self.adapter.close()
+
+
+class ReplayTransport(BaseAdapter):
+    """
+    This class describes a transport answering the requests with the responses of a cassette, without network.
+
+    :param      cassette:  The recorded interactions
+    :type       cassette:  :class:`~aquarium.transport.Cassette`
+    :param      latency:   Seconds waited before each response, or `recorded` to wait the recorded time
+    :type       latency:   float or string, optional
+    :param      jitter:    Random seconds added to the latency, up to this value
+    :type       jitter:    float, optional
+    :param      speed:     Divide the latency, like `2` to wait half the recorded time
+    :type       speed:     float, optional
+
+    :raises     CassetteMissError:  A request was not recorded
+    """
+
+    def __init__(self, cassette, latency=0, jitter=0, speed=1):
+        super(ReplayTransport, self).__init__()
+        self.cassette=cassette
+        self.latency=latency
+        self.jitter=jitter
+        self.speed=speed
+        self.replayed=0
+        self.misses=0
+
+    def delay(self, interaction):
+        if self.latency == 'recorded':
+            seconds=interaction.get('seconds') or 0
+        else:
+            seconds=self.latency or 0
+        if self.jitter:
+            seconds+=random.uniform(0, self.jitter)
+        return seconds / (self.speed or 1)
+
+    def send(self, request, **kwargs):
+        recorded=record_request(request)
+        interaction=self.cassette.find(recorded)
+        if interaction is None:
+            self.misses+=1
+            raise CassetteMissError('No recorded response for {method} {url}'.format(**recorded), request=request)
+
+        seconds=self.delay(interaction)
+        if seconds > 0:
+            time.sleep(seconds)
+        self.replayed+=1
+        return self.build_response(request, interaction['response'])
+
+    def build_response(self, request, recorded):
+        response=Response()
+        response.status_code=recorded['status']
+        response.reason=recorded.get('reason')
+        response.headers=CaseInsensitiveDict(recorded.get('headers') or {})
+        response._content=decode_body(recorded.get('body'))
+        response._content_consumed=True
+        response.headers['Content-Length']=str(len(response._content))
+        response.encoding=get_encoding_from_headers(response.headers)
+        response.url=request.url
+        response.request=request
+        return response
+
+    def close(self):
+        pass
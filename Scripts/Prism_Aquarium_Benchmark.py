@@ -0,0 +1,529 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under proprietary license. See license file in the directory of this plugin for details.
+#
+# This file is part of Prism-Plugin-Aquarium.
+# It's created by Yann Moriaud, from Fatfish Lab
+# Contact support@fatfi.sh for any issue related to this plugin
+#
+# Prism-Plugin-Aquarium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+
+"""
+Benchmark of the plugin hot paths on generated projects served by a local fake Aquarium server.
+
+The plugin runs with a stubbed Prism core and project management plugin, so it
+needs the Python of Prism (qtpy and PrismUtils). The server is generated with a
+fixed seed in a child process: results of two runs are comparable.
+
+Usage::
+
+    python Prism_Aquarium_Benchmark.py --sizes 1k 10k 100k --repeat 3 --json before.json
+    python Prism_Aquarium_Benchmark.py --sizes 1k 10k 100k --repeat 3 --compare before.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+extModPath = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ExternalModules")
+if extModPath not in sys.path:
+    sys.path.append(extModPath)
+
+from aquarium.testing import count_items
+
+logger = logging.getLogger(__name__)
+
+
+RESULTS_VERSION = 1
+# Number of items of the generated projects: assets, shots and their tasks
+SIZES = {"1k": 1000, "10k": 10000, "100k": 100000}
+TASKS = 6
+USERS = 20
+SETTINGS = {
+    "aquarium_useSnapshot": False,
+    "aquarium_prefetch": False,
+    "aquarium_useUsername": False,
+}
+
+
+def parseSize(size):
+    if size in SIZES:
+        return SIZES[size]
+
+    return int(size)
+
+
+def projectShape(items, tasks=TASKS, users=USERS):
+    # Assets and shots (half each) giving about this number of items with their tasks
+    entities = max(2, (items - count_items(assets=0, shots=0, tasks=tasks, users=users, sequences=1)) // (1 + tasks))
+    return entities // 2, entities - entities // 2
+
+
+def serveProject(conn, items, seed=0, latency=0):
+    # Child process: the server doesn't share the GIL nor the traced memory of the plugin
+    from aquarium.testing import FakeAquarium, FakeServer, generate_project
+
+    fake = FakeAquarium()
+    assets, shots = projectShape(items)
+    project = generate_project(fake, assets=assets, shots=shots, tasks=TASKS, users=USERS, seed=seed)
+    with FakeServer(fake, latency=latency) as server:
+        conn.send({
+            "url": server.url,
+            "token": fake.token,
+            "projectKey": project["_key"],
+            "items": len(fake.items),
+            "assets": assets,
+            "shots": shots,
+        })
+        # Commands of the parent process, until None
+        while True:
+            command = conn.recv()
+            if command is None:
+                break
+            elif command == "hits":
+                conn.send(fake.hit_counts())
+            elif command == "reset":
+                fake.reset_hits()
+                conn.send(None)
+
+
+class ProjectServer(object):
+    """
+    Fake Aquarium server of a generated project, running in a child process.
+    """
+
+    def __init__(self, items, seed=0, latency=0):
+        context = multiprocessing.get_context("spawn")
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=serveProject, args=(child, items, seed, latency), name="AquariumFake")
+        self.process.daemon = True
+        self.info = None
+
+    def __enter__(self):
+        self.process.start()
+        self.info = self.conn.recv()
+        return self
+
+    def hitCounts(self):
+        self.conn.send("hits")
+        return self.conn.recv()
+
+    def resetHits(self):
+        self.conn.send("reset")
+        self.conn.recv()
+
+    def __exit__(self, *exc_info):
+        try:
+            self.conn.send(None)
+        except (IOError, OSError):
+            pass
+
+        self.process.join(10)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+class BenchmarkLabel(object):
+    def __init__(self, text):
+        self.text = text
+
+    def setText(self, text):
+        self.text = text
+
+
+class BenchmarkPopup(object):
+    # Stands in for core.waitPopup: no message until shown, like a hidden popup
+    def __init__(self, core, text, parent=None, hidden=False):
+        self.text = text
+        self.msg = None
+        if not hidden:
+            self.show()
+
+    def show(self):
+        if self.msg is None:
+            self.msg = BenchmarkLabel(self.text)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.msg = None
+
+
+class BenchmarkCore(object):
+    """
+    Stub of the Prism core used by the plugin: project settings, popups and error log.
+    """
+
+    waitPopup = BenchmarkPopup
+
+    def __init__(self, settings, prjMng):
+        self.settings = settings
+        self.prjMng = prjMng
+        self.popups = []
+        self.errors = []
+        self.media = None
+        self.entities = None
+
+    def getConfig(self, cat=None, param=None, config=None, dft=None):
+        return self.settings.get(param, dft)
+
+    def getPlugin(self, pluginName):
+        if pluginName == "ProjectManagement":
+            return self.prjMng
+
+    def registerCallback(self, *args, **kwargs):
+        pass
+
+    def popup(self, text, *args, **kwargs):
+        logger.debug("popup: %s" % text)
+        self.popups.append(text)
+
+    def popupQuestion(self, text, *args, **kwargs):
+        self.popup(text)
+
+    def openWebsite(self, url):
+        pass
+
+    def writeErrorLog(self, text, *args, **kwargs):
+        logger.warning(text)
+        self.errors.append(text)
+
+
+class BenchmarkProjectManagement(object):
+    """
+    Stub of the ProjectManagement plugin the Aquarium plugin registers to.
+    """
+
+    def __init__(self):
+        self.manager = None
+        self.authorization = {}
+
+    def registerManager(self, manager):
+        self.manager = manager
+
+    def unregisterManager(self, name):
+        self.manager = None
+
+    def ensureLoggedIn(self, quiet=False):
+        return self.manager is not None and self.manager.isLoggedIn()
+
+    def getAuthorization(self):
+        return dict(self.authorization)
+
+    def setAuthorization(self, data):
+        self.authorization.update(data)
+
+    def setLocalUsername(self):
+        pass
+
+    def openSetupDlg(self):
+        pass
+
+    def showPublishNonExistentTaskDlg(self, *args, **kwargs):
+        self.manager.core.popup("Publish on a task which doesn't exist")
+
+    def createUploadableMedia(self, paths, popup=None):
+        return paths[0]
+
+
+class RequestCounter(object):
+    # after_request hook of the client
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.bytes = 0
+
+    def __call__(self, event):
+        with self.lock:
+            self.requests += 1
+            self.bytes += (event.request_bytes or 0) + (event.response_bytes or 0)
+
+
+def createPlugin(url, token, projectKey, settings=None, email=None, password=None):
+    """
+    Log a plugin with stubbed core and project management in the fake server, with a token or an email and password.
+    """
+    from Prism_Aquarium_init import Prism_Aquarium
+
+    prjMng = BenchmarkProjectManagement()
+    core = BenchmarkCore(dict(SETTINGS, aquarium_projectKey=projectKey, **(settings or {})), prjMng)
+    plugin = Prism_Aquarium(core)
+    plugin.login({"url": url, "aquarium_token": token, "aquarium_email": email, "aquarium_password": password}, quiet=True)
+    if not plugin.isLoggedIn() or plugin.aqProject is None:
+        raise RuntimeError("Could not log in the fake Aquarium server %s" % url)
+
+    plugin.requestCounter = RequestCounter()
+    plugin.aq.add_hook("after_request", plugin.requestCounter)
+    return plugin
+
+
+def coldCache(plugin):
+    plugin.clearDbCache()
+
+
+def warmCache(plugin):
+    if plugin.aqAssets is None:
+        plugin.getAssets()
+    if plugin.aqShots is None:
+        plugin.getShots()
+
+
+def sampleEntities(plugin, samples):
+    # Same entities on each run: spread over the assets and the shots
+    warmCache(plugin)
+    entities = []
+    for aqEntities, getData in [
+        (plugin.aqAssets, lambda aqAsset: {"type": "asset", "asset_path": aqAsset["prismPath"]}),
+        (plugin.aqShots, plugin.getShotData),
+    ]:
+        count = max(1, samples // 2)
+        step = max(1, len(aqEntities) // count)
+        for aqEntity in aqEntities[::step][:count]:
+            entity = getData(aqEntity)
+            entity["tasks"] = [task["data"]["name"] for task in aqEntity["tasks"]]
+            entities.append(entity)
+
+    return entities
+
+
+class PluginBenchmark(object):
+    """
+    The hot paths measured, each with its cache state set up before the measure.
+    """
+
+    def __init__(self, plugin, samples=20, user="Artist 0"):
+        self.plugin = plugin
+        self.user = user
+        self.entities = sampleEntities(plugin, samples)
+        self.versions = 0
+        self.mediaPath = os.path.join(tempfile.mkdtemp(prefix="prism_aquarium_bench"), "preview.jpg")
+        with open(self.mediaPath, "wb") as f:
+            f.write(b"\xff\xd8\xff\xe0" + b"\x00" * 4096 + b"\xff\xd9")
+
+        self.cases = [
+            ("getAssets", coldCache, self.getAssets),
+            ("getShots", coldCache, self.getShots),
+            ("getSequences", coldCache, self.getSequences),
+            ("getTasksFromEntity", warmCache, self.getTasksFromEntity),
+            ("getTasksFromEntity (refresh)", warmCache, self.refreshTasksFromEntity),
+            ("getAssignedTasks", warmCache, self.getAssignedTasks),
+            ("getAssignedTasks (sync)", warmCache, self.syncAssignedTasks),
+            ("publishMedia", warmCache, self.publishMedia),
+        ]
+
+    def cleanup(self):
+        try:
+            os.remove(self.mediaPath)
+            os.rmdir(os.path.dirname(self.mediaPath))
+        except OSError:
+            pass
+
+    def getAssets(self):
+        return len(self.plugin.getAssets() or [])
+
+    def getShots(self):
+        return len(self.plugin.getShots() or [])
+
+    def getSequences(self):
+        return len(self.plugin.getSequences() or [])
+
+    def getTasksFromEntity(self):
+        return sum(len(self.plugin.getTasksFromEntity(entity) or []) for entity in self.entities)
+
+    def refreshTasksFromEntity(self):
+        return sum(len(self.plugin.getTasksFromEntity(entity, allowCache=False) or []) for entity in self.entities)
+
+    def getAssignedTasks(self):
+        return len(self.plugin.getAssignedTasks(user=self.user) or [])
+
+    def syncAssignedTasks(self):
+        return len(self.plugin.getAssignedTasks(user=self.user, allowCache=False) or [])
+
+    def publishMedia(self):
+        published = 0
+        for entity in self.entities[:5]:
+            self.versions += 1
+            version = "v%04d" % self.versions
+            if self.plugin.publishMedia([self.mediaPath], entity, entity["tasks"][0], version, description="benchmark"):
+                published += 1
+
+        return published
+
+    def measure(self, name, setup, fn, repeat=3):
+        """
+        Median wall time, then requests, bytes and peak memory of one more run traced by tracemalloc
+        """
+        # The plugin prints some of its results
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self._measure(name, setup, fn, repeat=repeat)
+
+    def _measure(self, name, setup, fn, repeat=3):
+        core = self.plugin.core
+        counter = self.plugin.requestCounter
+        seconds = []
+        for i in range(repeat):
+            setup(self.plugin)
+            counter.reset()
+            start = time.perf_counter()
+            rows = fn()
+            seconds.append(time.perf_counter() - start)
+
+        requests, transferred = counter.requests, counter.bytes
+
+        setup(self.plugin)
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        if core.errors:
+            errors, core.errors = core.errors, []
+            raise RuntimeError("%s failed:\n\n%s" % (name, errors[0]))
+
+        seconds.sort()
+        return {
+            "function": name,
+            "seconds": seconds[len(seconds) // 2],
+            "min_seconds": seconds[0],
+            "requests": requests,
+            "bytes": transferred,
+            "peak": peak,
+            "rows": rows,
+        }
+
+    def run(self, repeat=3, functions=None):
+        results = []
+        for name, setup, fn in self.cases:
+            if functions and name.split(" ")[0] not in functions:
+                continue
+
+            results.append(self.measure(name, setup, fn, repeat=repeat))
+            logger.info("%s: %.3fs" % (name, results[-1]["seconds"]))
+
+        return results
+
+
+def benchPlugin(sizes=("1k", "10k", "100k"), repeat=3, samples=20, latency=0, seed=0, functions=None):
+    """
+    Run the benchmark of the plugin on a generated project of each size.
+    """
+    results = []
+    for size in sizes:
+        items = parseSize(size)
+        with ProjectServer(items, seed=seed, latency=latency) as server:
+            plugin = createPlugin(server.info["url"], server.info["token"], server.info["projectKey"])
+            benchmark = PluginBenchmark(plugin, samples=samples)
+            try:
+                for result in benchmark.run(repeat=repeat, functions=functions):
+                    result.update(size=size, items=server.info["items"])
+                    results.append(result)
+            finally:
+                benchmark.cleanup()
+                plugin.worker.cancel()
+
+    return results
+
+
+def compareResults(results, baseline):
+    # Matched by project size and function
+    previous = dict(((result["size"], result["function"]), result) for result in baseline)
+    comparison = []
+    for result in results:
+        before = previous.get((result["size"], result["function"]))
+        if before is None:
+            continue
+
+        comparison.append({
+            "size": result["size"],
+            "function": result["function"],
+            "speedup": before["seconds"] / result["seconds"] if result["seconds"] else 0.0,
+            "requests": result["requests"] - before["requests"],
+            "bytes": result["bytes"] - before["bytes"],
+            "peak": result["peak"] - before["peak"],
+        })
+
+    return comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["1k", "10k", "100k"], help="Items of the projects: 1k, 10k, 100k or a number")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each function, the median is reported")
+    parser.add_argument("--samples", type=int, default=20, help="Entities given to the per entity functions")
+    parser.add_argument("--latency", type=float, default=0, help="Server latency in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--functions", nargs="+", default=None, help="Only benchmark these functions")
+    parser.add_argument("--json", default=None, help="Write the results to this file")
+    parser.add_argument("--compare", default=None, help="Results file of a previous run to compare with")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    results = benchPlugin(sizes=args.sizes, repeat=args.repeat, samples=args.samples, latency=args.latency,
+                          seed=args.seed, functions=args.functions)
+
+    print("{0:>6} {1:>7} {2:<30} {3:>10} {4:>9} {5:>10} {6:>9}".format(
+        "size", "items", "function", "ms", "requests", "MB", "peak MB"))
+    for result in results:
+        print("{size:>6} {items:>7} {function:<30} {ms:>10.1f} {requests:>9} {mb:>10.2f} {peak_mb:>9.1f}".format(
+            ms=result["seconds"] * 1000, mb=result["bytes"] / 1024.0 / 1024.0, peak_mb=result["peak"] / 1024.0 / 1024.0,
+            **result))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+        print("")
+        print("{0:>6} {1:<30} {2:>8} {3:>9} {4:>10} {5:>9}".format("size", "function", "speedup", "requests", "MB", "peak MB"))
+        for change in compareResults(results, baseline):
+            print("{size:>6} {function:<30} {speedup:>7.2f}x {requests:>+9} {mb:>+10.2f} {peak_mb:>+9.1f}".format(
+                mb=change["bytes"] / 1024.0 / 1024.0, peak_mb=change["peak"] / 1024.0 / 1024.0, **change))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "version": RESULTS_VERSION,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "seed": args.seed,
+                "repeat": args.repeat,
+                "samples": args.samples,
+                "latency": args.latency,
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under proprietary license. See license file in the directory of this plugin for details.
+#
+# This file is part of Prism-Plugin-Aquarium.
+# It's created by Yann Moriaud, from Fatfish Lab
+# Contact support@fatfi.sh for any issue related to this plugin
+#
+# Prism-Plugin-Aquarium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+import json
+import threading
+import time
+
+
+def freeze(value):
+    # Canonical form of plain data: equal arguments give the same key, whatever
+    # the order of their dict keys. None for the arguments which aren't plain
+    # data, like objects: their requests are not cached
+    try:
+        return json.dumps(value, sort_keys=True, separators=(',', ':'), allow_nan=False)
+    except (TypeError, ValueError):
+        return None
+
+
+class DbCacheEntry(object):
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.loading = False
+        self.generation = 0
+        self.hasValue = False
+        self.value = None
+        self.error = None
+        self.timestamp = 0
+
+    def isFresh(self, ttl):
+        if not self.hasValue or ttl == 0:
+            return False
+        if ttl is None or ttl < 0:
+            return True
+        return (time.time() - self.timestamp) < ttl
+
+    def isExpired(self, ttl):
+        # Nothing loading and no value worth keeping
+        return not self.loading and not self.isFresh(ttl)
+
+
+class DbCache(object):
+    """
+    Thread-safe cache of Aquarium requests, keyed on (method, args).
+
+    Identical requests running at the same time share a single call: the
+    first caller loads the value, the others wait on the entry condition
+    and are woken up as soon as the result (or the error) is available.
+
+    ttl: -1 never invalidates, 0 disables the cache, otherwise seconds.
+    Only requests whose args are plain data (JSON) are cached, the others
+    always call their loader.
+    None results are not cached: the loaders return None when they fail or
+    are cancelled. Expired entries are dropped, and the least recently
+    stored ones once there are more than maxEntries.
+    """
+
+    def __init__(self, ttl=-1, maxEntries=256):
+        self.ttl = ttl
+        self.maxEntries = maxEntries
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    @staticmethod
+    def makeKey(method, args=None):
+        # None when the args can't be part of a key
+        frozen = freeze(args or [])
+        if frozen is None:
+            return None
+
+        return (method, frozen)
+
+    def getEntry(self, method, args=None):
+        key = self.makeKey(method, args)
+        if key is None:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.prune()
+                entry = self._entries[key] = DbCacheEntry()
+
+            return entry
+
+    def prune(self):
+        # Called with self._lock held
+        ttl = self.ttl
+        self._entries = dict((key, entry) for key, entry in self._entries.items() if not entry.isExpired(ttl))
+
+        overflow = len(self._entries) - self.maxEntries + 1
+        if overflow > 0:
+            idle = [(key, entry) for key, entry in self._entries.items() if not entry.loading]
+            idle.sort(key=lambda pair: pair[1].timestamp)
+            for key, _ in idle[:overflow]:
+                del self._entries[key]
+
+    def peek(self, method, args=None):
+        # (True, value) for a fresh value, without loading nor waiting
+        key = self.makeKey(method, args)
+        if key is None:
+            return False, None
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is None:
+            return False, None
+
+        with entry.condition:
+            if entry.loading or not entry.isFresh(self.ttl):
+                return False, None
+
+            return True, entry.value
+
+    def set(self, method, args, value):
+        # Store a value loaded elsewhere, like a snapshot or a delta sync
+        if value is None:
+            self.invalidate(method, args)
+            return
+
+        entry = self.getEntry(method, args)
+        if entry is None:
+            return
+
+        with entry.condition:
+            entry.error = None
+            entry.hasValue = True
+            entry.value = value
+            entry.timestamp = time.time()
+
+    def get(self, method, args, loader, allowCache=True):
+        ttl = self.ttl
+        entry = self.getEntry(method, args)
+        if entry is None:
+            return loader()
+
+        with entry.condition:
+            if entry.loading:
+                generation = entry.generation
+                while entry.loading and entry.generation == generation:
+                    entry.condition.wait()
+
+                if entry.error is not None:
+                    raise entry.error
+
+                return entry.value
+
+            if allowCache and entry.isFresh(ttl):
+                return entry.value
+
+            entry.loading = True
+
+        try:
+            value = loader()
+        except Exception as e:
+            with entry.condition:
+                entry.loading = False
+                entry.error = e
+                entry.generation += 1
+                entry.condition.notify_all()
+            raise
+
+        with entry.condition:
+            entry.loading = False
+            entry.error = None
+            entry.hasValue = value is not None
+            entry.value = value
+            entry.timestamp = time.time()
+            entry.generation += 1
+            entry.condition.notify_all()
+
+        return value
+
+    def invalidate(self, method, args=None):
+        key = self.makeKey(method, args)
+        if key is None:
+            return
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
@@ -25,14 +25,12 @@
 # MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
 
 
+import atexit
 import importlib
-import tempfile
 import logging
 import os
 import sys
 import time
-
-import sys
 if sys.version_info[0] > 2:
     from urllib.parse import urljoin
 else:
@@ -40,7 +38,11 @@ else:
 
 
 from Prism_Aquarium_Utils import baseUrl, hexToRgb
-from PrismUtils.Decorators import err_catcher_plugin as err_catcher
+from Prism_Aquarium_Cache import DbCache
+from Prism_Aquarium_Index import mergeEntities
+from Prism_Aquarium_Snapshot import ProjectSnapshot, entityToDict
+from Prism_Aquarium_Thumbnails import ThumbnailCache, ThumbnailLoader
+from Prism_Aquarium_Worker import AquariumWorker, err_catcher, isMainThread, reportProgress
 from qtpy.QtCore import *
 from qtpy.QtGui import *
 from qtpy.QtWidgets import *
@@ -60,8 +62,11 @@ class Prism_Aquarium_Functions(object):
 
             self.name = "Aquarium"
 
-            self.dbCache = {}
-            self.requestInProgress = False
+            self.dbCache = DbCache()
+            self.thumbnailCache = ThumbnailCache()
+            self.worker = AquariumWorker()
+            self.thumbnailLoader = ThumbnailLoader(self.thumbnailCache, lambda fn: self.worker.submit(None, fn))
+            self.prefetchTimings = {}
 
             self.requiresLogin = True
             self.hasRemoteDatabase = True
@@ -134,28 +139,55 @@ class Prism_Aquarium_Functions(object):
         data = self.prjMng.getAuthorization() or {}
         return data.get("aquarium_email")
 
+    def downloadThumbnail(self, url):
+        # Runs in a worker thread: the errors are logged by the thumbnail loader
+        return self.aq.do_request('GET', url, decoding=False).content
+
     @err_catcher(name=__name__)
-    def getThumbnail(self, entity):
+    def getThumbnail(self, entity, callback=None, visible=True):
+        # Never downloads in the main thread: returns the pixmap if it is in memory or on
+        # disk, otherwise None as placeholder and the download is queued in the worker.
+        # callback(pixmap) is then called in the main thread once it is downloaded. Without
+        # callback, the thumbnail is there the next time the view asks for it.
         if entity.get('thumbnail', None) is None:
             return None
 
-        temp_dir = tempfile.gettempdir()
-
-        thumbnail_url = entity['thumbnail']
-        base_name = os.path.basename(thumbnail_url)
-        name, extension = os.path.splitext(base_name)
+        self.thumbnailCache.maxBytes = self.getThumbnailCacheSize() * 1024 * 1024
+        url = entity['thumbnail']
+        key = self.thumbnailCache.getKey(self.aq.api_url, url)
+        path = self.thumbnailCache.getCachedFile(self.aq.api_url, url)
+        pixmap = self.thumbnailCache.loadPixmap(key, path, self.core.media.getPixmapFromPath)
+        if pixmap is not None:
+            return pixmap
+
+        priority = ThumbnailLoader.VISIBLE if visible else ThumbnailLoader.OFFSCREEN
+        onDownloaded = lambda key, path: self.worker.invoker.invoke(self.onThumbnailLoaded, key, path, callback)
+        self.thumbnailLoader.request(self.aq.api_url, url, self.downloadThumbnail, onDownloaded, priority=priority)
+        return None
 
-        thumbnail_path = os.path.join(temp_dir, 'prism_aquarium', name + extension)
+    @err_catcher(name=__name__)
+    def onThumbnailLoaded(self, key, path, callback):
+        # Main thread: decodes the downloaded file, never downloads it again
+        pixmap = self.thumbnailCache.loadPixmap(key, path, self.core.media.getPixmapFromPath)
+        if callback is not None:
+            callback(pixmap)
 
-        if os.path.exists(thumbnail_path) == False:
-            thumbnail = self.aq.do_request('GET', entity["thumbnail"], decoding=False)
+    @err_catcher(name=__name__)
+    def setVisibleThumbnails(self, entities, cancelOthers=True):
+        # The thumbnails of the visible entities are downloaded first, the others are cancelled or delayed
+        keys = [self.thumbnailCache.getKey(self.aq.api_url, entity['thumbnail']) for entity in entities if entity.get('thumbnail')]
+        self.thumbnailLoader.prioritize(keys, cancelOthers=cancelOthers)
 
-            os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
-            with open(thumbnail_path, 'wb') as f:
-                f.write(thumbnail.content)
-                f.close()
+    @err_catcher(name=__name__)
+    def cancelThumbnails(self, entities=None):
+        # Cancel the pending thumbnails of entities, or all of them
+        if entities is None:
+            self.thumbnailLoader.cancelAll()
+            return
 
-        return self.core.media.getPixmapFromPath(thumbnail_path)
+        for entity in entities:
+            if entity.get('thumbnail'):
+                self.thumbnailLoader.cancel(self.thumbnailCache.getKey(self.aq.api_url, entity['thumbnail']))
 
     @err_catcher(name=__name__)
     def getAllUsernames(self):
@@ -163,32 +195,22 @@ class Prism_Aquarium_Functions(object):
         if projectId is None:
             return
 
-        if self.aqUsers is None:
-
-            participants = self.aq.project(projectId).get_permissions(includeMembers=True)
-            users = [participant.user for participant in participants if participant.user.type == 'User']
-            members = [participant.members for participant in participants if participant.user.type != 'User']
-
-            findUser = lambda memberKey: [user for user in users if user._key == memberKey]
-            for usergroupMembers in members:
-                for member in usergroupMembers:
-                    existingUser = next(filter(findUser, member._key), None)
-                    if existingUser is None:
-                        users.append(member)
-
-            self.aqUsers = users
+        aqUsers = self.makeDbRequest('getAqProjectUsers', projectId)
+        if aqUsers is not None:
+            self.aqUsers = aqUsers
 
-        return [user.data.name for user in self.aqUsers]
+        return [user.data.name for user in self.aqUsers or []]
 
     @err_catcher(name=__name__)
     def getDefaultStatus(self):
         # TODO: Improve products, media and tasks statuses
         statuses = []
 
-        if (self.aqStatuses == None):
-            self.aqStatuses = self.getAqProjectStatuses()
+        aqStatuses = self.makeDbRequest('getAqProjectStatuses')
+        if aqStatuses is not None:
+            self.aqStatuses = aqStatuses
 
-        for aqStatus in self.aqStatuses:
+        for aqStatus in self.aqStatuses or []:
             status = {
                 "name": aqStatus['status'],
                 "abbreviation": aqStatus['status'],
@@ -221,7 +243,12 @@ class Prism_Aquarium_Functions(object):
             # {"name": "aquarium_syncEntityConnections", "label": "Auto Sync Asset-Shot connections", "type": "QCheckBox", "default": False},
             # {"name": "aquarium_shortDeps", "label": "Use short department names", "type": "QCheckBox", "default": False},
             # {"name": "aquarium_syncDepsNow", "label": "Sync Departments", "tooltip": "Queries the existing departments in Aquarium and creates the same departments in the Prism project.", "type": "QPushButton", "callback": self.prjMng.syncDepartments},
-            # {"name": "aquarium_cacheInvalidation", "label": "Cache invalidation (sec)", "type": "QSpinBox", "default": -1, "tooltip": "The amount of seconds after which a cached request to the remote database gets invalidated. The next identical request will be send to the database instead of using a cached value.\n-1 means there will be no cache invalidation.\n0 means no cache will be used."},
+            {"name": "aquarium_prefetch", "label": "Prefetch project at login", "type": "QCheckBox", "default": True, "tooltip": "Load the assets, shots, statuses and users of the Aquarium project in the background right after login."},
+            {"name": "aquarium_useSnapshot", "label": "Use local project snapshot", "type": "QCheckBox", "default": True, "tooltip": "Store the Aquarium project locally to start Prism with the last known data while fresh data is loaded in the background."},
+            {"name": "aquarium_pageSize", "label": "Page size", "type": "QSpinBox", "default": 500, "tooltip": "The number of assets or shots requested per page when loading the project from Aquarium."},
+            {"name": "aquarium_pageParallelism", "label": "Parallel pages", "type": "QSpinBox", "default": 4, "tooltip": "The number of pages requested at the same time when loading the project from Aquarium."},
+            {"name": "aquarium_thumbnailCacheSize", "label": "Thumbnail cache size (MB)", "type": "QSpinBox", "default": 500, "tooltip": "The maximum size of the thumbnails downloaded from Aquarium on disk. The least recently used thumbnails are removed first."},
+            {"name": "aquarium_cacheInvalidation", "label": "Cache invalidation (sec)", "type": "QSpinBox", "default": -1, "tooltip": "The amount of seconds after which a cached request to the remote database gets invalidated. The next identical request will be send to the database instead of using a cached value.\n-1 means there will be no cache invalidation.\n0 means no cache will be used."},
             # {"name": "aquarium_status", "label": "Available Status", "type": "status", "default": dftStatus},
         ]
         return data
@@ -315,54 +342,102 @@ class Prism_Aquarium_Functions(object):
         return self.core.getConfig("prjManagement", "aquarium_shortDeps", config="project", dft=False)
 
     @err_catcher(name=__name__)
-    def makeDbRequest(self, method, args=None, popup=None, allowCache=True):
-        # FIXME: Improve function based on Aquarium requirements
+    def getPrefetchProjectData(self):
+        return self.core.getConfig("prjManagement", "aquarium_prefetch", config="project", dft=True)
+
+    @err_catcher(name=__name__)
+    def getUseProjectSnapshot(self):
+        return self.core.getConfig("prjManagement", "aquarium_useSnapshot", config="project", dft=True)
+
+    @err_catcher(name=__name__)
+    def getPageSize(self):
+        return self.core.getConfig("prjManagement", "aquarium_pageSize", config="project", dft=500) or 500
+
+    @err_catcher(name=__name__)
+    def getPageParallelism(self):
+        return self.core.getConfig("prjManagement", "aquarium_pageParallelism", config="project", dft=4) or 4
+
+    @err_catcher(name=__name__)
+    def getThumbnailCacheSize(self):
+        return self.core.getConfig("prjManagement", "aquarium_thumbnailCacheSize", config="project", dft=500) or 500
+
+    @err_catcher(name=__name__)
+    def getCacheInvalidation(self):
+        value = self.core.getConfig("prjManagement", "aquarium_cacheInvalidation", config="project", dft=-1)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return -1
+
+    def getDbRequest(self, method, args=None):
+        # method is a loader of the plugin (loadAqAssets, getAqProjectStatuses...) or a method of the Aquarium client.
+        # Returns the worker task name, which is the cache key, and the cached call.
         if not isinstance(args, list):
             if args:
                 args = [args]
             else:
                 args = []
 
-        if method not in self.dbCache:
-            self.dbCache[method] = []
+        fn = getattr(self, method, None) or getattr(self.aq, method)
+        self.dbCache.ttl = self.getCacheInvalidation()
 
-        if allowCache:
-            for request in self.dbCache[method]:
-                if request["args"] == args:
-                    return request["result"]
-        else:
-            self.dbCache[method] = [r for r in self.dbCache[method] if r["args"] != args]
+        def request():
+            logger.debug("make request: %s, %s" % (method, args))
+            return fn(*args)
 
-        if self.requestInProgress:
-            while self.requestInProgress:
-                time.sleep(0.1)
+        def load(allowCache=True):
+            return self.dbCache.get(method, args, request, allowCache=allowCache)
 
-            return self.makeDbRequest(method, args=args, popup=popup, allowCache=allowCache)
+        return self.dbCache.makeKey(method, args), args, load
+
+    @err_catcher(name=__name__)
+    def makeDbRequest(self, method, args=None, popup=None, allowCache=True):
+        # A fresh cached value is returned right away, otherwise the request runs on the worker
+        # and identical requests share the same call
+        name, args, load = self.getDbRequest(method, args)
+        if allowCache:
+            cached, value = self.dbCache.peek(method, args)
+            if cached:
+                return value
 
-        self.requestInProgress = True
-        logger.debug("make request: %s, %s" % (method, args))
         if popup and not popup.msg:
             popup.show()
 
         try:
-            result = getattr(self.aq, method)(*args)
+            return self.runInBackground(name, load, allowCache=allowCache, popup=popup)
         except Exception as e:
-            self.requestInProgress = False
             logger.debug(method)
             logger.debug(args)
             msg = "Could not request Aquarium data:\n\n%s" % e
             self.core.popup(msg)
             return
 
-        data = {"args": args, "result": result}
-        self.dbCache[method].append(data)
-        self.requestInProgress = False
-        return result
+    @err_catcher(name=__name__)
+    def submitDbRequest(self, method, args=None, allowCache=True, onFinished=None):
+        # Same as makeDbRequest without waiting: onFinished(task) is called in the main thread
+        name, args, load = self.getDbRequest(method, args)
+        return self.worker.submit(name, load, allowCache=allowCache, onFinished=onFinished)
+
+    @err_catcher(name=__name__)
+    def runInBackground(self, name, fn, *args, **kwargs):
+        # Run fn in the worker pool while the Qt event loop keeps running.
+        # Tasks with the same name share the running request.
+        popup = kwargs.pop('popup', None)
+        if popup is not None:
+            kwargs['onProgress'] = lambda message: self.setPopupText(popup, message)
+
+        return self.worker.run(name, fn, *args, **kwargs)
+
+    @err_catcher(name=__name__)
+    def setPopupText(self, popup, text):
+        if popup.msg:
+            popup.msg.setText(text)
 
     @err_catcher(name=__name__)
     def clearDbCache(self):
         # QUESTION: When changing projects, does this function is called ?
-        self.dbCache = {}
+        self.worker.cancel()
+        self.dbCache.clear()
         # self.aqProject = None
         self.aqShots = None
         self.aqAssets = None
@@ -376,7 +451,7 @@ class Prism_Aquarium_Functions(object):
 
         try:
             if self.aqUser is None and self.aq.token is not None:
-                self.aqUser = self.aq.me()
+                self.aqUser = self.runInBackground(None, self.aq.me)
         except Exception:
             self.aq.token = None
             pass
@@ -404,10 +479,11 @@ class Prism_Aquarium_Functions(object):
 
         url = url.strip("\\/")
         self.aq = self.aq_api.Aquarium(api_url=url, token=token)
+        self.startQueryProfiler()
 
         if email and password:
             try:
-                self.aq.connect(email, password)
+                self.runInBackground(None, self.aq.connect, email, password)
                 self.prjMng.setAuthorization({"aquarium_token": self.aq.token, "aquarium_password": None})
             except:
                 pass
@@ -421,7 +497,9 @@ class Prism_Aquarium_Functions(object):
         if self.isLoggedIn():
             logger.debug("logged in into Aquarium")
             self.clearDbCache()
-            self.aqProject = self.getCurrentProject()
+            if not self.restoreProjectSnapshot():
+                self.aqProject = self.getCurrentProject()
+            self.prefetchProjectData()
             if self.getUseAqUsername():
                 self.prjMng.setLocalUsername()
         else:
@@ -433,12 +511,202 @@ class Prism_Aquarium_Functions(object):
                 self.core.popup(msg)
                 return
 
+    @err_catcher(name=__name__)
+    def startQueryProfiler(self):
+        # Set PRISM_AQUARIUM_PROFILE to a .json or .txt path to get a report of
+        # the slowest meshql queries when Prism exits.
+        path = os.getenv("PRISM_AQUARIUM_PROFILE")
+        if not path:
+            return
+
+        if getattr(self, "queryProfiler", None) is None:
+            profiler = importlib.import_module("aquarium.profiler")
+            self.queryProfiler = profiler.MeshQLProfiler(self.aq)
+            atexit.register(lambda: self.queryProfiler.dump(path, top=20))
+        else:
+            self.queryProfiler.stop()
+            self.queryProfiler.aquarium = self.aq
+
+        self.queryProfiler.start()
+        logger.debug("profiling Aquarium queries to %s" % path)
+
+    @err_catcher(name=__name__)
+    def prefetchProjectData(self):
+        # Fire the independent project queries concurrently on the worker pool.
+        # The tasks are named like the lazy loaders, so a view opened before
+        # the prefetch is done waits for it instead of sending the query again.
+        if not self.aqProject or not self.getPrefetchProjectData():
+            return []
+
+        projectKey = self.aqProject._key
+        loaders = []
+        if self.aqAssets is None:
+            loaders.append(('assets', 'loadAqAssets', [], 'aqAssets'))
+        if self.aqShots is None:
+            loaders.append(('shots', 'loadAqShots', [], 'aqShots'))
+        if self.aqStatuses is None:
+            loaders.append(('statuses', 'getAqProjectStatuses', [], 'aqStatuses'))
+        if self.aqUsers is None:
+            loaders.append(('users', 'getAqProjectUsers', [projectKey], 'aqUsers'))
+
+        self.prefetchTimings = {}
+        if not loaders:
+            return []
+
+        start = time.time()
+        pending = set(name for name, _, _, _ in loaders)
+
+        def onFinished(name, attr, task):
+            # Called in the main thread
+            self.prefetchTimings[name] = time.time() - start
+            pending.discard(name)
+            if task.error is not None:
+                logger.warning("Could not prefetch Aquarium %s:\n\n%s" % (name, task.error))
+            elif attr and task.result is not None and getattr(self, attr) is None \
+                    and self.aqProject and self.aqProject._key == projectKey:
+                setattr(self, attr, task.result)
+
+            if not pending:
+                self.saveProjectSnapshot()
+                self.prefetchTimings['total'] = time.time() - start
+                logger.debug("prefetched Aquarium project %s: %s" % (projectKey, ", ".join(
+                    "%s %.2fs" % (key, value) for key, value in sorted(self.prefetchTimings.items())
+                )))
+
+        tasks = []
+        for name, method, args, attr in loaders:
+            tasks.append(self.submitDbRequest(
+                method, args,
+                onFinished=lambda task, name=name, attr=attr: onFinished(name, attr, task)
+            ))
+
+        return tasks
+
+    @err_catcher(name=__name__)
+    def getPrefetchTimings(self):
+        # Seconds from the start of the last login prefetch to the end of each query, and in total
+        return dict(self.prefetchTimings)
+
+    @err_catcher(name=__name__)
+    def getProjectSnapshot(self, projectKey=None):
+        if not self.aq or not self.aqUser or not self.getUseProjectSnapshot():
+            return None
+
+        projectKey = projectKey or self.core.getConfig("prjManagement", "aquarium_projectKey", config="project")
+        if not projectKey:
+            return None
+
+        return ProjectSnapshot(self.aq.api_url, projectKey, self.aqUser._key)
+
+    @err_catcher(name=__name__)
+    def restoreProjectSnapshot(self):
+        # Serve the last known project right away, then revalidate it in the background
+        snapshot = self.getProjectSnapshot()
+        if snapshot is None:
+            return False
+
+        data = snapshot.load()
+        if data is None or data.get('project') is None:
+            return False
+
+        aqProject = self.aq.cast(data['project'])
+        aqProject.prism = data.get('prism')
+        self.aqProject = aqProject
+        self.aqAssets = data.get('assets')
+        self.aqShots = data.get('shots')
+        self.aqStatuses = data.get('statuses')
+        if data.get('users') is not None:
+            self.aqUsers = [self.aq.cast(user) for user in data['users']]
+        self.setDbCacheFromProject()
+
+        logger.debug("restored Aquarium project %s from snapshot" % snapshot.projectKey)
+        self.revalidateProjectSnapshot(snapshot)
+        return True
+
+    @err_catcher(name=__name__)
+    def isProjectLoading(self):
+        return any(self.worker.isRunning(self.dbCache.makeKey(method)) for method in ('loadAqAssets', 'loadAqShots'))
+
+    @err_catcher(name=__name__)
+    def saveProjectSnapshot(self):
+        # Written in the main thread, which owns the project data, and not while a list is
+        # loading: the end of the load saves the whole project
+        if not isMainThread():
+            self.worker.invoker.invoke(self.saveProjectSnapshot)
+            return False
+
+        if not self.aqProject or self.isProjectLoading():
+            return False
+
+        snapshot = self.getProjectSnapshot(self.aqProject._key)
+        if snapshot is None:
+            return False
+
+        data = {
+            "project": entityToDict(self.aqProject),
+            "prism": self.aqProject.prism,
+            "assets": self.aqAssets,
+            "shots": self.aqShots,
+            "statuses": self.aqStatuses,
+            "users": [entityToDict(user) for user in self.aqUsers] if self.aqUsers is not None else None,
+        }
+        return snapshot.save(data)
+
+    @err_catcher(name=__name__)
+    def setDbCacheFromProject(self):
+        # The project data loaded without makeDbRequest (snapshot, revalidation, sync) is what the loaders would return
+        if not self.aqProject:
+            return
+
+        self.dbCache.ttl = self.getCacheInvalidation()
+        self.dbCache.set('getAqProject', [self.aqProject._key], self.aqProject)
+        self.dbCache.set('loadAqAssets', [], self.aqAssets)
+        self.dbCache.set('loadAqShots', [], self.aqShots)
+        self.dbCache.set('getAqProjectStatuses', [], self.aqStatuses)
+        self.dbCache.set('getAqProjectUsers', [self.aqProject._key], self.aqUsers)
+
+    def revalidateProjectSnapshot(self, snapshot):
+        def revalidate():
+            aqProject = self.getAqProject(snapshot.projectKey)
+            if aqProject is None:
+                return None
+
+            return dict(
+                project=aqProject,
+                assets=self.getAqProjectAssets(project=aqProject),
+                shots=self.getAqProjectShots(project=aqProject),
+                statuses=self.getAqProjectStatuses(project=aqProject),
+                users=self.getAqProjectUsers(snapshot.projectKey),
+            )
+
+        def swap(task):
+            # Called in the main thread
+            if task.error is not None:
+                logger.warning("Could not revalidate Aquarium snapshot:\n\n%s" % task.error)
+                return
+
+            data = task.result
+            if not data or not self.aqProject or self.aqProject._key != snapshot.projectKey:
+                return
+
+            self.aqProject = data['project']
+            if data['assets'] is not None: self.aqAssets = data['assets']
+            if data['shots'] is not None: self.aqShots = data['shots']
+            if data['statuses'] is not None: self.aqStatuses = data['statuses']
+            if data['users'] is not None: self.aqUsers = data['users']
+            self.setDbCacheFromProject()
+
+            logger.debug("revalidated Aquarium project %s" % snapshot.projectKey)
+            self.saveProjectSnapshot()
+
+        return self.worker.submit('snapshot', revalidate, onFinished=swap)
+
     @err_catcher(name=__name__)
     def getUsername(self):
         username = None
         if self.aq:
             try:
-                user = self.aq.me()
+                user = self.runInBackground(None, self.aq.me)
                 if not user:
                     return
                 username = user.data.name
@@ -455,7 +723,7 @@ class Prism_Aquarium_Functions(object):
             if not self.prjMng.ensureLoggedIn():
                 return
 
-            aqProjects = self.getAqProjects()
+            aqProjects = self.makeDbRequest('getAqProjects', popup=popup) or []
             projects = []
             for project in aqProjects:
                 projects.append(project)
@@ -474,7 +742,7 @@ class Prism_Aquarium_Functions(object):
             if (projectKey):
                 if self.aqProject and self.aqProject._key == projectKey: return self.aqProject
                 else:
-                    return self.getAqProject(projectKey)
+                    return self.makeDbRequest('getAqProject', projectKey, popup=popup)
             else:
                 return None
 
@@ -581,11 +849,10 @@ class Prism_Aquarium_Functions(object):
             if path:
                 path = path.replace("\\", "/")
 
-            aqAssets = self.aqAssets
-            if (aqAssets is None):
-                aqAssets = self.getAqProjectAssets()
+            if self.setProjectData('aqAssets', self.makeDbRequest('loadAqAssets', popup=popup)):
+                self.saveProjectSnapshot()
 
-            for aqAsset in aqAssets:
+            for aqAsset in self.aqAssets or []:
                 if path and not aqAsset['prismPath'].startswith(path):
                     continue
 
@@ -598,11 +865,84 @@ class Prism_Aquarium_Functions(object):
                 }
                 assets.append(assetData)
 
-            if not path:
-                self.aqAssets = aqAssets
-
             return assets
 
+    @err_catcher(name=__name__)
+    def loadAqAssets(self):
+        # Runs in a worker: the list is swapped in by the main thread with setProjectData
+        loaded = []
+
+        def onPage(assets):
+            loaded.extend(assets)
+            reportProgress("Querying assets - %s loaded..." % len(loaded))
+
+        return self.getAqProjectAssets(onPage=onPage)
+
+    @err_catcher(name=__name__)
+    def setProjectData(self, attr, value):
+        # Main thread only: the workers return the project data and never change the plugin state,
+        # the lists and their index are replaced here
+        if value is None or getattr(self, attr) is value:
+            return False
+
+        setattr(self, attr, value)
+        return True
+
+    @err_catcher(name=__name__)
+    def syncAqEntities(self):
+        # Only fetch the assets and shots (or their tasks) updated since the last sync
+        if self.aqProject is None or (self.aqAssets is None and self.aqShots is None):
+            return False
+
+        assetsSince = self.aqIndex.assetsUpdatedAt if self.aqAssets is not None else None
+        shotsSince = self.aqIndex.shotsUpdatedAt if self.aqShots is not None else None
+        if (self.aqAssets is not None and not assetsSince) or (self.aqShots is not None and not shotsSince):
+            return False
+
+        changes = self.runInBackground('sync', self.getAqEntityChanges, assetsSince, shotsSince)
+        if changes is None:
+            return False
+
+        if self.aqAssets is not None and changes['assets'] is not None:
+            self.aqAssets = mergeEntities(self.aqAssets, changes['assets'], changes['trashedKeys'])
+        if self.aqShots is not None and changes['shots'] is not None:
+            self.aqShots = mergeEntities(self.aqShots, changes['shots'], changes['trashedKeys'])
+
+        logger.debug("synced Aquarium entities updated since %s / %s" % (assetsSince, shotsSince))
+        self.setDbCacheFromProject()
+        self.saveProjectSnapshot()
+        return True
+
+    @err_catcher(name=__name__)
+    def getAqEntityChanges(self, assetsSince=None, shotsSince=None):
+        # Runs in a worker: the changes are merged by the main thread
+        # Only the items trashed since the last sync, from the oldest watermark when
+        # the assets and the shots share the same location
+        startpoints = {}
+        for startpoint, since in ((self.getAssetsLocation(), assetsSince), (self.getShotsLocation(), shotsSince)):
+            if since:
+                startpoints[startpoint] = min(since, startpoints.get(startpoint) or since)
+
+        trashedKeys = []
+        for startpoint, since in startpoints.items():
+            keys = self.getAqTrashedKeys(startpoint, since=since)
+            if keys is None:
+                return None
+            trashedKeys.extend(keys)
+
+        changes = dict(assets=None, shots=None, trashedKeys=trashedKeys)
+        if assetsSince:
+            changes['assets'] = self.getAqProjectAssets(since=assetsSince)
+            if changes['assets'] is None:
+                return None
+
+        if shotsSince:
+            changes['shots'] = self.getAqProjectShots(since=shotsSince)
+            if changes['shots'] is None:
+                return None
+
+        return changes
+
     @err_catcher(name=__name__)
     def getAssetId(self, entity, prjId=None):
         # QUESTION: What's the goal of that function ?
@@ -642,22 +982,11 @@ class Prism_Aquarium_Functions(object):
 
             shots = []
 
-            aqShots = self.aqShots
-            if (aqShots is None):
-                aqShots = self.getAqProjectShots()
-                self.aqShots = aqShots
-
-            for aqShot in aqShots:
-                shotData = {
-                    "type": "shot",
-                    "id": aqShot['item']['_key'],
-                    "shot": aqShot['item']['data'].get('name', ''),
-                    "sequence": aqShot['sequence'],
-                    "start": aqShot['item']['data'].get('frameIn'),
-                    "end": aqShot['item']['data'].get('frameOut'),
-                    "description": aqShot['item']['data'].get('description'),
-                    "thumbnail": aqShot['thumbnail']
-                }
+            if self.setProjectData('aqShots', self.makeDbRequest('loadAqShots', popup=popup)):
+                self.saveProjectSnapshot()
+
+            for aqShot in self.aqShots or []:
+                shotData = self.getShotData(aqShot)
 
                 # FIXME: Do not file the list of shots, change the query for faster results
                 if (sequence and sequence != shotData["sequence"]):
@@ -667,15 +996,40 @@ class Prism_Aquarium_Functions(object):
 
             return shots
 
+    @err_catcher(name=__name__)
+    def loadAqShots(self):
+        # Runs in a worker: the list is swapped in by the main thread with setProjectData
+        loaded = []
+
+        def onPage(shots):
+            loaded.extend(shots)
+            reportProgress("Querying shots - %s loaded..." % len(loaded))
+
+        return self.getAqProjectShots(onPage=onPage)
+
+    @err_catcher(name=__name__)
+    def getShotData(self, aqShot):
+        return {
+            "type": "shot",
+            "id": aqShot['item']['_key'],
+            "shot": aqShot['item']['data'].get('name', ''),
+            "sequence": aqShot['sequence'],
+            "start": aqShot['item']['data'].get('frameIn'),
+            "end": aqShot['item']['data'].get('frameOut'),
+            "description": aqShot['item']['data'].get('description'),
+            "thumbnail": aqShot['thumbnail']
+        }
+
     @err_catcher(name=__name__)
     def getShotByEntity(self, entity):
-        shots = self.getShots()
-        if shots is None:
-            return
+        if self.aqShots is None:
+            shots = self.getShots()
+            if shots is None:
+                return
 
-        for shot in shots:
-            if shot["sequence"] == entity["sequence"] and shot["shot"] == entity["shot"]:
-                return shot
+        aqShot = self.findShotBySequenceAndName(entity["sequence"], entity["shot"])
+        if aqShot is not None:
+            return self.getShotData(aqShot)
 
         msg = 'Could not find shot "%s" in Aquarium.' % self.core.entities.getShotName(entity)
         self.core.popup(msg)
@@ -719,16 +1073,25 @@ class Prism_Aquarium_Functions(object):
         popup = self.core.waitPopup(self.core, text, parent=parent, hidden=True)
 
         if (allowCache == False):
-            self.clearDbCache()
-            self.getAssets()
-            self.getShots()
+            aqEntity = None
+            if (entity["type"] == 'asset'):
+                aqEntity = self.findAssetByPath(entity.get("asset_path", ""))
+            elif (entity["type"] == 'shot'):
+                aqEntity = self.findShotBySequenceAndName(entity.get("sequence", ""), entity.get("shot", ""))
+
+            if aqEntity is not None:
+                self.refreshAqEntityTasks(aqEntity)
+            elif not self.syncAqEntities():
+                self.clearDbCache()
+                self.getAssets()
+                self.getShots()
 
         with popup:
             tasks = []
             if (entity["type"] == 'asset'):
-                aqEntities = [aqAsset for aqAsset in self.aqAssets if aqAsset['prismPath'] == entity.get("asset_path", "").replace("\\", "/")]
-                if len(aqEntities) > 0:
-                    aqTasks = aqEntities[0]['tasks']
+                aqEntity = self.findAssetByPath(entity.get("asset_path", ""))
+                if aqEntity is not None:
+                    aqTasks = aqEntity['tasks']
                     for aqTask in aqTasks:
                         department = self.getDepartmentFromAssetTaskName(aqTask["data"]["name"])
                         if department:
@@ -740,9 +1103,9 @@ class Prism_Aquarium_Functions(object):
                             }
                             tasks.append(data)
             elif (entity["type"] == 'shot'):
-                aqEntities = [aqShot for aqShot in self.aqShots if aqShot['sequence'] == entity.get("sequence", "") and aqShot['name'] == entity.get("shot", "")]
-                if len(aqEntities) > 0:
-                    aqTasks = aqEntities[0]['tasks']
+                aqEntity = self.findShotBySequenceAndName(entity.get("sequence", ""), entity.get("shot", ""))
+                if aqEntity is not None:
+                    aqTasks = aqEntity['tasks']
                     for aqTask in aqTasks:
                         department = self.getDepartmentFromShotTaskName(aqTask["data"]["name"])
                         if department:
@@ -755,6 +1118,30 @@ class Prism_Aquarium_Functions(object):
                             tasks.append(data)
             return tasks
 
+    @err_catcher(name=__name__)
+    def refreshAqEntityTasks(self, aqEntity):
+        aqTasks = self.makeDbRequest('getAqEntityTasks', aqEntity['_key'], allowCache=False)
+        if aqTasks is not None:
+            self.aqIndex.setEntityTasks(aqEntity, aqTasks)
+
+        return aqEntity['tasks']
+
+    @err_catcher(name=__name__)
+    def updateAqTask(self, taskKey, data):
+        # Patch the cached task with the PATCH response instead of reloading the project
+        aqTask = self.runInBackground(None, self.aq.task(taskKey).update_data, data=data)
+
+        task, aqEntity = self.aqIndex.findTaskByKey(taskKey)
+        if aqEntity is None:
+            return aqTask
+
+        if aqTask is not None and aqTask._key == taskKey and aqTask.data:
+            self.aqIndex.patchTask(taskKey, aqTask.data.toDict())
+        else:
+            self.refreshAqEntityTasks(aqEntity)
+
+        return aqTask
+
     @err_catcher(name=__name__)
     def getTaskId(self, entity, prjId, taskname):
         # QUESTION: What's the goal of that function ?
@@ -779,9 +1166,7 @@ class Prism_Aquarium_Functions(object):
             if taskKey:
                 aqStatus = self.getAqStatusFromName(status)
                 if (aqStatus):
-                    self.aq.task(taskKey).update_data(data=aqStatus)
-                    self.getTasksFromEntity(entity, parent=parent, allowCache=False)
-                    self.getAssignedTasks()
+                    self.updateAqTask(taskKey, aqStatus)
                     return True
                 else:
                     msg = "Couldn't find matching status in Aquarium. Failed to set status."
@@ -802,10 +1187,11 @@ class Prism_Aquarium_Functions(object):
         popup = self.core.waitPopup(self.core, text, hidden=True)
         with popup:
             statuses = []
-            if self.aqStatuses is None or allowCache == False:
-                self.aqStatuses = self.getAqProjectStatuses()
+            aqStatuses = self.makeDbRequest('getAqProjectStatuses', popup=popup, allowCache=allowCache)
+            if aqStatuses is not None:
+                self.aqStatuses = aqStatuses
 
-            for aqStatus in self.aqStatuses:
+            for aqStatus in self.aqStatuses or []:
                 status = {
                     "name": aqStatus['status'],
                     "abbreviation": aqStatus['status'],
@@ -929,9 +1315,10 @@ class Prism_Aquarium_Functions(object):
                 }
 
                 popup.msg.setText("%s media %s. Please wait..." % (messageAction, mediaData['name']))
-                QApplication.processEvents()
 
-                media = castedEntity.upload_on_task(task['data']['name'], previewPath, mediaData, version, True, description)
+                media = self.runInBackground(
+                    None, castedEntity.upload_on_task, task['data']['name'], previewPath, mediaData, version, True, description
+                )
                 print(media)
                 if cleanupPreview:
                     try:
@@ -983,7 +1370,7 @@ class Prism_Aquarium_Functions(object):
                     'comments': '# -($Child)> 0,500 $Comment AND item._key != comment._key SORT item.createdAt ASC VIEW populate(item)'
                 }
             }
-            comments = self.aq.item(entity['id']).traverse(meshql, aliases)
+            comments = self.runInBackground(None, self.aq.item(entity['id']).traverse, meshql, aliases)
             print(comments)
 
             for comment in comments:
@@ -1003,7 +1390,7 @@ class Prism_Aquarium_Functions(object):
                 'content': note,
                 'type': 'prism-comment'
             }
-            aqComment = item.append('Comment', data)
+            aqComment = self.runInBackground(None, item.append, 'Comment', data)
 
             return {
                 "date": self.aq.utils.datetime(aqComment.item.createdAt).timestamp(),
@@ -1020,27 +1407,33 @@ class Prism_Aquarium_Functions(object):
     @err_catcher(name=__name__)
     def createReply(self, entityType, entity, parentNote, note, origin):
         conversationKey = parentNote.get('replyTo', None)
-
+        taskKey = None
         if conversationKey is None:
             aqTask = self.getTask(entity['entity'], entity['department'], entity['task'])
             if (aqTask is not None):
-                conversation = self.aq.item(aqTask['id']).append('Conversation', {"name": "Reply from: %s" % note[:20]})
+                taskKey = aqTask['id']
+
+        def reply(conversationKey):
+            # Runs in a worker
+            if conversationKey is None and taskKey is not None:
+                conversation = self.aq.item(taskKey).append('Conversation', {"name": "Reply from: %s" % note[:20]})
                 self.aq.edge.create('Child', conversation.item._key, parentNote['id'])
                 conversationKey = conversation.item._key
-                parentNote['replyTo'] = conversationKey
 
+            try:
+                self.aq.edge.create('Assigned', conversationKey, self.aqUser._key)
+            except:
+                pass
 
-        try:
-            self.aq.edge.create('Assigned', conversationKey, self.aqUser._key)
-        except:
-            pass
+            aqConversation = self.aq.item(conversationKey)
+            data = {
+                'content': note,
+                'type': 'prism-comment'
+            }
+            return conversationKey, aqConversation.append('Comment', data)
 
-        aqConversation = self.aq.item(conversationKey)
-        data = {
-            'content': note,
-            'type': 'prism-comment'
-        }
-        aqComment = aqConversation.append('Comment', data)
+        conversationKey, aqComment = self.runInBackground(None, reply, conversationKey)
+        parentNote['replyTo'] = conversationKey
 
         return {
             "date": self.aq.utils.datetime(aqComment.item.createdAt).timestamp(),
@@ -1067,7 +1460,7 @@ class Prism_Aquarium_Functions(object):
 
             data = {
                 "name": aqTask['data']['name'],
-                "path": aqEntity['prismPath'],
+                "path": aqEntity.get('prismPath'),
                 "entity": {
                     "type": aqEntity['item']['type'].lower(),
                 },
@@ -1091,7 +1484,7 @@ class Prism_Aquarium_Functions(object):
                     data['department'] = department['name']
             return data
 
-        if (allowCache == False):
+        if (allowCache == False) and not self.syncAqEntities():
             self.clearDbCache()
             self.getAssets()
             self.getShots()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under proprietary license. See license file in the directory of this plugin for details.
+#
+# This file is part of Prism-Plugin-Aquarium.
+# It's created by Yann Moriaud, from Fatfish Lab
+# Contact support@fatfi.sh for any issue related to this plugin
+#
+# Prism-Plugin-Aquarium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+
+
+def normalizePath(path):
+    return (path or '').replace('\\', '/')
+
+
+def latestUpdate(entity, current=None):
+    # ISO 8601 UTC dates from Aquarium compare as strings
+    # The assignments are edges: their dates are not in the task updatedAt
+    dates = [current, entity.get('updatedAt')]
+    for task in entity.get('tasks') or []:
+        dates.append(task.get('updatedAt'))
+        dates.extend(task.get('assignedAt') or [])
+    dates = [date for date in dates if date]
+    return max(dates) if dates else None
+
+
+def mergeEntities(entities, rows, trashedKeys=None):
+    # Replace the updated entities in place, append the new ones and drop trashed entities and tasks
+    trashed = set(trashedKeys or [])
+    updates = {}
+    for row in rows:
+        updates.setdefault(row.get('_key'), []).append(row)
+
+    merged = []
+    replaced = set()
+    for entity in entities or []:
+        key = entity.get('_key')
+        if key in trashed or key in replaced:
+            continue
+
+        if key in updates:
+            merged.extend(updates.pop(key))
+            replaced.add(key)
+            continue
+
+        if trashed and entity.get('tasks'):
+            entity['tasks'] = [task for task in entity['tasks'] if task.get('_key') not in trashed]
+        merged.append(entity)
+
+    for rows in updates.values():
+        merged.extend([row for row in rows if row.get('_key') not in trashed])
+
+    return merged
+
+
+class EntityIndex(object):
+    """
+    Dictionary lookups over the assets and shots returned by
+    getAqProjectAssets / getAqProjectShots.
+
+    The index is rebuilt each time a list is set and can be patched
+    entity by entity with indexAsset / indexShot. It also keeps the latest
+    updatedAt seen on the server rows, used as watermark for delta syncs.
+    """
+
+    def __init__(self):
+        self.setAssets(None)
+        self.setShots(None)
+
+    def setAssets(self, assets):
+        # Build the new dictionaries aside so concurrent readers never see a half index
+        index = EntityIndex.__new__(EntityIndex)
+        index.assetsByPath = {}
+        index.assetsByKey = {}
+        index.assetTasksByKey = {}
+        index.assetsUpdatedAt = None
+        for asset in assets or []:
+            index.indexAsset(asset)
+
+        self.assetsByPath = index.assetsByPath
+        self.assetsByKey = index.assetsByKey
+        self.assetTasksByKey = index.assetTasksByKey
+        self.assetsUpdatedAt = index.assetsUpdatedAt
+
+    def setShots(self, shots):
+        index = EntityIndex.__new__(EntityIndex)
+        index.shotsBySequenceAndName = {}
+        index.shotsByKey = {}
+        index.shotTasksByKey = {}
+        index.shotsUpdatedAt = None
+        for shot in shots or []:
+            index.indexShot(shot)
+
+        self.shotsBySequenceAndName = index.shotsBySequenceAndName
+        self.shotsByKey = index.shotsByKey
+        self.shotTasksByKey = index.shotTasksByKey
+        self.shotsUpdatedAt = index.shotsUpdatedAt
+
+    def indexAsset(self, asset, replace=False):
+        self.addTo(self.assetsByPath, asset.get('prismPath', ''), asset, replace)
+        self.addTo(self.assetsByKey, asset.get('_key'), asset, replace)
+        self.indexTasks(self.assetTasksByKey, asset)
+        self.assetsUpdatedAt = latestUpdate(asset, self.assetsUpdatedAt)
+
+    def indexShot(self, shot, replace=False):
+        key = (shot.get('sequence', ''), shot.get('name', ''))
+        self.addTo(self.shotsBySequenceAndName, key, shot, replace)
+        self.addTo(self.shotsByKey, shot.get('_key'), shot, replace)
+        self.indexTasks(self.shotTasksByKey, shot)
+        self.shotsUpdatedAt = latestUpdate(shot, self.shotsUpdatedAt)
+
+    def indexTasks(self, index, entity):
+        for task in entity.get('tasks') or []:
+            index[task.get('_key')] = (task, entity)
+
+    def setEntityTasks(self, entity, tasks):
+        if entity.get('_key') in self.assetsByKey:
+            index = self.assetTasksByKey
+        else:
+            index = self.shotTasksByKey
+
+        for task in entity.get('tasks') or []:
+            index.pop(task.get('_key'), None)
+
+        entity['tasks'] = tasks
+        self.indexTasks(index, entity)
+
+    def patchTask(self, taskKey, data):
+        task, entity = self.findTaskByKey(taskKey)
+        if task is not None:
+            task['data'] = data
+
+        return entity
+
+    @staticmethod
+    def addTo(index, key, entity, replace=False):
+        # Keep the first match, like the linear scans this index replaces
+        if replace or key not in index:
+            index[key] = entity
+
+    def findAssetByPath(self, path):
+        return self.assetsByPath.get(normalizePath(path))
+
+    def findShotBySequenceAndName(self, sequence, name):
+        return self.shotsBySequenceAndName.get((sequence, name))
+
+    def findEntityByKey(self, key):
+        return self.assetsByKey.get(key) or self.shotsByKey.get(key)
+
+    def findTaskByKey(self, key):
+        return self.assetTasksByKey.get(key) or self.shotTasksByKey.get(key) or (None, None)
@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under proprietary license. See license file in the directory of this plugin for details.
+#
+# This file is part of Prism-Plugin-Aquarium.
+# It's created by Yann Moriaud, from Fatfish Lab
+# Contact support@fatfi.sh for any issue related to this plugin
+#
+# Prism-Plugin-Aquarium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+
+"""
+Load test of a fake Aquarium server by concurrent Prism sessions, like a studio opening Prism on Monday morning.
+
+Each session is a plugin in its own process, logged in as an artist of a
+generated project (see Prism_Aquarium_Benchmark). It opens the project, then
+does a mix of actions with think times between them until the end of the test.
+Like the benchmark, it needs the Python of Prism.
+
+Usage::
+
+    python Prism_Aquarium_LoadTest.py --sessions 20 --duration 120 --size 10k --json monday.json
+    python Prism_Aquarium_LoadTest.py --sessions 20 --duration 120 --size 10k --set aquarium_pageSize=1000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from Prism_Aquarium_Benchmark import ProjectServer, USERS, createPlugin, parseSize
+from aquarium.profiler import percentile
+
+logger = logging.getLogger(__name__)
+
+
+# Relative weights of the actions of a session, after opening the project
+ACTIONS = {
+    "browse": 40,
+    "poll statuses": 20,
+    "refresh tasks": 10,
+    "my tasks": 10,
+    "set status": 10,
+    "read notes": 7,
+    "publish media": 3,
+}
+STATUSES = ["TO DO", "WIP", "PENDING REVIEW", "DONE"]
+
+
+def requestCount(plugin):
+    # Requests sent by the client of the plugin since its login, included
+    if plugin is None or plugin.aq is None:
+        return 0
+
+    return sum(stats["calls"] for stats in plugin.aq.stats()["requests"].values())
+
+
+class Session(object):
+    """
+    A Prism session of an artist: the plugin and its actions.
+    """
+
+    def __init__(self, index, info, settings=None, seed=0):
+        self.index = index
+        self.info = info
+        self.settings = settings or {}
+        self.random = random.Random(seed * 1000 + index)
+        self.user = "Artist %s" % (index % USERS)
+        self.email = "artist%s@fake.aquarium" % (index % USERS)
+        self.plugin = None
+        self.entities = []
+        self.versions = 0
+        self.records = []
+
+    def record(self, action, fn):
+        errors = len(self.plugin.core.errors) if self.plugin else 0
+        requests = requestCount(self.plugin)
+        start = time.time()
+        error = None
+        try:
+            result = fn()
+            ok = result is not None
+        except Exception as e:
+            logger.warning("session %s: %s failed: %s" % (self.index, action, e))
+            ok = False
+            error = "%s: %s" % (type(e).__name__, e)
+        seconds = time.time() - start
+
+        if self.plugin is not None:
+            ok = ok and len(self.plugin.core.errors) == errors
+        requests = requestCount(self.plugin) - requests
+        self.records.append({
+            "session": self.index,
+            "action": action,
+            "start": start,
+            "seconds": seconds,
+            "ok": ok,
+            "requests": requests,
+            "error": error,
+        })
+
+    def login(self):
+        self.plugin = createPlugin(self.info["url"], None, self.info["projectKey"], settings=self.settings,
+                                   email=self.email, password="artist")
+        return self.plugin
+
+    def openProject(self):
+        statuses = self.plugin.getTaskStatusList()
+        assets = self.plugin.getAssets()
+        shots = self.plugin.getShots()
+        if statuses is None or assets is None or shots is None:
+            return None
+
+        self.entities = assets + shots
+        return self.entities
+
+    def randomEntity(self):
+        return self.random.choice(self.entities)
+
+    def randomTask(self):
+        entity = self.randomEntity()
+        tasks = self.plugin.getTasksFromEntity(entity) or []
+        if not tasks:
+            return entity, None
+
+        return entity, self.random.choice(tasks)
+
+    def browse(self):
+        # Project browser: list the entities, then the tasks of the selected one
+        if self.randomEntity()["type"] == "asset":
+            self.plugin.getAssets()
+        else:
+            self.plugin.getShots()
+
+        return self.randomTask()[1]
+
+    def pollStatuses(self):
+        return self.plugin.getTaskStatusList(allowCache=False)
+
+    def refreshTasks(self):
+        return self.plugin.getTasksFromEntity(self.randomEntity(), allowCache=False)
+
+    def myTasks(self):
+        return self.plugin.getAssignedTasks(user=self.user, allowCache=False)
+
+    def setStatus(self):
+        entity, task = self.randomTask()
+        if task is None:
+            return None
+
+        return self.plugin.setTaskStatus(entity, task["department"], task["task"], self.random.choice(STATUSES))
+
+    def readNotes(self):
+        entity, task = self.randomTask()
+        if task is None:
+            return None
+
+        return self.plugin.getNotes("task", task)
+
+    def publishMedia(self, mediaPath):
+        entity, task = self.randomTask()
+        if task is None:
+            return None
+
+        self.versions += 1
+        version = "v%04d" % self.versions
+        return self.plugin.publishMedia([mediaPath], entity, task["task"], version, description="load test")
+
+    def run(self, startAt, deadline, think=5.0, mediaPath=None):
+        time.sleep(max(0, startAt - time.time()))
+        self.record("login", self.login)
+        if self.plugin is None:
+            return self.records
+
+        self.record("open project", self.openProject)
+        if not self.entities:
+            return self.records
+
+        actions = {
+            "browse": self.browse,
+            "poll statuses": self.pollStatuses,
+            "refresh tasks": self.refreshTasks,
+            "my tasks": self.myTasks,
+            "set status": self.setStatus,
+            "read notes": self.readNotes,
+            "publish media": lambda: self.publishMedia(mediaPath),
+        }
+        names = sorted(ACTIONS)
+        weights = [ACTIONS[name] for name in names]
+        while True:
+            # Exponential think times: the artists don't act in lockstep
+            time.sleep(self.random.expovariate(1.0 / think) if think else 0)
+            if time.time() >= deadline:
+                break
+
+            name = self.random.choices(names, weights)[0]
+            self.record(name, actions[name])
+
+        self.plugin.worker.cancel()
+        return self.records
+
+
+def runSession(index, info, startAt, deadline, think, settings, seed, mediaPath):
+    # Entry point of the session processes
+    logging.basicConfig(level=logging.WARNING)
+    session = Session(index, info, settings=settings, seed=seed)
+    # The plugin prints some of its results
+    with contextlib.redirect_stdout(io.StringIO()):
+        return session.run(startAt, deadline, think=think, mediaPath=mediaPath)
+
+
+def summarize(records, duration):
+    """
+    Throughput and latency percentiles of the actions, overall and by action.
+    """
+    def stats(records):
+        seconds = [record["seconds"] for record in records]
+        return {
+            "count": len(records),
+            "errors": len([record for record in records if not record["ok"]]),
+            "requests": sum(record["requests"] for record in records),
+            "per_second": len(records) / duration if duration else 0.0,
+            "p50_ms": percentile(seconds, 0.5) * 1000,
+            "p90_ms": percentile(seconds, 0.9) * 1000,
+            "p99_ms": percentile(seconds, 0.99) * 1000,
+            "max_ms": max(seconds) * 1000 if seconds else 0.0,
+        }
+
+    actions = {}
+    for record in records:
+        actions.setdefault(record["action"], []).append(record)
+
+    return {
+        "total": stats(records),
+        "actions": dict((action, stats(actionRecords)) for action, actionRecords in actions.items()),
+    }
+
+
+def loadTest(sessions=10, duration=60, size="10k", think=5.0, rampUp=10, latency=0, settings=None, seed=0):
+    """
+    Run the sessions against a fake server of a generated project.
+
+    :returns:   {summary, hits, duration, records, loggedIn}
+    """
+    mediaDir = tempfile.mkdtemp(prefix="prism_aquarium_load")
+    mediaPath = os.path.join(mediaDir, "preview.jpg")
+    with open(mediaPath, "wb") as f:
+        f.write(b"\xff\xd8\xff\xe0" + b"\x00" * 4096 + b"\xff\xd9")
+
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProjectServer(parseSize(size), seed=seed, latency=latency) as server:
+            with context.Pool(sessions) as pool:
+                # Leaves time for the session processes to start, then spreads the logins over the ramp-up
+                startAt = time.time() + 5
+                deadline = startAt + rampUp + duration
+                args = [
+                    (index, server.info, startAt + rampUp * index / float(sessions), deadline, think, settings, seed, mediaPath)
+                    for index in range(sessions)
+                ]
+                results = pool.starmap(runSession, args)
+
+            hits = server.hitCounts()
+            items = server.info["items"]
+    finally:
+        os.remove(mediaPath)
+        os.rmdir(mediaDir)
+
+    records = [record for sessionRecords in results for record in sessionRecords]
+    elapsed = max(record["start"] + record["seconds"] for record in records) - startAt if records else 0.0
+    return {
+        "sessions": sessions,
+        "items": items,
+        "duration": elapsed,
+        "summary": summarize(records, elapsed),
+        "server": {
+            "requests": sum(hit["hits"] for hit in hits.values()),
+            "per_second": sum(hit["hits"] for hit in hits.values()) / elapsed if elapsed else 0.0,
+            "seconds": sum(hit["seconds"] for hit in hits.values()),
+        },
+        "hits": hits,
+        "records": records,
+        "loggedIn": len([record for record in records if record["action"] == "login" and record["ok"]]),
+    }
+
+
+def parseSetting(text):
+    name, _, value = text.partition("=")
+    try:
+        value = json.loads(value)
+    except ValueError:
+        pass
+
+    return name, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent Prism sessions")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds of actions, after the ramp-up")
+    parser.add_argument("--size", default="10k", help="Items of the project: 1k, 10k, 100k or a number")
+    parser.add_argument("--think", type=float, default=5.0, help="Mean think time between two actions in seconds")
+    parser.add_argument("--ramp-up", dest="rampUp", type=float, default=10, help="Seconds over which the sessions log in")
+    parser.add_argument("--latency", type=float, default=0, help="Server latency in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--set", dest="settings", action="append", default=[], metavar="SETTING=VALUE",
+                        help="Project setting of the plugin, like aquarium_pageSize=1000")
+    parser.add_argument("--top", type=int, default=15, help="Server queries listed")
+    parser.add_argument("--json", default=None, help="Write the results to this file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    result = loadTest(sessions=args.sessions, duration=args.duration, size=args.size, think=args.think,
+                      rampUp=args.rampUp, latency=args.latency, settings=dict(parseSetting(s) for s in args.settings),
+                      seed=args.seed)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(dict(result, settings=dict(parseSetting(s) for s in args.settings), seed=args.seed), f, indent=2)
+
+    if not result["loggedIn"]:
+        errors = sorted(set(str(record.get("error")) for record in result["records"] if record["action"] == "login"))
+        sys.stderr.write("Error: none of the {sessions} sessions could log in, the load test didn't run.\n".format(**result))
+        for error in errors:
+            sys.stderr.write("  {0}\n".format(error))
+        return 1
+
+    summary = result["summary"]
+    print("{sessions} sessions on {items} items, {duration:.1f}s: {actions:.2f} actions/s, {requests:.1f} requests/s".format(
+        actions=summary["total"]["per_second"], requests=result["server"]["per_second"], **result))
+    print("")
+    print("{0:<16} {1:>7} {2:>7} {3:>9} {4:>9} {5:>9} {6:>9} {7:>9}".format(
+        "action", "count", "errors", "requests", "p50 ms", "p90 ms", "p99 ms", "max ms"))
+    for action, stats in sorted(summary["actions"].items(), key=lambda item: -item[1]["count"]) + [("total", summary["total"])]:
+        print("{action:<16} {count:>7} {errors:>7} {requests:>9} {p50_ms:>9.1f} {p90_ms:>9.1f} {p99_ms:>9.1f} {max_ms:>9.1f}".format(
+            action=action, **stats))
+
+    print("")
+    print("{0:>7} {1:>7} {2:>10}  {3}".format("hits", "errors", "server ms", "query"))
+    hits = sorted(result["hits"].items(), key=lambda item: -item[1]["seconds"])
+    for name, hit in hits[:args.top]:
+        print("{hits:>7} {errors:>7} {ms:>10.1f}  {name}".format(name=name, ms=hit["seconds"] * 1000, **hit))
+
+    if result["loggedIn"] < result["sessions"]:
+        sys.stderr.write("Warning: {0} of the {1} sessions could not log in.\n".format(
+            result["sessions"] - result["loggedIn"], result["sessions"]))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
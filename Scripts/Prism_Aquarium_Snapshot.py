@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under proprietary license. See license file in the directory of this plugin for details.
+#
+# This file is part of Prism-Plugin-Aquarium.
+# It's created by Yann Moriaud, from Fatfish Lab
+# Contact support@fatfi.sh for any issue related to this plugin
+#
+# Prism-Plugin-Aquarium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+SNAPSHOT_VERSION = 3
+
+
+def getDataDirectory():
+    # Directory of the current OS user, not shared like the temp directory
+    if sys.platform == 'win32':
+        base = os.getenv('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+    elif sys.platform == 'darwin':
+        base = os.path.join(os.path.expanduser('~'), 'Library', 'Application Support')
+    else:
+        base = os.getenv('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+
+    return os.path.join(base, 'Prism', 'Aquarium')
+
+
+def entityToDict(entity):
+    data = entity.data
+    if hasattr(data, 'toDict'):
+        data = data.toDict()
+
+    result = {
+        "_key": entity._key,
+        "_id": entity._id,
+        "_rev": entity._rev,
+        "type": entity.type,
+        "createdAt": entity.createdAt,
+        "updatedAt": entity.updatedAt,
+        "createdBy": entity.createdBy,
+        "updatedBy": entity.updatedBy,
+        "data": dict(data or {}),
+    }
+    if hasattr(entity, 'active'):
+        result['active'] = entity.active
+
+    return result
+
+
+class ProjectSnapshot(object):
+    """
+    Local copy of an Aquarium project, stored as JSON in the data directory
+    of the OS user and keyed by server url, project key and Aquarium user:
+    the data is filtered by the permissions of the user who loaded it.
+    The files are only readable by their owner.
+    """
+
+    def __init__(self, url, projectKey, userKey, directory=None):
+        self.url = url
+        self.projectKey = projectKey
+        self.userKey = userKey
+        self.directory = directory or os.path.join(getDataDirectory(), 'snapshots')
+
+    @property
+    def path(self):
+        key = hashlib.sha1(('%s|%s|%s' % (self.url, self.projectKey, self.userKey)).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key + '.json')
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except Exception as e:
+            logger.warning("Could not read Aquarium snapshot %s: %s" % (self.path, e))
+            return None
+
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            return None
+        if snapshot.get('url') != self.url or snapshot.get('projectKey') != self.projectKey \
+                or snapshot.get('userKey') != self.userKey:
+            return None
+
+        return snapshot
+
+    def save(self, data):
+        snapshot = dict(data)
+        snapshot.update({
+            "version": SNAPSHOT_VERSION,
+            "url": self.url,
+            "projectKey": self.projectKey,
+            "userKey": self.userKey,
+            "savedAt": time.time(),
+        })
+
+        tmpPath = '%s.%s.%s.tmp' % (self.path, os.getpid(), threading.get_ident())
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            fd = os.open(tmpPath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(tmpPath, self.path)
+        except Exception as e:
+            logger.warning("Could not write Aquarium snapshot %s: %s" % (self.path, e))
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+            return False
+
+        return True
+
+    def delete(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under proprietary license. See license file in the directory of this plugin for details.
+#
+# This file is part of Prism-Plugin-Aquarium.
+# It's created by Yann Moriaud, from Fatfish Lab
+# Contact support@fatfi.sh for any issue related to this plugin
+#
+# Prism-Plugin-Aquarium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+import hashlib
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from Prism_Aquarium_Snapshot import getDataDirectory
+
+logger = logging.getLogger(__name__)
+
+
+class ThumbnailCache(object):
+    """
+    Two levels cache of the Aquarium thumbnails.
+
+    The disk store is content-addressed: a file is stored once under the
+    hash of its content, and each server and thumbnail url links to it.
+    Files are evicted least recently used first once maxBytes is exceeded,
+    the links to an evicted file are dropped when they are read.
+    The store is in the data directory of the OS user, only readable by
+    its owner. Decoded pixmaps are kept in memory, up to maxPixmaps.
+    Concurrent requests of the same url wait for a single download: the
+    urls share a fixed pool of locks, chosen by the hash of the url.
+    """
+
+    urlLockCount = 64
+    # Temporary files older than this are left by a crashed download
+    tmpMaxAge = 3600
+
+    def __init__(self, directory=None, maxBytes=500 * 1024 * 1024, maxPixmaps=500):
+        self.directory = directory or os.path.join(getDataDirectory(), 'thumbnails')
+        self.maxBytes = maxBytes
+        self.maxPixmaps = maxPixmaps
+
+        self._lock = threading.Lock()
+        self._urlLocks = [threading.Lock() for i in range(self.urlLockCount)]
+        self._pixmaps = OrderedDict()
+        self._files = None
+        self._size = 0
+
+    def getKey(self, server, url):
+        return hashlib.sha1(('%s|%s' % (server, url)).encode('utf-8')).hexdigest()
+
+    def getLinkPath(self, key):
+        return os.path.join(self.directory, 'urls', key[:2], key)
+
+    def getFilePath(self, digest, extension=''):
+        return os.path.join(self.directory, 'files', digest[:2], digest + extension)
+
+    def getUrlLock(self, key):
+        # The key is the sha1 of the url
+        return self._urlLocks[int(key[:8], 16) % len(self._urlLocks)]
+
+    def writeFile(self, path, content):
+        # Atomic and only readable by the user: a crashed write leaves no partial file
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            os.chmod(self.directory, 0o700)
+
+        tmpPath = '%s.%s.tmp' % (path, threading.get_ident())
+        try:
+            fd = os.open(tmpPath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmpPath, path)
+        finally:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+
+    def loadFiles(self):
+        # Called with self._lock held
+        if self._files is not None:
+            return
+
+        files = []
+        now = time.time()
+        for root, dirs, names in os.walk(os.path.join(self.directory, 'files')):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+
+                if name.endswith('.tmp'):
+                    # Only the old ones: the others may still be written by another Prism
+                    if now - stat.st_mtime > self.tmpMaxAge:
+                        try:
+                            os.remove(path)
+                        except OSError:
+                            pass
+                    continue
+
+                files.append((stat.st_mtime, path, stat.st_size))
+
+        self._files = OrderedDict()
+        self._size = 0
+        for mtime, path, size in sorted(files):
+            self._files[path] = size
+            self._size += size
+
+    def touchFile(self, path):
+        with self._lock:
+            self.loadFiles()
+            if path in self._files:
+                self._files.move_to_end(path)
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def addFile(self, path, size):
+        with self._lock:
+            self.loadFiles()
+            self._size += size - self._files.pop(path, 0)
+            self._files[path] = size
+            self.evict()
+
+    def evict(self):
+        # Called with self._lock held
+        while self._size > self.maxBytes and len(self._files) > 1:
+            path, size = self._files.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.debug("Could not remove thumbnail %s: %s" % (path, e))
+
+    def getCachedPixmap(self, key):
+        with self._lock:
+            pixmap = self._pixmaps.get(key)
+            if pixmap is not None:
+                self._pixmaps.move_to_end(key)
+            return pixmap
+
+    def addPixmap(self, key, pixmap):
+        with self._lock:
+            self._pixmaps[key] = pixmap
+            self._pixmaps.move_to_end(key)
+            while len(self._pixmaps) > self.maxPixmaps:
+                self._pixmaps.popitem(last=False)
+
+    def readLink(self, key):
+        # Path of the file linked to the url, None if it is not on disk (any more)
+        linkPath = self.getLinkPath(key)
+        try:
+            with open(linkPath, 'r') as f:
+                name = f.read().strip()
+        except (IOError, OSError):
+            return None
+
+        path = self.getFilePath(name[:40], name[40:])
+        if os.path.exists(path):
+            return path
+
+        try:
+            os.remove(linkPath)
+        except OSError:
+            pass
+        return None
+
+    def getCachedFile(self, server, url):
+        # Path of the file if it is already on disk, without downloading it
+        path = self.readLink(self.getKey(server, url))
+        if path is not None:
+            self.touchFile(path)
+
+        return path
+
+    def getFile(self, server, url, download):
+        key = self.getKey(server, url)
+
+        with self.getUrlLock(key):
+            path = self.readLink(key)
+            if path is not None:
+                self.touchFile(path)
+                return path
+
+            content = download(url)
+            digest = hashlib.sha1(content).hexdigest()
+            extension = os.path.splitext(url.split('?')[0])[1]
+            path = self.getFilePath(digest, extension)
+            if os.path.exists(path):
+                # Same image under another url
+                self.touchFile(path)
+            else:
+                self.writeFile(path, content)
+                self.addFile(path, len(content))
+
+            self.writeFile(self.getLinkPath(key), (digest + extension).encode('utf-8'))
+
+        return path
+
+    def loadPixmap(self, key, path, load):
+        # Decode a downloaded file, None if it was evicted since
+        pixmap = self.getCachedPixmap(key)
+        if pixmap is not None or path is None or not os.path.exists(path):
+            return pixmap
+
+        pixmap = load(path)
+        if pixmap is not None:
+            self.addPixmap(key, pixmap)
+
+        return pixmap
+
+    def clear(self):
+        with self._lock:
+            self._pixmaps.clear()
+
+
+class ThumbnailRequest(object):
+    def __init__(self, server, url, download, priority):
+        self.server = server
+        self.url = url
+        self.download = download
+        self.priority = priority
+        self.callbacks = []
+        self.running = False
+        self.cancelled = False
+
+
+class ThumbnailLoader(object):
+    """
+    Download thumbnails in the background, most urgent first.
+
+    The downloads run in the thread pool of the plugin worker: submit(fn)
+    runs fn there. At most `workers` downloads run at the same time, so the
+    thumbnails never take all the threads of the project requests.
+    Callbacks are called from the worker thread with the path of the file
+    on disk (or None if the download failed). Pending requests can be
+    reprioritized or cancelled, for example when rows scroll out of view.
+    """
+
+    VISIBLE = 0
+    OFFSCREEN = 1
+
+    def __init__(self, cache, submit, workers=2):
+        self.cache = cache
+        self.submit = submit
+        self.workers = workers
+
+        self._lock = threading.Lock()
+        self._queue = []
+        self._counter = itertools.count()
+        self._requests = {}
+        self._running = 0
+
+    def push(self, key, request):
+        # Called with self._lock held. Outdated queue entries are skipped by pop
+        heapq.heappush(self._queue, (request.priority, next(self._counter), key))
+
+    def pop(self):
+        # Called with self._lock held
+        while self._queue:
+            priority, _, key = heapq.heappop(self._queue)
+            request = self._requests.get(key)
+            if request is not None and not request.running and request.priority == priority:
+                request.running = True
+                return key, request
+
+        return None, None
+
+    def request(self, server, url, download, callback, priority=VISIBLE):
+        key = self.cache.getKey(server, url)
+        with self._lock:
+            request = self._requests.get(key)
+            if request is None:
+                request = self._requests[key] = ThumbnailRequest(server, url, download, priority)
+                self.push(key, request)
+            elif priority < request.priority and not request.running:
+                request.priority = priority
+                self.push(key, request)
+            request.callbacks.append(callback)
+
+            start = self._running < self.workers
+            if start:
+                self._running += 1
+
+        if start:
+            try:
+                self.submit(self.work)
+            except Exception:
+                with self._lock:
+                    self._running -= 1
+                raise
+
+        return key
+
+    def cancel(self, key):
+        with self._lock:
+            request = self._requests.pop(key, None)
+            if request is not None:
+                request.cancelled = True
+
+    def cancelAll(self):
+        with self._lock:
+            for request in self._requests.values():
+                request.cancelled = True
+            self._requests.clear()
+            self._queue = []
+
+    def prioritize(self, keys, cancelOthers=True):
+        # Visible keys jump the queue, the other pending requests are cancelled or delayed
+        keys = set(keys)
+        with self._lock:
+            for key, request in list(self._requests.items()):
+                if request.running:
+                    continue
+
+                if key in keys:
+                    if request.priority != self.VISIBLE:
+                        request.priority = self.VISIBLE
+                        self.push(key, request)
+                elif cancelOthers:
+                    request.cancelled = True
+                    del self._requests[key]
+                elif request.priority == self.VISIBLE:
+                    request.priority = self.OFFSCREEN
+                    self.push(key, request)
+
+    def work(self):
+        # Runs in a worker thread until the queue is empty
+        while True:
+            with self._lock:
+                key, request = self.pop()
+                if request is None:
+                    self._running -= 1
+                    return
+
+            try:
+                path = self.cache.getFile(request.server, request.url, request.download)
+            except Exception as e:
+                logger.warning("Could not download thumbnail %s: %s" % (request.url, e))
+                path = None
+
+            with self._lock:
+                if self._requests.get(key) is request:
+                    del self._requests[key]
+                callbacks = [] if request.cancelled else list(request.callbacks)
+
+            for callback in callbacks:
+                try:
+                    callback(key, path)
+                except Exception as e:
+                    logger.warning("Thumbnail callback failed for %s: %s" % (request.url, e))
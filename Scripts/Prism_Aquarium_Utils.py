@@ -25,6 +25,7 @@
 # MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
 
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 def baseUrl(base, url):
     if url: return urllib.parse.urljoin(base, url)
@@ -39,3 +40,78 @@ def hexToRgb(hex):
 
 def flatten(listToFlatten):
     return [item for sublist in listToFlatten for item in sublist]
+
+def fetchPages(fetchPage, pageSize=500, parallelism=4, onPage=None, isCancelled=None):
+    # fetchPage(offset, limit) is called from a bounded pool, several pages ahead.
+    # Pages are merged (and handed to onPage) in offset order, as soon as every
+    # previous page is there. When isCancelled() returns True, no more pages are
+    # requested and None is returned.
+    # The server may cap the rows below pageSize: the first page gives the actual
+    # page size, and when it is short a second page tells a capped page from the
+    # last one. Then the first page shorter than the page size ends the results.
+    pageSize = max(1, int(pageSize))
+    parallelism = max(1, int(parallelism))
+
+    results = []
+
+    def emit(rows):
+        results.extend(rows)
+        if onPage and rows:
+            onPage(rows)
+
+    rows = fetchPage(0, pageSize) or []
+    emit(rows)
+    offset = pageSize
+    if len(rows) < pageSize:
+        if not rows:
+            return results
+        if isCancelled and isCancelled():
+            return None
+
+        pageSize = len(rows)
+        rows = fetchPage(pageSize, pageSize) or []
+        emit(rows)
+        if len(rows) < pageSize:
+            return results
+        offset = 2 * pageSize
+
+    if isCancelled and isCancelled():
+        return None
+
+    pages = {}
+    running = {}
+    nextPage = 0
+    nextEmit = 0
+    lastPage = None
+
+    with ThreadPoolExecutor(max_workers=parallelism) as executor:
+        def submit():
+            nonlocal nextPage
+            running[executor.submit(fetchPage, offset + nextPage * pageSize, pageSize)] = nextPage
+            nextPage += 1
+
+        while len(running) < parallelism:
+            submit()
+
+        while running:
+            if isCancelled and isCancelled():
+                for future in running:
+                    future.cancel()
+                return None
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                page = running.pop(future)
+                rows = future.result() or []
+                pages[page] = rows
+                if len(rows) < pageSize and (lastPage is None or page < lastPage):
+                    lastPage = page
+
+            while nextEmit in pages and (lastPage is None or nextEmit <= lastPage):
+                emit(pages.pop(nextEmit))
+                nextEmit += 1
+
+            while lastPage is None and len(running) < parallelism:
+                submit()
+
+    return results
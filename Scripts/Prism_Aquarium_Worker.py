@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under proprietary license. See license file in the directory of this plugin for details.
+#
+# This file is part of Prism-Plugin-Aquarium.
+# It's created by Yann Moriaud, from Fatfish Lab
+# Contact support@fatfi.sh for any issue related to this plugin
+#
+# Prism-Plugin-Aquarium is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PrismUtils.Decorators import err_catcher_plugin
+from qtpy.QtCore import QEventLoop, QObject, Signal, Slot
+from qtpy.QtWidgets import QApplication
+
+logger = logging.getLogger(__name__)
+
+
+_local = threading.local()
+
+
+def currentTask():
+    return getattr(_local, 'task', None)
+
+
+def isCancelled():
+    task = currentTask()
+    return task is not None and task.cancelled
+
+
+def reportProgress(message):
+    task = currentTask()
+    if task is not None:
+        task.reportProgress(message)
+
+
+def isMainThread():
+    return threading.current_thread() is threading.main_thread()
+
+
+def err_catcher(name):
+    # Prism's err_catcher_plugin reports the error in a dialog, which can't be opened
+    # outside the main thread. There the exception goes up to the worker task instead,
+    # and is raised again in the main thread by AquariumWorker.wait.
+    def decorator(func):
+        caught = err_catcher_plugin(name=name)(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if isMainThread():
+                return caught(*args, **kwargs)
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class MainThreadInvoker(QObject):
+    # Created in the main thread: emitting from a worker queues the call to the main thread
+    invoked = Signal(object, object)
+
+    def __init__(self):
+        super(MainThreadInvoker, self).__init__()
+        self.invoked.connect(self.onInvoked)
+
+    @Slot(object, object)
+    def onInvoked(self, fn, args):
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.warning("Aquarium main thread call failed: %s" % e)
+
+    def invoke(self, fn, *args):
+        if isMainThread():
+            fn(*args)
+        else:
+            self.invoked.emit(fn, args)
+
+
+class AquariumTask(object):
+    def __init__(self, name, fn, args, kwargs, onProgress=None, onFinished=None):
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.onProgress = onProgress
+        self.onFinished = onFinished
+
+        self.cancelled = False
+        self.result = None
+        self.error = None
+        self.finished = threading.Event()
+        self._lock = threading.Lock()
+        self._doneCallbacks = []
+
+    def cancel(self):
+        self.cancelled = True
+
+    def isDone(self):
+        return self.finished.is_set()
+
+    def addDoneCallback(self, fn):
+        # fn() is called from the worker thread once the task is done, or right away if it is
+        with self._lock:
+            if not self.finished.is_set():
+                self._doneCallbacks.append(fn)
+                return
+
+        fn()
+
+    def reportProgress(self, message):
+        if self.onProgress and not self.cancelled:
+            self.onProgress(message)
+
+    def run(self):
+        _local.task = self
+        try:
+            if not self.cancelled:
+                self.result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.error = e
+        finally:
+            _local.task = None
+            with self._lock:
+                self.finished.set()
+                callbacks, self._doneCallbacks = self._doneCallbacks, []
+
+        for callback in callbacks:
+            callback()
+
+        if self.onFinished and not self.cancelled:
+            self.onFinished(self)
+
+
+class AquariumWorker(object):
+    """
+    Runs the Aquarium requests in a thread pool, away from the Qt main thread.
+
+    Named tasks are single-flight: submitting a name which is still running
+    returns the running task. Progress and completion callbacks are called
+    in the main thread.
+    """
+
+    def __init__(self, maxWorkers=4):
+        self.executor = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix="Aquarium")
+        self.invoker = MainThreadInvoker()
+        self._lock = threading.Lock()
+        self._tasks = {}
+
+    def submit(self, name, fn, *args, **kwargs):
+        onProgress = kwargs.pop('onProgress', None)
+        onFinished = kwargs.pop('onFinished', None)
+
+        with self._lock:
+            task = self._tasks.get(name) if name else None
+            if task is not None and not task.isDone() and not task.cancelled:
+                return task
+
+            task = AquariumTask(
+                name, fn, args, kwargs,
+                onProgress=(lambda message: self.invoker.invoke(onProgress, message)) if onProgress else None,
+                onFinished=(lambda task: self.invoker.invoke(onFinished, task)) if onFinished else None,
+            )
+            if name:
+                self._tasks[name] = task
+
+        self.executor.submit(task.run)
+        return task
+
+    def isRunning(self, name):
+        with self._lock:
+            task = self._tasks.get(name)
+            return task is not None and not task.isDone() and not task.cancelled
+
+    def cancel(self, name=None):
+        with self._lock:
+            tasks = list(self._tasks.values()) if name is None else [self._tasks.get(name)]
+        for task in tasks:
+            if task is not None:
+                task.cancel()
+
+    def wait(self, task):
+        # Wait in a local event loop which excludes the user input: the DCC keeps painting
+        # and the queued main thread calls run, but a click can't re-enter the plugin while
+        # a load is half done
+        app = QApplication.instance()
+        if app is None or not isMainThread():
+            task.finished.wait()
+        else:
+            loop = QEventLoop()
+            task.addDoneCallback(lambda: self.invoker.invoke(loop.quit))
+            if not task.isDone():
+                loop.exec_(QEventLoop.ExcludeUserInputEvents)
+
+        if task.error is not None:
+            raise task.error
+
+        return task.result
+
+    def run(self, name, fn, *args, **kwargs):
+        # Already in a worker: run inline rather than waiting on another pool slot
+        if currentTask() is not None:
+            kwargs.pop('onProgress', None)
+            kwargs.pop('onFinished', None)
+            return fn(*args, **kwargs)
+
+        return self.wait(self.submit(name, fn, *args, **kwargs))
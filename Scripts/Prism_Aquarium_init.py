@@ -26,8 +26,9 @@
 
 from Prism_Aquarium_Variables import Prism_Aquarium_Variables
 from Prism_Aquarium_Functions import Prism_Aquarium_Functions
-
-from PrismUtils.Decorators import err_catcher_plugin as err_catcher
+from Prism_Aquarium_Index import EntityIndex
+from Prism_Aquarium_Utils import fetchPages
+from Prism_Aquarium_Worker import err_catcher, isCancelled
 
 import logging
 logger = logging.getLogger(__name__)
@@ -36,6 +37,7 @@ class Prism_Aquarium(Prism_Aquarium_Variables, Prism_Aquarium_Functions):
     def __init__(self, core):
         self.aq = None
         self.aqUser = None
+        self.aqIndex = EntityIndex()
 
         self.aqUsers = None
         self.aqShots = None
@@ -133,7 +135,7 @@ class Prism_Aquarium(Prism_Aquarium_Variables, Prism_Aquarium_Functions):
         return location
 
     @err_catcher(name=__name__)
-    def getAqProjectAssets(self, project = None):
+    def getAqProjectAssets(self, project = None, onPage = None, since = None):
         if (project == None): project = self.aqProject
 
         if project == None:
@@ -147,11 +149,16 @@ class Prism_Aquarium(Prism_Aquarium_Variables, Prism_Aquarium_Functions):
                 usePrismNamingConvention = project.prism['properties']['usePrismNamingConvention']
 
         startpoint = self.getAssetsLocation(project = project)
-        query = "# -($Child, 3)> 0,500 $Asset AND path.edges[*].data.hidden != true VIEW $view"
+        query = ["# -($Child, 3)> {offset},{limit} $Asset AND path.edges[*].data.hidden != true"]
+        if since:
+            query.append("AND (item.updatedAt >= @since OR -($Child, 2)> ($Task AND (item.updatedAt >= @since OR -($Assigned)> edge.updatedAt >= @since)))")
+        query.append("SORT item._key VIEW $view")
+        query = ' '.join(query)
         aliases = {
             "view": {
                 "item": "item",
                 "_key": "item._key",
+                "updatedAt": "item.updatedAt",
                 "name": "item.data.name",
                 "thumbnail": "item.data.thumbnail",
                 "parent": "path.vertices[-2]",
@@ -161,11 +168,16 @@ class Prism_Aquarium(Prism_Aquarium_Variables, Prism_Aquarium_Functions):
             },
             "taskView": {
                 "_key": "item._key",
+                "updatedAt": "item.updatedAt",
                 "data": "item.data",
                 "users": "# -($Assigned)> $User VIEW item",
+                "assignedAt": "# -($Assigned)> $User VIEW edge.updatedAt",
             }
         }
 
+        if since:
+            aliases['since'] = since
+
         if (usePrismNamingConvention) :
             aliases['view']['name'] = "SUBSTITUTE(item.data.name, [ '_',' ','-' ], '{separator}' )".format(
                 separator=separator
@@ -177,16 +189,19 @@ class Prism_Aquarium(Prism_Aquarium_Variables, Prism_Aquarium_Functions):
                 separator=separator
             )
 
-        assets = self.aq.item(startpoint).traverse(meshql=query, aliases=aliases)
+        def fetchPage(offset, limit):
+            assets = self.aq.item(startpoint).traverse(meshql=query.format(offset=offset, limit=limit), aliases=aliases)
 
-        for asset in assets:
-            prismPath = '/'.join(asset['parentsName'][1:-1] + [asset['name']])
-            asset['prismPath'] = prismPath
+            for asset in assets:
+                prismPath = '/'.join(asset['parentsName'][1:-1] + [asset['name']])
+                asset['prismPath'] = prismPath
 
-        return assets
+            return assets
+
+        return fetchPages(fetchPage, self.getPageSize(), self.getPageParallelism(), onPage=onPage, isCancelled=isCancelled)
 
     @err_catcher(name=__name__)
-    def getAqProjectShots(self, project = None):
+    def getAqProjectShots(self, project = None, onPage = None, since = None):
         if (project == None): project = self.aqProject
 
         if project == None:
@@ -199,11 +214,16 @@ class Prism_Aquarium(Prism_Aquarium_Variables, Prism_Aquarium_Functions):
 
         separator = '_'
         startpoint = self.getShotsLocation(project = project)
-        query = "# -($Child, 3)> 0,500 $Shot AND path.edges[*].data.hidden != true VIEW $view"
+        query = ["# -($Child, 3)> {offset},{limit} $Shot AND path.edges[*].data.hidden != true"]
+        if since:
+            query.append("AND (item.updatedAt >= @since OR -($Child, 2)> ($Task AND (item.updatedAt >= @since OR -($Assigned)> edge.updatedAt >= @since)))")
+        query.append("SORT item._key VIEW $view")
+        query = ' '.join(query)
         aliases = {
             "view": {
                 "item": "item",
                 "_key": "item._key",
+                "updatedAt": "item.updatedAt",
                 "name": "item.data.name",
                 "thumbnail": "item.data.thumbnail",
                 "parent": "path.vertices[-2]",
@@ -212,11 +232,16 @@ class Prism_Aquarium(Prism_Aquarium_Variables, Prism_Aquarium_Functions):
             },
             "taskView": {
                 "_key": "item._key",
+                "updatedAt": "item.updatedAt",
                 "data": "item.data",
                 "users": "# -($Assigned)> $User VIEW item",
+                "assignedAt": "# -($Assigned)> $User VIEW edge.updatedAt",
             }
         }
 
+        if since:
+            aliases["since"] = since
+
         if (usePrismNamingConvention):
             aliases["view"]["name"] = "SUBSTITUTE(item.data.name, [ '_',' ','-' ], '{separator}' )".format(
                 separator=separator
@@ -225,39 +250,73 @@ class Prism_Aquarium(Prism_Aquarium_Variables, Prism_Aquarium_Functions):
                 separator='.'
             )
 
-        shots = self.aq.item(startpoint).traverse(meshql=query, aliases=aliases)
+        def fetchPage(offset, limit):
+            shots = self.aq.item(startpoint).traverse(meshql=query.format(offset=offset, limit=limit), aliases=aliases)
+
+            for shot in shots:
+                prismId = None
+                sequence = None
+                if (shot['parent']['_key'] == startpoint):
+                    prismId = "{separator}{shotName}".format(
+                        separator = separator,
+                        shotName = shot['name']
+                    )
+                else:
+                    prismId = "{parentName}{separator}{shotName}".format(
+                        parentName = shot['parentName'],
+                        separator = separator,
+                        shotName = shot['name']
+                    )
+                    sequence = shot['parentName']
+                shot['prismId'] = prismId
+                shot['sequence'] = sequence
+
+            return shots
+
+        return fetchPages(fetchPage, self.getPageSize(), self.getPageParallelism(), onPage=onPage, isCancelled=isCancelled)
 
-        for shot in shots:
-            prismId = None
-            sequence = None
-            if (shot['parent']['_key'] == startpoint):
-                prismId = "{separator}{shotName}".format(
-                    separator = separator,
-                    shotName = shot['name']
-                )
-            else:
-                prismId = "{parentName}{separator}{shotName}".format(
-                    parentName = shot['parentName'],
-                    separator = separator,
-                    shotName = shot['name']
-                )
-                sequence = shot['parentName']
-            shot['prismId'] = prismId
-            shot['sequence'] = sequence
+    @err_catcher(name=__name__)
+    def getAqTrashedKeys(self, startpoint, since = None):
+        query = ["# -($Child, 5)> item.type IN @types"]
+        if since:
+            query.append("AND item.updatedAt >= @since")
+        query.append("VIEW item._key")
+        query = ' '.join(query)
+        aliases = {
+            "types": ["Asset", "Shot", "Task"]
+        }
+
+        if since:
+            aliases["since"] = since
 
-        return shots
+        return self.aq.item(startpoint).traverse_trashed(meshql=query, aliases=aliases)
+
+    @err_catcher(name=__name__)
+    def getAqEntityTasks(self, entityKey):
+        query = "# -($Child, 2)> $Task SORT edge.data.weight VIEW $taskView"
+        aliases = {
+            "taskView": {
+                "_key": "item._key",
+                "updatedAt": "item.updatedAt",
+                "data": "item.data",
+                "users": "# -($Assigned)> $User VIEW item",
+                "assignedAt": "# -($Assigned)> $User VIEW edge.updatedAt",
+            }
+        }
+
+        return self.aq.item(entityKey).traverse(meshql=query, aliases=aliases)
 
     @err_catcher(name=__name__)
     def getAqProjectStatuses (self, project = None):
         if project == None: project = self.aqProject
-        if self.aqProject == None:
+        if project == None:
             return []
 
         query = '# -($Child)> $Properties AND item.data.tasks_status != null VIEW item.data.tasks_status'
 
         statuses = []
 
-        aqStatuses = self.aqProject.traverse(meshql=query)
+        aqStatuses = project.traverse(meshql=query)
         for aqStatus in aqStatuses:
             if aqStatus:
                 exist = [status for status in statuses if status['status'] == aqStatus['status']]
@@ -269,10 +328,25 @@ class Prism_Aquarium(Prism_Aquarium_Variables, Prism_Aquarium_Functions):
 
         return statuses
 
+    @err_catcher(name=__name__)
+    def getAqProjectUsers(self, projectKey):
+        participants = self.aq.project(projectKey).get_permissions(includeMembers=True)
+        users = [participant.user for participant in participants if participant.user.type == 'User']
+        members = [participant.members for participant in participants if participant.user.type != 'User']
+
+        for usergroupMembers in members:
+            for member in usergroupMembers:
+                if not any(user._key == member._key for user in users):
+                    users.append(member)
+
+        return users
+
     @err_catcher(name=__name__)
     def getAqStatusFromName (self, statusName):
         status = None
-        aqStatuses = self.getAqProjectStatuses()
+        aqStatuses = self.aqStatuses
+        if aqStatuses is None:
+            aqStatuses = self.makeDbRequest('getAqProjectStatuses') or []
 
         aqStatus = [aqStatus for aqStatus in aqStatuses if aqStatus['status'] == statusName]
         if len(aqStatus) > 0:
@@ -309,13 +383,29 @@ class Prism_Aquarium(Prism_Aquarium_Variables, Prism_Aquarium_Functions):
         return playlists
 
 
+    @property
+    def aqAssets(self):
+        return self._aqAssets
+
+    @aqAssets.setter
+    def aqAssets(self, assets):
+        self._aqAssets = assets
+        self.aqIndex.setAssets(assets)
+
+    @property
+    def aqShots(self):
+        return self._aqShots
+
+    @aqShots.setter
+    def aqShots(self, shots):
+        self._aqShots = shots
+        self.aqIndex.setShots(shots)
+
     def findAssetByPath(self, path):
-        find = lambda asset: asset.get('prismPath', '') == path.replace('\\', "/")
-        return next(filter(find, self.aqAssets), None)
+        return self.aqIndex.findAssetByPath(path)
 
     def findShotBySequenceAndName(self, sequence, name):
-        find = lambda shot: shot.get('sequence', '') == sequence and shot.get('name', '') == name
-        return next(filter(find, self.aqShots), None)
+        return self.aqIndex.findShotBySequenceAndName(sequence, name)
 
     def getPlaylists(self, allowCache=True, parent=None):
         return []
\ No newline at end of file
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import os.path
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+
+# The plugin modules are imported from the Scripts directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+
+from Prism_Aquarium_Cache import DbCache
+
+
+class Loader(object):
+    # Counts its calls, and blocks them until released
+
+    def __init__(self, value='value', error=None):
+        self.value = value
+        self.error = error
+        self.calls = 0
+        self.released = threading.Event()
+        self.released.set()
+
+    def __call__(self):
+        self.calls += 1
+        self.released.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class DbCacheTestCase(unittest.TestCase):
+
+    def getAll(self, cache, loader, count=8):
+        # Run count identical requests at the same time
+        results = [None] * count
+        errors = [None] * count
+
+        def get(index):
+            try:
+                results[index] = cache.get('getAqProject', ['1'], loader)
+            except Exception as e:
+                errors[index] = e
+
+        loader.released.clear()
+        threads = [threading.Thread(target=get, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        loader.released.set()
+        for thread in threads:
+            thread.join(5)
+
+        return results, errors
+
+    def test_single_flight(self):
+        cache = DbCache()
+        loader = Loader()
+        results, errors = self.getAll(cache, loader)
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(results, ['value'] * len(results))
+        self.assertEqual(errors, [None] * len(errors))
+
+    def test_error_raised_to_all_waiters(self):
+        cache = DbCache()
+        error = RuntimeError('Aquarium is down')
+        loader = Loader(error=error)
+        results, errors = self.getAll(cache, loader)
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(errors, [error] * len(errors))
+
+        # The error is not cached
+        loader.error = None
+        self.assertEqual(cache.get('getAqProject', ['1'], loader), 'value')
+        self.assertEqual(loader.calls, 2)
+
+    def test_ttl_never_invalidates(self):
+        cache = DbCache(ttl=-1)
+        loader = Loader()
+        with mock.patch('Prism_Aquarium_Cache.time.time', return_value=1000.0) as now:
+            cache.get('loadAqAssets', [], loader)
+            now.return_value += 365 * 24 * 3600
+            cache.get('loadAqAssets', [], loader)
+        self.assertEqual(loader.calls, 1)
+
+    def test_ttl_disables_cache(self):
+        cache = DbCache(ttl=0)
+        loader = Loader()
+        cache.get('loadAqAssets', [], loader)
+        cache.get('loadAqAssets', [], loader)
+        self.assertEqual(loader.calls, 2)
+        self.assertEqual(cache.peek('loadAqAssets', []), (False, None))
+
+    def test_ttl_seconds(self):
+        cache = DbCache(ttl=30)
+        loader = Loader()
+        with mock.patch('Prism_Aquarium_Cache.time.time', return_value=1000.0) as now:
+            cache.get('loadAqAssets', [], loader)
+            now.return_value += 29
+            cache.get('loadAqAssets', [], loader)
+            self.assertEqual(loader.calls, 1)
+            now.return_value += 2
+            cache.get('loadAqAssets', [], loader)
+            self.assertEqual(loader.calls, 2)
+
+    def test_keys(self):
+        cache = DbCache()
+        loader = Loader()
+        cache.get('query', [{'a': 1, 'b': [1, 2]}], loader)
+        cache.get('query', [{'b': [1, 2], 'a': 1}], loader)
+        self.assertEqual(loader.calls, 1)
+
+        cache.get('query', [{'a': 1, 'b': [2, 1]}], loader)
+        cache.get('query', [{'a': '1', 'b': [1, 2]}], loader)
+        self.assertEqual(loader.calls, 3)
+
+    def test_objects_not_cached(self):
+        # Their repr would differ between calls, or match different objects
+        cache = DbCache()
+        loader = Loader()
+        self.assertIsNone(DbCache.makeKey('query', [object()]))
+        cache.get('query', [object()], loader)
+        cache.get('query', [object()], loader)
+        self.assertEqual(loader.calls, 2)
+        cache.set('query', [object()], 'value')
+        self.assertEqual(cache.peek('query', [object()]), (False, None))
+
+
+if __name__ == '__main__':
+    unittest.main()